@@ -2,13 +2,26 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.html import format_html
 from django.urls import reverse
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import timedelta
+from case_notes.models import CaseNote
+from clients.models import Client
+from config.admin_tools import EstimatedCountPaginator, ReplicaChangelistMixin
 from .models import User
 
 
+def _count(queryset):
+    """Correlated COUNT(*) subquery, evaluated only for the rows on the page"""
+    return Coalesce(
+        Subquery(queryset.order_by().annotate(n=Count('*')).values('n'), output_field=IntegerField()),
+        Value(0)
+    )
+
+
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(ReplicaChangelistMixin, BaseUserAdmin):
     """Custom User admin with case note management features"""
     
     list_display = ('username', 'email', 'employee_id', 'department', 
@@ -16,6 +29,8 @@ class UserAdmin(BaseUserAdmin):
     list_filter = ('is_staff', 'is_active', 'is_superuser', 'department', 'date_joined')
     search_fields = ('username', 'first_name', 'last_name', 'email', 'employee_id')
     ordering = ('username',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = BaseUserAdmin.fieldsets + (
         ('Additional Information', {
@@ -36,37 +51,44 @@ class UserAdmin(BaseUserAdmin):
     
     def assigned_clients_count(self, obj):
         """Show count of assigned clients"""
-        if hasattr(obj, 'assigned_clients'):
+        count = getattr(obj, 'assigned_clients_total', None)
+        if count is None:
             count = obj.assigned_clients.count()
-            if count > 0:
-                url = reverse('admin:clients_client_changelist') + f'?assigned_caseworker__id__exact={obj.id}'
-                return format_html(
-                    '<a href="{}" style="color: #28a745; font-weight: bold;">{} assigned clients</a>',
-                    url, count
-                )
+        if count > 0:
+            url = reverse('admin:clients_client_changelist') + f'?assigned_caseworker__id__exact={obj.id}'
+            return format_html(
+                '<a href="{}" style="color: #28a745; font-weight: bold;">{} assigned clients</a>',
+                url, count
+            )
         return format_html('<span style="color: #6c757d;">No assigned clients</span>')
     assigned_clients_count.short_description = 'Assigned Clients'
+    assigned_clients_count.admin_order_field = 'assigned_clients_total'
     
     def recent_activity(self, obj):
         """Show recent case note activity"""
-        if hasattr(obj, 'created_case_notes'):
+        recent_notes = getattr(obj, 'recent_notes_total', None)
+        if recent_notes is None:
             recent_notes = obj.created_case_notes.filter(
                 created_at__gte=timezone.now() - timedelta(days=7)
             ).count()
-            
-            if recent_notes > 0:
-                return format_html(
-                    '<span style="color: #28a745; font-weight: bold;">{} case notes in last 7 days</span>',
-                    recent_notes
-                )
+
+        if recent_notes > 0:
+            return format_html(
+                '<span style="color: #28a745; font-weight: bold;">{} case notes in last 7 days</span>',
+                recent_notes
+            )
         return format_html('<span style="color: #6c757d;">No recent activity</span>')
     recent_activity.short_description = 'Recent Activity'
     
     def get_queryset(self, request):
-        """Optimize queryset with related data"""
-        qs = super().get_queryset(request)
-        if hasattr(qs.model, 'assigned_clients'):
-            qs = qs.prefetch_related('assigned_clients')
-        if hasattr(qs.model, 'created_case_notes'):
-            qs = qs.prefetch_related('created_case_notes')
-        return qs
\ No newline at end of file
+        """Annotate both counts so the changelist needs no per-user queries"""
+        # Served by the (assigned_caseworker) and (created_by, created_at) indexes
+        since = timezone.now() - timedelta(days=7)
+        return super().get_queryset(request).annotate(
+            assigned_clients_total=_count(
+                Client.objects.filter(assigned_caseworker=OuterRef('pk')).values('assigned_caseworker')
+            ),
+            recent_notes_total=_count(
+                CaseNote.objects.filter(created_by=OuterRef('pk'), created_at__gte=since).values('created_by')
+            ),
+        )
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Lower
 
 
 class User(AbstractUser):
@@ -22,6 +23,13 @@ class User(AbstractUser):
         db_table = 'auth_user'  # Keep the same table name for compatibility
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        # Case-insensitive prefix lookups of caseworkers, e.g. the client
+        # admin's search (clients.search.caseworkers_matching)
+        indexes = [
+            models.Index(Lower('username'), name='auth_user_username_lower'),
+            models.Index(Lower('first_name'), name='auth_user_first_name_lower'),
+            models.Index(Lower('last_name'), name='auth_user_last_name_lower'),
+        ]
     
     def __str__(self):
         return f"{self.get_full_name()} ({self.username})" if self.get_full_name() else self.username
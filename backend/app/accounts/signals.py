@@ -0,0 +1,38 @@
+"""
+Account signal handlers
+"""
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from config.auth import invalidate_cached_user
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_on_change(sender, instance, **kwargs):
+    """Covers deactivation, password changes and any other edit to the user row"""
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_user_on_permission_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_cached_user(instance.pk)
+    elif pk_set:
+        # Changed from the group/permission side: pk_set holds user ids
+        for user_id in pk_set:
+            invalidate_cached_user(user_id)
+    else:
+        # A clear() from the group/permission side does not report who was affected
+        invalidate_cached_user()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_users_on_group_permission_change(sender, action, **kwargs):
+    if action.startswith('post_'):
+        invalidate_cached_user()
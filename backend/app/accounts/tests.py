@@ -146,4 +146,79 @@ class AuthenticationEndpointTest(TestCase):
             
         except requests.exceptions.RequestException:
             # Skip if server is not running
-            self.skipTest("Django server not running - skipping integration test")
\ No newline at end of file
+            self.skipTest("Django server not running - skipping integration test")
+
+class JWTAuthCacheTest(TestCase):
+    """Test cases for the cached JWT authentication fast path"""
+
+    def setUp(self):
+        from config.auth import clear_auth_caches
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        clear_auth_caches()
+        self.user = User.objects.create_user(
+            username='caseworker1',
+            password='testpass123'
+        )
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+
+    def authenticate(self, token=None):
+        from config.auth import JWTAuth
+        return JWTAuth().authenticate(None, token or self.token)
+
+    def test_repeat_requests_skip_verification_and_lookup(self):
+        """A second call with the same token hits both caches and runs no query"""
+        from config.auth import auth_cache_stats
+
+        self.assertEqual(self.authenticate(), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate(), self.user)
+
+        stats = auth_cache_stats()
+        self.assertEqual((stats['token_hits'], stats['token_misses']), (1, 1))
+        self.assertEqual((stats['user_hits'], stats['user_misses']), (1, 1))
+
+    def test_cached_user_is_not_shared(self):
+        """Each request gets its own User, so changes made to one stay in that request"""
+        first = self.authenticate()
+        first.first_name = 'Changed'
+        first._perm_cache = {'case_notes.delete_casenote'}
+        with self.assertNumQueries(0):
+            second = self.authenticate()
+        self.assertIsNot(second, first)
+        self.assertEqual(second, self.user)
+        self.assertEqual(second.first_name, '')
+        self.assertFalse(hasattr(second, '_perm_cache'))
+
+    def test_invalid_token_is_rejected(self):
+        """Tampered tokens are never cached as valid"""
+        self.assertIsNone(self.authenticate(self.token[:-2] + 'xx'))
+        self.assertIsNone(self.authenticate('not-a-token'))
+
+    def test_deactivation_invalidates_cached_user(self):
+        """Deactivating a user takes effect on their next request"""
+        self.assertEqual(self.authenticate(), self.user)
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(self.authenticate())
+
+    def test_password_change_refreshes_cached_user(self):
+        """The cached user is reloaded after a password change"""
+        cached = self.authenticate()
+        self.user.set_password('newpass456')
+        self.user.save()
+        reloaded = self.authenticate()
+        self.assertIsNot(cached, reloaded)
+        self.assertTrue(reloaded.check_password('newpass456'))
+
+    def test_permission_change_refreshes_cached_user(self):
+        """Group membership changes drop the cached user"""
+        from django.contrib.auth.models import Group
+
+        from config.auth import auth_cache_stats
+
+        self.authenticate()
+        group = Group.objects.create(name='Supervisors')
+        group.user_set.add(self.user)
+        self.authenticate()
+        self.assertEqual(auth_cache_stats()['user_misses'], 2)
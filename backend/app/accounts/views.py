@@ -1,6 +1,7 @@
 """
 Authentication API Views for Case Note Management System
 """
+from asgiref.sync import sync_to_async
 from django.contrib.auth import authenticate
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
@@ -74,4 +75,10 @@ def refresh_token(refresh_token_str: str):
             "access_token": str(access_token),
         }
     except Exception:
-        return None
\ No newline at end of file
+        return None
+
+# Async entry points for the ASGI API (config.urls_async). Password hashing
+# is CPU-bound and simplejwt reads and writes its token tables through the
+# sync ORM, so the work runs in a worker thread rather than on the event loop.
+alogin_user = sync_to_async(login_user)
+arefresh_token = sync_to_async(refresh_token)
@@ -0,0 +1,153 @@
+"""
+Per-client bookkeeping for note writes
+
+Every client carries a notes version (for conditional GETs) and denormalized
+activity counters: the number of notes, the newest note's created_at and a
+count per interaction type. Creates and deletes adjust them with a single
+UPDATE ... SET x = x + n; edits, which may change a note's type or client,
+recount the affected clients from scratch.
+
+Every write here also invalidates the cached responses built on the
+affected clients and their caseworkers' caseloads (config.response_cache),
+once the transaction commits; run it in the transaction that writes the
+notes, so the counters never disagree with the notes table.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from clients.models import Client
+from config.cache_tags import invalidate_tags
+from .models import CaseNote
+
+# Client counter column for each CaseNote.INTERACTION_TYPES value
+TYPE_COUNT_FIELDS = {
+    'phone': 'phone_note_count',
+    'in-person': 'in_person_note_count',
+    'email': 'email_note_count',
+    'video': 'video_note_count',
+    'other': 'other_note_count',
+}
+
+
+def _touch(client_ids, caseworker_ids=None, **updates):
+    client_ids = set(client_ids)
+    if not client_ids:
+        return
+    Client.objects.filter(pk__in=client_ids).update(
+        notes_version=F('notes_version') + 1,
+        notes_changed_at=timezone.now(),
+        **updates
+    )
+    if caseworker_ids is None:
+        caseworker_ids = Client.objects.filter(pk__in=client_ids).values_list(
+            'assigned_caseworker', flat=True
+        ).distinct()
+    tags = [
+        *(f'client:{pk}' for pk in client_ids),
+        *(f'caseworker:{pk}' for pk in set(caseworker_ids) if pk is not None)
+    ]
+    # After the commit, so a concurrent read cannot cache the old rows again
+    transaction.on_commit(lambda: invalidate_tags(*tags))
+
+
+def _caseworkers_of(notes):
+    """Caseworkers of the notes' clients if every note has its client loaded, else None"""
+    client_field = CaseNote._meta.get_field('client')
+    caseworker_ids = set()
+    for note in notes:
+        if not client_field.is_cached(note):
+            return None
+        caseworker_ids.add(note.client.assigned_caseworker_id)
+    return caseworker_ids
+
+
+def _latest_note_at():
+    # Served by the (client, created_at) index
+    return Subquery(
+        CaseNote.objects.filter(client=OuterRef('pk')).order_by('-created_at').values('created_at')[:1]
+    )
+
+
+def _per_client(amounts):
+    """CASE expression evaluating to amounts[client pk] in an UPDATE over several clients"""
+    return Case(
+        *(When(pk=pk, then=Value(amount)) for pk, amount in amounts.items()),
+        default=Value(0),
+        output_field=IntegerField()
+    )
+
+
+def _adjust_counters(notes, sign, caseworker_ids):
+    deltas = defaultdict(Counter)
+    for note in notes:
+        deltas[note.client_id][note.interaction_type] += 1
+    if not deltas:
+        return
+
+    totals = {pk: sum(types.values()) for pk, types in deltas.items()}
+    columns = {'note_count': totals}
+    for interaction_type, field in TYPE_COUNT_FIELDS.items():
+        amounts = {pk: types[interaction_type] for pk, types in deltas.items() if types[interaction_type]}
+        if amounts:
+            columns[field] = amounts
+
+    updates = {'last_note_at': _latest_note_at()}
+    for field, amounts in columns.items():
+        if sign > 0:
+            updates[field] = F(field) + _per_client(amounts)
+        else:
+            # Never go negative, even if a counter has drifted
+            updates[field] = Greatest(F(field) - _per_client(amounts), Value(0))
+    if caseworker_ids is None:
+        caseworker_ids = _caseworkers_of(notes)
+    _touch(deltas.keys(), caseworker_ids, **updates)
+
+
+def record_notes_added(notes, caseworker_ids=None):
+    """
+    Count newly inserted notes against their clients in one UPDATE.
+
+    Pass the caseworkers of the notes' clients when the caller knows them
+    and the notes were built from client ids; otherwise they are looked up.
+    """
+    _adjust_counters(notes, 1, caseworker_ids)
+
+
+def record_notes_removed(notes):
+    """Uncount deleted notes from their clients in one UPDATE."""
+    _adjust_counters(notes, -1, None)
+
+
+def counter_expressions():
+    """Column -> expression recounting every activity counter from the notes table"""
+    notes = CaseNote.objects.filter(client=OuterRef('pk')).order_by().values('client')
+
+    def count(queryset):
+        return Coalesce(
+            Subquery(queryset.annotate(n=Count('pk')).values('n'), output_field=IntegerField()),
+            Value(0)
+        )
+
+    expressions = {'note_count': count(notes), 'last_note_at': _latest_note_at()}
+    for interaction_type, field in TYPE_COUNT_FIELDS.items():
+        expressions[field] = count(notes.filter(interaction_type=interaction_type))
+    return expressions
+
+
+def rebuild_note_counters(client_ids):
+    """Recount the activity counters of the given clients in one UPDATE."""
+    _touch(client_ids, **counter_expressions())
+
+
+def record_note_changes(client_ids):
+    """
+    Bump the notes version of every client in `client_ids`.
+
+    For write paths that leave the counters alone, e.g. a queryset update of
+    note content. Runs as a single UPDATE.
+    """
+    _touch(client_ids)
@@ -1,20 +1,57 @@
 from django.contrib import admin
+from django.contrib.auth import get_user_model
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 from django.utils import timezone
+from clients.models import Client
+from clients.search import filter_matching as filter_matching_clients
+from config.admin_tools import (
+    EstimatedCountPaginator, InputFilter, ReplicaChangelistMixin, UsernameFilter
+)
 from .models import CaseNote
+from .search import filter_matching
+
+
+class ClientIdFilter(InputFilter):
+    title = 'client ID'
+    parameter_name = 'client_id'
+
+    def queryset(self, request, queryset):
+        client_id = self.cleaned_value()
+        if client_id:
+            return queryset.filter(client__client_id=client_id.upper())
+        return queryset
+
+
+class AuthorFilter(UsernameFilter):
+    title = 'author (username)'
+    parameter_name = 'author'
+    field_path = 'created_by'
+
+
+class CaseworkerFilter(UsernameFilter):
+    title = 'caseworker (username)'
+    parameter_name = 'caseworker'
+    field_path = 'client__assigned_caseworker'
 
 
 @admin.register(CaseNote)
-class CaseNoteAdmin(admin.ModelAdmin):
+class CaseNoteAdmin(ReplicaChangelistMixin, admin.ModelAdmin):
     list_display = ('client_link', 'interaction_type_badge', 'content_preview', 'created_by', 'created_at', 'days_ago')
-    list_filter = ('interaction_type', 'created_by', 'created_at', 'client__assigned_caseworker')
-    search_fields = ('client__first_name', 'client__last_name', 'client__client_id', 'content', 'created_by__username')
+    list_filter = ('interaction_type', ClientIdFilter, AuthorFilter, CaseworkerFilter, 'created_at')
+    # Searches go through the full-text index, see get_search_results
+    search_fields = ('content',)
+    search_help_text = (
+        "Search note content or the client's name, or enter a client ID (e.g. CL-2024-001) "
+        "or the author's username"
+    )
     readonly_fields = ('id', 'created_at', 'updated_at', 'client_link', 'created_by_display')
     ordering = ('-created_at',)
     list_per_page = 25
-    date_hierarchy = 'created_at'
+    # No date_hierarchy: its year/month links need a DISTINCT over every note
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Case Note Information', {
@@ -95,22 +132,34 @@ class CaseNoteAdmin(admin.ModelAdmin):
     days_ago.short_description = 'Age'
     days_ago.admin_order_field = 'created_at'
 
-    def get_queryset(self, request):
-        """Optimize queryset with related data"""
-        return super().get_queryset(request).select_related(
-            'client', 'created_by', 'client__assigned_caseworker'
-        )
-
     def get_queryset(self, request):
         """Filter queryset based on user permissions"""
-        qs = super().get_queryset(request).select_related(
-            'client', 'created_by', 'client__assigned_caseworker'
-        )
+        qs = super().get_queryset(request).select_related('client', 'created_by')
         if not request.user.is_superuser:
             # For non-superusers, show only case notes for their assigned clients
             qs = qs.filter(client__assigned_caseworker=request.user)
         return qs
 
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Match note content via the FTS index, the client's name or client ID
+        via the client search indexes, or the author's exact username
+        """
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        # Client and author matches as subqueries on the note's own foreign
+        # keys, so each branch of the OR is an index search; conditions on
+        # the joined tables would scan every note
+        clients = filter_matching_clients(Client.objects.all(), search_term)
+        authors = get_user_model().objects.filter(username=search_term)
+        matches = (
+            filter_matching(queryset, search_term)
+            | queryset.filter(client__in=clients.values('pk'))
+            | queryset.filter(created_by__in=authors.values('pk'))
+        )
+        return matches, False
+
     def save_model(self, request, obj, form, change):
         """Automatically set created_by when creating a new case note"""
         if not change:  # Only on creation
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CaseNotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'case_notes'
+
+    def ready(self):
+        from . import signals  # noqa: F401
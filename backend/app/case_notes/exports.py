@@ -0,0 +1,194 @@
+"""
+Streaming export of a client's full case note history
+
+Notes are read oldest first with QuerySet.iterator() / aiterator() in chunks
+of EXPORT_CHUNK_SIZE rows, encoded one row at a time as NDJSON (the note list
+API's note shape) or CSV, gathered into blocks of about EXPORT_BUFFER_BYTES
+and optionally gzip-compressed on the fly. Nothing holds more than one chunk
+of rows and one block of output, so memory stays flat however many notes a
+client has.
+
+The ASGI API (config.urls_async) uses aexport_client_case_notes(), which
+streams from an async iterator: Django buffers a synchronous one completely
+before serving it asynchronously.
+"""
+import csv
+import zlib
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from clients.models import Client
+from config.renderers import json_bytes
+from .models import CaseNote
+from .views import NOTE_LIST_FIELDS, serialize_note_row
+
+# format -> (content type, file extension)
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+}
+
+CSV_COLUMNS = ['id', 'created_at', 'interaction_type', 'created_by_id', 'created_by_name', 'content']
+
+
+def export_format_error(export_format):
+    if export_format not in EXPORT_FORMATS:
+        return f"Invalid format. Must be one of: {', '.join(EXPORT_FORMATS)}"
+    return None
+
+
+def export_queryset(client):
+    """Every note of the client as NOTE_LIST_FIELDS rows, oldest first"""
+    return CaseNote.objects.filter(client=client).order_by('created_at', 'id').values(*NOTE_LIST_FIELDS)
+
+
+class _Line:
+    """File-like target for csv.writer that hands back the line just written"""
+
+    def write(self, value):
+        return value
+
+
+class ExportEncoder:
+    """
+    Turns rows into output blocks of about EXPORT_BUFFER_BYTES, gzipped if
+    asked. With `with_client` rows also carry `client__client_id`, written
+    as a leading client_id column (a client_id key in NDJSON), for exports
+    spanning many clients.
+    """
+
+    def __init__(self, export_format, compress=False, with_client=False):
+        self.export_format = export_format
+        self.with_client = with_client
+        self.csv = csv.writer(_Line())
+        # wbits=31 writes the gzip container rather than a bare zlib stream
+        self.gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+        self.pending = []
+        self.pending_bytes = 0
+
+    def header(self):
+        if self.export_format == 'csv':
+            columns = ['client_id', *CSV_COLUMNS] if self.with_client else CSV_COLUMNS
+            return self._add(self.csv.writerow(columns).encode())
+        return None
+
+    def row(self, row):
+        note = serialize_note_row(row)
+        if self.export_format == 'csv':
+            values = [
+                note['id'], note['created_at'], note['interaction_type'],
+                note['created_by']['id'], note['created_by']['name'], note['content'],
+            ]
+            if self.with_client:
+                values.insert(0, row['client__client_id'])
+            line = self.csv.writerow(values).encode()
+        else:
+            if self.with_client:
+                note['client_id'] = row['client__client_id']
+            line = json_bytes(note) + b'\n'
+        return self._add(line)
+
+    def _add(self, line):
+        self.pending.append(line)
+        self.pending_bytes += len(line)
+        if self.pending_bytes < settings.EXPORT_BUFFER_BYTES:
+            return None
+        return self._drain()
+
+    def _drain(self):
+        block = b''.join(self.pending)
+        self.pending = []
+        self.pending_bytes = 0
+        if self.gzip is not None:
+            block = self.gzip.compress(block)
+        return block or None
+
+    def finish(self):
+        block = self._drain() or b''
+        if self.gzip is not None:
+            block += self.gzip.flush()
+        return block or None
+
+
+def stream_export(client, export_format, compress=False):
+    """The export as an iterator of byte blocks"""
+    encoder = ExportEncoder(export_format, compress)
+    block = encoder.header()
+    if block:
+        yield block
+    for row in export_queryset(client).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+        block = encoder.row(row)
+        if block:
+            yield block
+    block = encoder.finish()
+    if block:
+        yield block
+
+
+async def astream_export(client, export_format, compress=False):
+    """stream_export() as an async iterator, reading with the async ORM"""
+    encoder = ExportEncoder(export_format, compress)
+    block = encoder.header()
+    if block:
+        yield block
+    async for row in export_queryset(client).aiterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+        block = encoder.row(row)
+        if block:
+            yield block
+    block = encoder.finish()
+    if block:
+        yield block
+
+
+def export_response(stream, client, export_format, compress=False):
+    """StreamingHttpResponse downloading `stream` as the client's note history"""
+    content_type, extension = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(stream, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="case-notes-{client.client_id}.{extension}"'
+    response['Cache-Control'] = 'private, no-store'
+    if compress:
+        response['Content-Encoding'] = 'gzip'
+    return response
+
+
+def export_client_case_notes(request, client_id: str, format: str = 'ndjson', gzip: bool = False):
+    """
+    Download every case note of a client, oldest first, as NDJSON (one note
+    per line, shaped like the note list's notes) or CSV, optionally gzipped.
+    Only accessible by the assigned caseworker.
+    """
+    user = getattr(request, 'auth', None) or getattr(request, 'user', None)
+
+    if not user or not user.is_authenticated:
+        return None, "Authentication required"
+
+    error = export_format_error(format)
+    if error:
+        return None, error
+
+    try:
+        client = Client.objects.get(id=client_id, assigned_caseworker=user)
+    except (Client.DoesNotExist, ValueError):
+        return None, "Client not found or not assigned to you"
+
+    return export_response(stream_export(client, format, gzip), client, format, gzip), None
+
+
+async def aexport_client_case_notes(request, client_id: str, format: str = 'ndjson', gzip: bool = False):
+    """export_client_case_notes on the async ORM, for the ASGI API (config.urls_async)."""
+    user = getattr(request, 'auth', None)
+
+    if not user or not user.is_authenticated:
+        return None, "Authentication required"
+
+    error = export_format_error(format)
+    if error:
+        return None, error
+
+    try:
+        client = await Client.objects.aget(id=client_id, assigned_caseworker=user)
+    except (Client.DoesNotExist, ValueError):
+        return None, "Client not found or not assigned to you"
+
+    return export_response(astream_export(client, format, gzip), client, format, gzip), None
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('case_notes', '0002_casenote_fts'),
+        ('clients', '0002_client_search_fields'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='casenote',
+            index=models.Index(fields=['client', 'created_at'], name='casenote_client_created_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('case_notes', '0003_casenote_client_created_idx'),
+        ('clients', '0003_client_cw_updated_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='casenote',
+            index=models.Index(fields=['updated_at'], name='casenote_updated_idx'),
+        ),
+    ]
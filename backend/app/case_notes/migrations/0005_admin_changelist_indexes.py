@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('case_notes', '0004_casenote_updated_idx'),
+        ('clients', '0006_admin_changelist_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='casenote',
+            index=models.Index(fields=['created_at'], name='casenote_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='casenote',
+            index=models.Index(fields=['created_by', 'created_at'], name='casenote_author_created_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('case_notes', '0005_admin_changelist_indexes'),
+        ('clients', '0007_client_cw_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='casenote',
+            name='import_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='casenote',
+            constraint=models.UniqueConstraint(condition=models.Q(('import_hash__isnull', False)), fields=('import_hash',), name='casenote_import_hash_uniq'),
+        ),
+    ]
@@ -1,5 +1,5 @@
 import uuid
-from django.db import models
+from django.db import models, router, transaction
 from django.conf import settings
 from clients.models import Client
 
@@ -35,10 +35,45 @@ class CaseNote(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Content hash of a note loaded by import_caseload, so a re-run skips it
+    import_hash = models.CharField(max_length=64, null=True, blank=True, editable=False)
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = "Case Note"
         verbose_name_plural = "Case Notes"
+        indexes = [
+            models.Index(fields=['client', 'created_at'], name='casenote_client_created_idx'),
+            models.Index(fields=['updated_at'], name='casenote_updated_idx'),
+            # Admin changelist ordering and per-author recent activity
+            models.Index(fields=['created_at'], name='casenote_created_idx'),
+            models.Index(fields=['created_by', 'created_at'], name='casenote_author_created_idx'),
+        ]
+        constraints = [
+            # Partial: notes written through the app carry no hash
+            models.UniqueConstraint(fields=['import_hash'], condition=models.Q(import_hash__isnull=False),
+                                    name='casenote_import_hash_uniq'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the client the note belonged to when loaded, so an edit
+        # that moves it can update both clients
+        instance._loaded_client_id = instance.__dict__.get('client_id')
+        return instance
+
+    @property
+    def loaded_client_id(self):
+        """Client the note belonged to when read from the database."""
+        return getattr(self, '_loaded_client_id', None)
+
+    def save(self, *args, **kwargs):
+        # The post_save handler updates the client's counters; they commit or
+        # roll back with the note (delete() already runs in a transaction)
+        with transaction.atomic(using=kwargs.get('using') or router.db_for_write(CaseNote, instance=self)):
+            super().save(*args, **kwargs)
+        self._loaded_client_id = self.client_id
 
     def __str__(self):
         return f"Case Note for {self.client.full_name} - {self.get_interaction_type_display()} ({self.created_at.strftime('%Y-%m-%d')})"
@@ -2,7 +2,7 @@
 Case Note API Schemas
 """
 from ninja import Schema
-from typing import List
+from typing import List, Optional
 
 
 class CaseNoteCreateRequest(Schema):
@@ -11,12 +11,17 @@ class CaseNoteCreateRequest(Schema):
     interaction_type: str = "other"
 
 
+class CaseNoteAuthor(Schema):
+    id: str
+    name: str
+
+
 class CaseNoteResponse(Schema):
     id: str
     content: str
     interaction_type: str
     created_at: str
-    created_by: dict
+    created_by: CaseNoteAuthor
 
 
 class CaseNoteCreateResponse(Schema):
@@ -25,8 +30,47 @@ class CaseNoteCreateResponse(Schema):
     success: bool
 
 
+class CaseNoteBulkCreateRequest(Schema):
+    notes: List[CaseNoteCreateRequest]
+
+
+class CaseNoteBulkItemResult(Schema):
+    index: int
+    success: bool
+    id: Optional[str] = None
+    created_at: Optional[str] = None
+    error: Optional[str] = None
+
+
+class CaseNoteBulkCreateResponse(Schema):
+    results: List[CaseNoteBulkItemResult]
+    created: int
+    failed: int
+
+
 class CaseNotesListResponse(Schema):
     case_notes: List[CaseNoteResponse]
+    next_cursor: Optional[str] = None
+
+
+class CaseNoteSearchClient(Schema):
+    id: str
+    client_id: str
+    name: str
+
+
+class CaseNoteSearchHit(Schema):
+    id: str
+    interaction_type: str
+    created_at: str
+    client: CaseNoteSearchClient
+    rank: float
+    snippet: str
+
+
+class CaseNoteSearchResponse(Schema):
+    results: List[CaseNoteSearchHit]
+    next_cursor: Optional[str] = None
 
 
 class ErrorResponse(Schema):
@@ -0,0 +1,184 @@
+"""
+Full-text search over case note content backed by an SQLite FTS5 index
+"""
+import html
+import re
+import uuid
+from datetime import timezone as dt_timezone
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+FTS_TABLE = 'case_notes_casenote_fts'
+
+# The index is an external-content FTS5 table keyed on the note's rowid, so
+# the text is stored once. Triggers keep it in sync for every write path,
+# including bulk_create and raw SQL, which model signals would miss.
+FTS_SCHEMA_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        content,
+        content='case_notes_casenote',
+        content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON case_notes_casenote BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.rowid, new.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON case_notes_casenote BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.rowid, old.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF content ON case_notes_casenote BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.rowid, old.content);
+        INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.rowid, new.content);
+    END
+    """,
+]
+
+DROP_FTS_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+# Private-use markers survive FTS5's snippet() untouched and are swapped for
+# <mark> tags only after the note text has been HTML-escaped.
+_MARK_START = '\ue000'
+_MARK_END = '\ue001'
+
+SNIPPET_TOKENS = 16
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def install_search_index(schema_editor=None):
+    """
+    Create the FTS table and its triggers, then rebuild it from the notes table.
+    Safe to re-run, e.g. after a migration that had to remake the notes table.
+    """
+    conn = schema_editor.connection if schema_editor else connection
+    with conn.cursor() as cursor:
+        for statement in FTS_SCHEMA_SQL:
+            cursor.execute(statement)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def build_match_query(q: str):
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+    Every word must match; the last one is treated as a prefix so results
+    follow the user as they type. Returns None when there is nothing to match.
+    """
+    tokens = _TOKEN_RE.findall(q or '')
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def filter_matching(queryset, q: str):
+    """Restrict a CaseNote queryset to notes whose content matches `q`."""
+    match = build_match_query(q)
+    if match is None:
+        return queryset.none()
+    return queryset.filter(pk__in=RawSQL(
+        f"SELECT id FROM case_notes_casenote WHERE rowid IN "
+        f"(SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)",
+        (match,)
+    ))
+
+
+def _render_snippet(raw: str) -> str:
+    escaped = html.escape(raw or '')
+    return escaped.replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+
+
+def _parse_timestamp(value):
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if value is not None and timezone.is_naive(value):
+        value = timezone.make_aware(value, dt_timezone.utc)
+    return value
+
+
+def search_notes(caseworker_id, q: str, limit: int, after=None):
+    """
+    Ranked search over the notes of one caseworker's clients.
+
+    Results are ordered by bm25 rank (best first) and then by rowid, which is
+    also the keyset: pass the (rank, rowid) of the last hit as `after` to get
+    the next page. Returns a list of dicts with an HTML-safe snippet.
+    """
+    match = build_match_query(q)
+    if match is None:
+        return []
+
+    # Rank only the caller's matches: bm25() runs for rows that pass the
+    # caseworker filter, never for other caseworkers' notes
+    params = [match, caseworker_id]
+    keyset = ""
+    if after is not None:
+        rank, rowid = after
+        keyset = "WHERE rank > %s OR (rank = %s AND rowid > %s)"
+        params += [rank, rank, rowid]
+    params.append(limit)
+
+    sql = f"""
+        SELECT * FROM (
+            SELECT n.id, n.interaction_type, n.created_at,
+                   c.id, c.client_id, c.first_name, c.last_name,
+                   bm25({FTS_TABLE}) AS rank, n.rowid AS rowid
+            FROM {FTS_TABLE}
+            JOIN case_notes_casenote n ON n.rowid = {FTS_TABLE}.rowid
+            JOIN clients_client c ON c.id = n.client_id
+            WHERE {FTS_TABLE} MATCH %s AND c.assigned_caseworker_id = %s
+        )
+        {keyset}
+        ORDER BY rank, rowid
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        snippets = _snippets(cursor, match, [row[-1] for row in rows])
+
+    return [
+        {
+            "id": str(uuid.UUID(note_id)),
+            "interaction_type": interaction_type,
+            "created_at": _parse_timestamp(created_at).isoformat(),
+            "client": {
+                "id": str(uuid.UUID(client_pk)),
+                "client_id": client_code,
+                "name": f"{first_name} {last_name}",
+            },
+            "rank": rank,
+            "snippet": _render_snippet(snippets.get(rowid)),
+            "rowid": rowid,
+        }
+        for (note_id, interaction_type, created_at, client_pk, client_code,
+             first_name, last_name, rank, rowid) in rows
+    ]
+
+
+def _snippets(cursor, match, rowids):
+    """rowid -> highlighted snippet, built only for the notes of the page"""
+    if not rowids:
+        return {}
+    placeholders = ', '.join(['%s'] * len(rowids))
+    cursor.execute(
+        f"SELECT rowid, snippet({FTS_TABLE}, 0, %s, %s, '…', %s) FROM {FTS_TABLE} "
+        f"WHERE {FTS_TABLE} MATCH %s AND rowid IN ({placeholders})",
+        [_MARK_START, _MARK_END, SNIPPET_TOKENS, match, *rowids]
+    )
+    return dict(cursor.fetchall())
@@ -0,0 +1,37 @@
+"""
+Case note signal handlers
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from clients.models import Client
+from .activity import rebuild_note_counters, record_notes_added, record_notes_removed
+from .models import CaseNote
+
+
+def deleted_with_client(origin):
+    """
+    Whether a note's post_delete comes from deleting its client (one, or a
+    queryset of them), which cascades to every note. The client's own
+    delete handlers cover them, so per-note work would only add a few
+    queries per note.
+    """
+    return isinstance(origin, Client) or getattr(origin, 'model', None) is Client
+
+
+@receiver(post_save, sender=CaseNote)
+def count_saved_note(sender, instance, created, **kwargs):
+    """Keep the client's activity counters and notes version current"""
+    if created:
+        record_notes_added([instance])
+    else:
+        # An edit may have changed the note's type or moved it to another client
+        client_ids = {instance.client_id, instance.loaded_client_id}
+        rebuild_note_counters(pk for pk in client_ids if pk is not None)
+
+
+@receiver(post_delete, sender=CaseNote)
+def uncount_deleted_note(sender, instance, origin=None, **kwargs):
+    if deleted_with_client(origin):
+        return
+    record_notes_removed([instance])
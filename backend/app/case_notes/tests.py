@@ -1,7 +1,12 @@
 """
 Test cases for the case_notes app
 """
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from clients.models import Client
@@ -96,4 +101,410 @@ class CaseNoteModelTest(TestCase):
         
         case_note = CaseNote(**invalid_data)
         with self.assertRaises(ValidationError):
-            case_note.clean()
\ No newline at end of file
+            case_note.clean()
+
+class CaseNoteSearchTest(TestCase):
+    """Test cases for the full-text case note search"""
+
+    def setUp(self):
+        self.caseworker = User.objects.create_user(
+            username='caseworker1',
+            password='testpass123',
+            first_name='John',
+            last_name='Doe'
+        )
+        self.other_caseworker = User.objects.create_user(
+            username='caseworker2',
+            password='testpass123'
+        )
+        self.alice = Client.objects.create(
+            client_id='CL-2024-001',
+            first_name='Alice',
+            last_name='Johnson',
+            assigned_caseworker=self.caseworker
+        )
+        self.bob = Client.objects.create(
+            client_id='CL-2024-002',
+            first_name='Bob',
+            last_name='Brown',
+            assigned_caseworker=self.other_caseworker
+        )
+        self.housing_note = CaseNote.objects.create(
+            client=self.alice,
+            content='Discussed the housing application and rent <support>.',
+            interaction_type='phone',
+            created_by=self.caseworker
+        )
+        CaseNote.objects.create(
+            client=self.bob,
+            content='Housing application submitted.',
+            interaction_type='email',
+            created_by=self.other_caseworker
+        )
+
+        from rest_framework_simplejwt.tokens import RefreshToken
+        token = RefreshToken.for_user(self.caseworker).access_token
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def search(self, **params):
+        response = self.client.get('/api/case-notes/search', params, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_search_is_scoped_to_assigned_clients(self):
+        """Only notes of the caseworker's own clients are returned"""
+        data = self.search(q='housing')
+        self.assertEqual([hit['id'] for hit in data['results']], [str(self.housing_note.id)])
+        self.assertEqual(data['results'][0]['client']['client_id'], 'CL-2024-001')
+
+    def test_snippet_is_highlighted_and_escaped(self):
+        """Matched terms are wrapped in <mark> and note text is HTML-escaped"""
+        hit = self.search(q='rent')['results'][0]
+        self.assertIn('<mark>rent</mark>', hit['snippet'])
+        self.assertIn('&lt;support&gt;', hit['snippet'])
+
+    def test_index_follows_updates_and_deletes(self):
+        """Edits and deletions are reflected in search results"""
+        self.housing_note.content = 'Employment workshop booked.'
+        self.housing_note.save()
+        self.assertEqual(self.search(q='housing')['results'], [])
+        self.assertEqual(len(self.search(q='employ')['results']), 1)
+
+        self.housing_note.delete()
+        self.assertEqual(self.search(q='employment')['results'], [])
+
+    def test_keyset_paging(self):
+        """Pages follow the next_cursor until the result set is exhausted"""
+        for i in range(4):
+            CaseNote.objects.create(
+                client=self.alice,
+                content=f'Housing follow-up number {i}.',
+                created_by=self.caseworker
+            )
+
+        seen = []
+        params = {'q': 'housing', 'limit': 2}
+        while True:
+            data = self.search(**params)
+            seen.extend(hit['id'] for hit in data['results'])
+            if not data['next_cursor']:
+                break
+            params['after'] = data['next_cursor']
+
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_only_the_page_is_ranked_and_highlighted(self):
+        """bm25 runs under the caseworker filter and snippet() only for the page's notes"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .search import search_notes
+
+        for i in range(5):
+            CaseNote.objects.create(client=self.bob, content=f'Housing visit {i}', created_by=self.other_caseworker)
+        with CaptureQueriesContext(connection) as queries:
+            hits = search_notes(self.caseworker.pk, 'housing', 10)
+        self.assertEqual([hit['id'] for hit in hits], [str(self.housing_note.id)])
+
+        rank_sql, snippet_sql = [query['sql'] for query in queries.captured_queries]
+        self.assertNotIn('snippet(', rank_sql)
+        # The match is joined to the caseworker's clients in one query, not
+        # scored in a subquery of its own first
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {rank_sql}')
+            plan = [row[3] for row in cursor.fetchall()]
+        self.assertFalse([line for line in plan if line.startswith(('MATERIALIZE', 'CO-ROUTINE'))], plan)
+        self.assertIn(f"rowid IN ({hits[0]['rowid']})", snippet_sql)
+
+    def test_invalid_cursor(self):
+        """A malformed cursor is rejected"""
+        response = self.client.get('/api/case-notes/search', {'q': 'housing', 'after': 'bogus'}, **self.auth)
+        self.assertEqual(response.status_code, 400)
+
+    def test_admin_search_uses_index(self):
+        """The admin changelist search matches note content and exact client IDs"""
+        admin_user = User.objects.create_superuser(username='admin', password='admin123')
+        self.client.force_login(admin_user)
+
+        response = self.client.get('/admin/case_notes/casenote/', {'q': 'rent'})
+        self.assertEqual(list(response.context['cl'].queryset), [self.housing_note])
+
+        response = self.client.get('/admin/case_notes/casenote/', {'q': 'cl-2024-002'})
+        self.assertEqual(response.context['cl'].queryset.get().client, self.bob)
+
+    def test_admin_search_by_client_name_and_author(self):
+        """Client name words match by prefix, and an author by exact username"""
+        admin_user = User.objects.create_superuser(username='admin', password='admin123')
+        self.client.force_login(admin_user)
+
+        def search(q):
+            response = self.client.get('/admin/case_notes/casenote/', {'q': q})
+            return [note.client for note in response.context['cl'].queryset]
+
+        self.assertEqual(search('alice john'), [self.alice])
+        self.assertEqual(search('Brow'), [self.bob])
+        self.assertEqual(search('caseworker2'), [self.bob])
+        self.assertEqual(search('alice brown'), [])
+
+
+class CaseNoteListQueryCountTest(TestCase):
+    """The case note list costs a constant number of queries"""
+
+    def setUp(self):
+        self.caseworker = User.objects.create_user(
+            username='caseworker1',
+            password='testpass123'
+        )
+        self.alice = Client.objects.create(
+            client_id='CL-2024-001',
+            first_name='Alice',
+            last_name='Johnson',
+            assigned_caseworker=self.caseworker
+        )
+
+        from rest_framework_simplejwt.tokens import RefreshToken
+        token = RefreshToken.for_user(self.caseworker).access_token
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        self.url = f'/api/case-notes/client/{self.alice.id}'
+
+    def add_notes(self, count):
+        for i in range(count):
+            # A distinct author per note would expose any per-note lookup
+            author = User.objects.create(username=f'author{CaseNote.objects.count()}',
+                                         first_name='Author', last_name=str(i))
+            CaseNote.objects.create(client=self.alice, content=f'Note {i}', created_by=author)
+
+    def test_query_count_is_independent_of_note_count(self):
+        """Client lookup and one joined note query, whatever the note count"""
+        self.client.get(self.url, **self.auth)  # warm the auth cache
+        for total in (1, 25):
+            self.add_notes(total - CaseNote.objects.count())
+            with self.assertNumQueries(2):
+                response = self.client.get(self.url, **self.auth)
+            self.assertEqual(len(response.json()['case_notes']), total)
+
+    def test_author_is_serialized_from_join(self):
+        """created_by carries the author's id and full name"""
+        self.add_notes(1)
+        note = CaseNote.objects.get()
+        data = self.client.get(self.url, **self.auth).json()['case_notes'][0]
+        self.assertEqual(data['created_by'], {'id': str(note.created_by_id), 'name': 'Author 0'})
+        self.assertEqual(data['id'], str(note.id))
+
+
+class CaseNoteExportTest(TestCase):
+    """Exports stream a client's whole note history"""
+
+    def setUp(self):
+        self.caseworker = User.objects.create_user(
+            username='caseworker1',
+            password='testpass123',
+            first_name='John',
+            last_name='Doe'
+        )
+        other = User.objects.create_user(username='caseworker2', password='testpass123')
+        self.alice = Client.objects.create(
+            client_id='CL-2024-001',
+            first_name='Alice',
+            last_name='Johnson',
+            assigned_caseworker=self.caseworker
+        )
+        self.bob = Client.objects.create(
+            client_id='CL-2024-002',
+            first_name='Bob',
+            last_name='Smith',
+            assigned_caseworker=other
+        )
+        for i in range(5):
+            CaseNote.objects.create(client=self.alice, content=f'Note {i}, with "quotes"\nand lines',
+                                    interaction_type='phone', created_by=self.caseworker)
+
+        from rest_framework_simplejwt.tokens import RefreshToken
+        token = RefreshToken.for_user(self.caseworker).access_token
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        self.url = f'/api/case-notes/client/{self.alice.id}/export'
+
+    def export(self, **params):
+        response = self.client.get(self.url, params, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_ndjson_matches_note_list(self):
+        response, body = self.export()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('case-notes-CL-2024-001.ndjson', response['Content-Disposition'])
+        notes = [json.loads(line) for line in body.decode().splitlines()]
+        listed = self.client.get(f'/api/case-notes/client/{self.alice.id}', **self.auth).json()['case_notes']
+        self.assertEqual(notes, listed[::-1])
+
+    def test_csv(self):
+        response, body = self.export(format='csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.reader(io.StringIO(body.decode())))
+        self.assertEqual(rows[0][:3], ['id', 'created_at', 'interaction_type'])
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][4:], ['John Doe', 'Note 0, with "quotes"\nand lines'])
+
+    def test_gzip(self):
+        plain = self.export()[1]
+        response, body = self.export(gzip='true')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(body), plain)
+
+    @override_settings(EXPORT_CHUNK_SIZE=2, EXPORT_BUFFER_BYTES=1)
+    def test_rows_are_read_and_sent_in_chunks(self):
+        response = self.client.get(self.url, **self.auth)
+        # Notes are read only as the body is sent, in chunks of one cursor
+        with self.assertNumQueries(1):
+            blocks = list(response.streaming_content)
+        self.assertEqual(len(blocks), 5)
+
+    def test_errors(self):
+        response = self.client.get(f'/api/case-notes/client/{self.bob.id}/export', **self.auth)
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(self.url, {'format': 'xml'}, **self.auth)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ndjson, csv', response.json()['error'])
+
+
+class ClientActivityCounterTest(TestCase):
+    """Client note counters follow every note write path"""
+
+    def setUp(self):
+        self.caseworker = User.objects.create_user(
+            username='caseworker1',
+            password='testpass123'
+        )
+        self.alice = Client.objects.create(
+            client_id='CL-2024-001',
+            first_name='Alice',
+            last_name='Johnson',
+            assigned_caseworker=self.caseworker
+        )
+        self.bob = Client.objects.create(
+            client_id='CL-2024-002',
+            first_name='Bob',
+            last_name='Brown',
+            assigned_caseworker=self.caseworker
+        )
+
+    def add_note(self, client, interaction_type='phone'):
+        return CaseNote.objects.create(
+            client=client, content='Visit', interaction_type=interaction_type,
+            created_by=self.caseworker
+        )
+
+    def assertCounters(self, client, total, **by_type):
+        client.refresh_from_db()
+        self.assertEqual(client.note_count, total)
+        expected = {key: 0 for key in client.note_counts}
+        expected.update({key.replace('_', '-'): value for key, value in by_type.items()})
+        self.assertEqual(client.note_counts, expected)
+
+    def test_create_and_delete(self):
+        """Creating and deleting notes adjusts counts and the latest note time"""
+        first = self.add_note(self.alice, 'phone')
+        second = self.add_note(self.alice, 'email')
+        self.assertCounters(self.alice, 2, phone=1, email=1)
+        self.assertEqual(self.alice.last_note_at, second.created_at)
+
+        second.delete()
+        self.assertCounters(self.alice, 1, phone=1)
+        self.assertEqual(self.alice.last_note_at, first.created_at)
+
+        first.delete()
+        self.assertCounters(self.alice, 0)
+        self.assertIsNone(self.alice.last_note_at)
+
+    def test_edit_recounts_old_and_new_client(self):
+        """Changing a note's type or client moves its count"""
+        note = self.add_note(self.alice, 'phone')
+        note = CaseNote.objects.get(pk=note.pk)
+        note.interaction_type = 'in-person'
+        note.client = self.bob
+        note.save()
+        self.assertCounters(self.alice, 0)
+        self.assertCounters(self.bob, 1, in_person=1)
+
+    def test_bulk_create_counts_in_one_update(self):
+        """record_notes_added updates several clients with a single query"""
+        from .activity import record_notes_added
+
+        notes = CaseNote.objects.bulk_create([
+            CaseNote(client=self.alice, content='a', interaction_type='video', created_by=self.caseworker),
+            CaseNote(client=self.alice, content='b', interaction_type='video', created_by=self.caseworker),
+            CaseNote(client=self.bob, content='c', interaction_type='other', created_by=self.caseworker),
+        ])
+        with self.assertNumQueries(1):
+            record_notes_added(notes)
+        self.assertCounters(self.alice, 2, video=2)
+        self.assertCounters(self.bob, 1, other=1)
+
+    def test_client_delete_skips_per_note_work(self):
+        """Deleting a client costs the same queries however many notes cascade with it"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from sync.models import ChangeLogEntry
+
+        def queries_to_delete(client, notes):
+            for _ in range(notes):
+                self.add_note(client)
+            with CaptureQueriesContext(connection) as queries:
+                client.delete()
+            return len(queries)
+
+        self.assertEqual(queries_to_delete(self.alice, 2), queries_to_delete(self.bob, 40))
+        self.assertEqual(list(ChangeLogEntry.objects.values_list('entity', 'action')),
+                         [('client', 'deleted'), ('client', 'deleted')])
+
+    def test_client_save_keeps_counters(self):
+        """Saving a stale client instance does not overwrite the counters"""
+        stale = Client.objects.get(pk=self.alice.pk)
+        self.add_note(self.alice)
+        stale.first_name = 'Alicia'
+        stale.save()
+        self.assertCounters(self.alice, 1, phone=1)
+
+    def test_counter_failure_rolls_back_the_note(self):
+        """A note is never saved or deleted without its counter update"""
+        from unittest import mock
+        from django.db import DatabaseError, transaction
+
+        note = self.add_note(self.alice, 'phone')
+        with mock.patch('case_notes.signals.record_notes_added', side_effect=DatabaseError('locked')):
+            with self.assertRaises(DatabaseError):
+                self.add_note(self.alice, 'email')
+        with mock.patch('case_notes.signals.record_notes_removed', side_effect=DatabaseError('locked')):
+            # delete() joins an enclosing transaction rather than nesting a
+            # savepoint; here that is the test's, so give it its own
+            with self.assertRaises(DatabaseError), transaction.atomic():
+                note.delete()
+        self.assertEqual(CaseNote.objects.filter(client=self.alice).count(), 1)
+        self.assertCounters(self.alice, 1, phone=1)
+
+    def test_caches_invalidated_after_commit(self):
+        """Response cache tags are bumped once the note's transaction commits"""
+        from config.cache_tags import tag_versions
+
+        before = tag_versions([f'client:{self.alice.pk}'])
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.add_note(self.alice)
+        self.assertEqual(tag_versions([f'client:{self.alice.pk}']), before)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(tag_versions([f'client:{self.alice.pk}']), before)
+
+    def test_rebuild_command(self):
+        """rebuild_client_counters repairs drifted counters"""
+        from django.core.management import call_command
+        from io import StringIO
+
+        self.add_note(self.alice, 'email')
+        self.add_note(self.bob, 'phone')
+        Client.objects.update(note_count=7, email_note_count=0, phone_note_count=3, last_note_at=None)
+
+        call_command('rebuild_client_counters', '--batch-size', '1', stdout=StringIO())
+        self.assertCounters(self.alice, 1, email=1)
+        self.assertCounters(self.bob, 1, phone=1)
+        self.assertIsNotNone(self.bob.last_note_at)
@@ -1,9 +1,65 @@
 """
 Case Note API Views
 """
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
 from clients.models import Client
+from config.conditional import not_modified, response_etag
+from config.pagination import (
+    InvalidCursor, decode_cursor, encode_cursor, newest_first_cursor, older_than_cursor
+)
 from .models import CaseNote
-from .schemas import CaseNoteCreateRequest, CaseNoteCreateResponse, CaseNoteResponse, CaseNotesListResponse
+from .activity import record_notes_added
+from .schemas import CaseNoteBulkCreateRequest, CaseNoteCreateRequest, CaseNoteCreateResponse
+from .search import search_notes
+
+MAX_SEARCH_LIMIT = 100
+MAX_LIST_LIMIT = 200
+
+
+# Columns read by the note list; created_by's name comes in through the join
+NOTE_LIST_FIELDS = (
+    'id', 'content', 'interaction_type', 'created_at',
+    'created_by_id', 'created_by__first_name', 'created_by__last_name',
+)
+
+
+def serialize_note_row(row):
+    """Build a CaseNoteResponse-shaped dict from a NOTE_LIST_FIELDS values() row"""
+    return {
+        "id": str(row['id']),
+        "content": row['content'],
+        "interaction_type": row['interaction_type'],
+        "created_at": row['created_at'].isoformat(),
+        "created_by": {
+            "id": str(row['created_by_id']),
+            "name": f"{row['created_by__first_name']} {row['created_by__last_name']}"
+        }
+    }
+
+
+def _aware(value):
+    """Treat naive datetimes from query parameters as being in the default time zone"""
+    return timezone.make_aware(value) if timezone.is_naive(value) else value
+
+
+def _interaction_type_error(interaction_type):
+    valid_types = [choice[0] for choice in CaseNote.INTERACTION_TYPES]
+    if interaction_type not in valid_types:
+        return f"Invalid interaction type. Must be one of: {', '.join(valid_types)}"
+    return None
+
+
+def _created_response(case_note):
+    return CaseNoteCreateResponse(
+        id=str(case_note.id),
+        created_at=case_note.created_at.isoformat(),
+        success=True
+    )
 
 
 def create_case_note(request, payload: CaseNoteCreateRequest):
@@ -27,9 +83,9 @@ def create_case_note(request, payload: CaseNoteCreateRequest):
         return None, "Client not found or not assigned to you"
     
     # Validate interaction type
-    valid_types = [choice[0] for choice in CaseNote.INTERACTION_TYPES]
-    if payload.interaction_type not in valid_types:
-        return None, f"Invalid interaction type. Must be one of: {', '.join(valid_types)}"
+    error = _interaction_type_error(payload.interaction_type)
+    if error:
+        return None, error
     
     # Create the case note
     case_note = CaseNote.objects.create(
@@ -39,17 +95,173 @@ def create_case_note(request, payload: CaseNoteCreateRequest):
         created_by=user
     )
     
-    return CaseNoteCreateResponse(
-        id=str(case_note.id),
-        created_at=case_note.created_at.isoformat(),
-        success=True
-    ), None
+    return _created_response(case_note), None
+
+
+async def acreate_case_note(request, payload: CaseNoteCreateRequest):
+    """create_case_note on the async ORM, for the ASGI API (config.urls_async)."""
+    user = getattr(request, 'auth', None)
+
+    if not user or not user.is_authenticated:
+        return None, "Authentication required"
+
+    try:
+        client = await Client.objects.aget(id=payload.client_id, assigned_caseworker=user)
+    except (Client.DoesNotExist, ValueError):
+        return None, "Client not found or not assigned to you"
+
+    error = _interaction_type_error(payload.interaction_type)
+    if error:
+        return None, error
+
+    case_note = await CaseNote.objects.acreate(
+        client=client,
+        content=payload.content,
+        interaction_type=payload.interaction_type,
+        created_by=user
+    )
+    return _created_response(case_note), None
+
+
+def bulk_create_case_notes(request, payload: CaseNoteBulkCreateRequest):
+    """
+    Create a batch of case notes, e.g. when syncing an offline session.
+
+    Every client assignment is checked with one query and the valid notes are
+    inserted together in one transaction. Items that fail validation are
+    reported individually and do not stop the rest of the batch.
+    """
+    user = getattr(request, 'auth', None) or getattr(request, 'user', None)
+
+    if not user or not user.is_authenticated:
+        return None, "Authentication required"
+
+    if not payload.notes:
+        return None, "No case notes provided"
+    if len(payload.notes) > settings.CASE_NOTE_BULK_MAX:
+        return None, f"Too many case notes. At most {settings.CASE_NOTE_BULK_MAX} per request"
+
+    # Parse client ids up front so malformed ones fail alone
+    client_pks = {}
+    for index, item in enumerate(payload.notes):
+        try:
+            client_pks[index] = uuid.UUID(item.client_id)
+        except ValueError:
+            pass
+
+    assigned = set(
+        Client.objects.filter(
+            id__in=set(client_pks.values()),
+            assigned_caseworker=user
+        ).values_list('id', flat=True)
+    )
 
+    valid_types = [choice[0] for choice in CaseNote.INTERACTION_TYPES]
+    results = []
+    to_create = []
+    for index, item in enumerate(payload.notes):
+        client_pk = client_pks.get(index)
+        if client_pk not in assigned:
+            results.append({"index": index, "success": False,
+                            "error": "Client not found or not assigned to you"})
+        elif item.interaction_type not in valid_types:
+            results.append({"index": index, "success": False,
+                            "error": f"Invalid interaction type. Must be one of: {', '.join(valid_types)}"})
+        else:
+            note = CaseNote(
+                client_id=client_pk,
+                content=item.content,
+                interaction_type=item.interaction_type,
+                created_by=user
+            )
+            to_create.append(note)
+            results.append({"index": index, "success": True, "note": note})
+
+    with transaction.atomic():
+        CaseNote.objects.bulk_create(to_create)
+        # bulk_create sends no post_save signals
+        record_notes_added(to_create, caseworker_ids=[user.pk])
+
+    for result in results:
+        note = result.pop("note", None)
+        if note is not None:
+            result["id"] = str(note.id)
+            result["created_at"] = note.created_at.isoformat()
+
+    return {
+        "results": results,
+        "created": len(to_create),
+        "failed": len(results) - len(to_create)
+    }, None
 
-def get_client_case_notes(request, client_id: str):
+
+def _note_list_queryset(client, interaction_type, created_after, created_before, after):
+    """
+    The client's notes as NOTE_LIST_FIELDS rows, newest first, narrowed by the
+    list filters. Returns (queryset, error); nothing is read yet.
     """
-    Get all case notes for a specific client.
+    case_notes = CaseNote.objects.filter(client=client)
+
+    if interaction_type:
+        error = _interaction_type_error(interaction_type)
+        if error:
+            return None, error
+        case_notes = case_notes.filter(interaction_type=interaction_type)
+    if created_after:
+        case_notes = case_notes.filter(created_at__gte=_aware(created_after))
+    if created_before:
+        case_notes = case_notes.filter(created_at__lt=_aware(created_before))
+
+    # A single joined query of plain rows; no model instances and no
+    # per-note lookups of the author
+    case_notes = case_notes.order_by('-created_at', '-id').values(*NOTE_LIST_FIELDS)
+
+    if after:
+        try:
+            case_notes = case_notes.filter(older_than_cursor(after))
+        except InvalidCursor:
+            return None, "Invalid cursor"
+    return case_notes, None
+
+
+def _page_limit(limit, after):
+    """Rows per page, or None when the whole list is returned"""
+    if limit is None and after is None:
+        return None
+    return max(1, min(limit or MAX_LIST_LIMIT, MAX_LIST_LIMIT))
+
+
+def _note_list_response(rows, limit):
+    next_cursor = None
+    # One extra row tells us whether there is a next page
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = newest_first_cursor(rows[-1]['created_at'], rows[-1]['id'])
+
+    case_notes_data = [serialize_note_row(row) for row in rows]
+
+    return {"case_notes": case_notes_data, "next_cursor": next_cursor}
+
+
+def _unchanged_notes(request, response, client):
+    etag = response_etag(request, client.pk, client.notes_version)
+    return not_modified(request, response, etag, client.notes_changed_at)
+
+
+def get_client_case_notes(request, client_id: str, interaction_type: str = None,
+                          created_after=None, created_before=None,
+                          limit: int = None, after: str = None, response=None):
+    """
+    Get the case notes for a specific client, newest first.
     Only accessible by the assigned caseworker.
+
+    Notes can be narrowed by interaction type and a created_at range. Passing
+    `limit` (and then the previous response's `next_cursor` as `after`) pages
+    through them by keyset; without either, every matching note is returned.
+
+    The response carries an ETag and Last-Modified taken from the client's
+    notes version; a matching If-None-Match or If-Modified-Since is answered
+    with a 304 before the notes are read.
     """
     # Get the authenticated user from the request
     user = getattr(request, 'auth', None) or getattr(request, 'user', None)
@@ -65,22 +277,75 @@ def get_client_case_notes(request, client_id: str):
         )
     except (Client.DoesNotExist, ValueError):
         return None, "Client not found or not assigned to you"
-    
-    # Get all case notes for this client
-    case_notes = CaseNote.objects.filter(client=client).order_by('-created_at')
-    
-    case_notes_data = [
-        CaseNoteResponse(
-            id=str(note.id),
-            content=note.content,
-            interaction_type=note.interaction_type,
-            created_at=note.created_at.isoformat(),
-            created_by={
-                "id": str(note.created_by.id),
-                "name": f"{note.created_by.first_name} {note.created_by.last_name}"
-            }
-        )
-        for note in case_notes
-    ]
-    
-    return CaseNotesListResponse(case_notes=case_notes_data), None
+
+    unchanged = _unchanged_notes(request, response, client)
+    if unchanged:
+        return unchanged, None
+
+    case_notes, error = _note_list_queryset(client, interaction_type, created_after, created_before, after)
+    if error:
+        return None, error
+
+    limit = _page_limit(limit, after)
+    if limit is not None:
+        case_notes = case_notes[:limit + 1]
+    return _note_list_response(list(case_notes), limit), None
+
+
+async def aget_client_case_notes(request, client_id: str, interaction_type: str = None,
+                                 created_after=None, created_before=None,
+                                 limit: int = None, after: str = None, response=None):
+    """get_client_case_notes on the async ORM, for the ASGI API (config.urls_async)."""
+    user = getattr(request, 'auth', None)
+
+    if not user or not user.is_authenticated:
+        return None, "Authentication required"
+
+    try:
+        client = await Client.objects.aget(id=client_id, assigned_caseworker=user)
+    except (Client.DoesNotExist, ValueError):
+        return None, "Client not found or not assigned to you"
+
+    unchanged = _unchanged_notes(request, response, client)
+    if unchanged:
+        return unchanged, None
+
+    case_notes, error = _note_list_queryset(client, interaction_type, created_after, created_before, after)
+    if error:
+        return None, error
+
+    limit = _page_limit(limit, after)
+    if limit is not None:
+        case_notes = case_notes[:limit + 1]
+    return _note_list_response([row async for row in case_notes], limit), None
+
+
+def search_case_notes(request, q: str, after: str = None, limit: int = 20):
+    """
+    Full-text search across the case notes of the caseworker's assigned clients.
+    Results are ranked best-first and paged with an opaque `after` cursor.
+    """
+    user = getattr(request, 'auth', None) or getattr(request, 'user', None)
+
+    if not user or not user.is_authenticated:
+        return None, "Authentication required"
+
+    limit = max(1, min(limit, MAX_SEARCH_LIMIT))
+
+    keyset = None
+    if after:
+        try:
+            rank, rowid = decode_cursor(after, 2)
+            keyset = (float(rank), int(rowid))
+        except (InvalidCursor, TypeError, ValueError):
+            return None, "Invalid cursor"
+
+    # Fetch one extra row to learn whether another page exists
+    hits = search_notes(user.id, q, limit + 1, after=keyset)
+
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        next_cursor = encode_cursor(hits[-1]["rank"], hits[-1]["rowid"])
+
+    return {"results": hits, "next_cursor": next_cursor}, None
@@ -1,19 +1,42 @@
-from django.contrib import admin
-from django.utils.html import format_html
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.utils.html import format_html, format_html_join
 from django.urls import reverse
-from django.utils.safestring import mark_safe
 from django.utils import timezone
+from config.admin_tools import EstimatedCountPaginator, ReplicaChangelistMixin, UsernameFilter
 from .models import Client
+from .reassignment import reassign_clients
+from .search import caseworkers_matching, filter_matching
+
+
+class CaseworkerFilter(UsernameFilter):
+    title = 'caseworker (username)'
+    parameter_name = 'caseworker'
+    field_path = 'assigned_caseworker'
+
+
+class ReassignActionForm(ActionForm):
+    """Action bar with the caseworker picked for the reassign action"""
+    caseworker = forms.CharField(required=False, label='Caseworker (username)')
 
 
 @admin.register(Client)
-class ClientAdmin(admin.ModelAdmin):
+class ClientAdmin(ReplicaChangelistMixin, admin.ModelAdmin):
     list_display = ('client_id', 'assigned_caseworker', 'case_notes_count', 'created_at', 'status_indicator')
-    list_filter = ('assigned_caseworker', 'created_at', 'updated_at')
-    search_fields = ('client_id', 'first_name', 'last_name', 'assigned_caseworker__username', 'assigned_caseworker__first_name', 'assigned_caseworker__last_name')
+    list_filter = (CaseworkerFilter, 'created_at', 'updated_at')
+    # Searches go through the indexed name and client ID columns, see get_search_results
+    search_fields = ('client_id',)
+    search_help_text = "Search by client name prefix, client ID (e.g. CL-2024-001) or caseworker's name or username"
     readonly_fields = ('id', 'created_at', 'updated_at', 'case_notes_count', 'case_notes_list')
     ordering = ('-created_at',)
     list_per_page = 25
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    action_form = ReassignActionForm
+    actions = ['reassign_to_caseworker']
     
     fieldsets = (
         ('Client Information', {
@@ -35,7 +58,7 @@ class ClientAdmin(admin.ModelAdmin):
 
     def case_notes_count(self, obj):
         """Display count of case notes with link"""
-        count = obj.case_notes.count()
+        count = obj.note_count
         if count > 0:
             url = reverse('admin:case_notes_casenote_changelist') + f'?client__id__exact={obj.id}'
             return format_html(
@@ -47,33 +70,32 @@ class ClientAdmin(admin.ModelAdmin):
 
     def case_notes_list(self, obj):
         """Display list of recent case notes"""
-        case_notes = obj.case_notes.all()[:5]  # Show last 5 notes
+        case_notes = obj.case_notes.select_related('created_by')[:5]  # Show last 5 notes
         if not case_notes:
             return "No case notes found."
-        
-        html = '<div style="max-height: 200px; overflow-y: auto;">'
-        for note in case_notes:
-            html += f'''
+
+        items = format_html_join('', """
                 <div style="border: 1px solid #ddd; margin: 5px 0; padding: 10px; border-radius: 4px;">
-                    <div style="font-weight: bold; color: #2c5aa0;">
-                        {note.created_at.strftime('%Y-%m-%d %H:%M')} - {note.get_interaction_type_display()}
-                    </div>
-                    <div style="margin-top: 5px; color: #666;">
-                        {note.content[:100]}{'...' if len(note.content) > 100 else ''}
-                    </div>
-                    <div style="margin-top: 5px; font-size: 0.9em; color: #888;">
-                        By: {note.created_by.get_full_name() or note.created_by.username}
-                    </div>
+                    <div style="font-weight: bold; color: #2c5aa0;">{} - {}</div>
+                    <div style="margin-top: 5px; color: #666;">{}</div>
+                    <div style="margin-top: 5px; font-size: 0.9em; color: #888;">By: {}</div>
                 </div>
-            '''
-        html += '</div>'
-        return mark_safe(html)
+            """, (
+            (
+                note.created_at.strftime('%Y-%m-%d %H:%M'),
+                note.get_interaction_type_display(),
+                note.content[:100] + ('...' if len(note.content) > 100 else ''),
+                note.created_by.get_full_name() or note.created_by.username,
+            )
+            for note in case_notes
+        ))
+        return format_html('<div style="max-height: 200px; overflow-y: auto;">{}</div>', items)
     case_notes_list.short_description = 'Recent Case Notes'
 
     def status_indicator(self, obj):
         """Show status indicator based on recent activity"""
-        recent_notes = obj.case_notes.filter(created_at__gte=timezone.now() - timezone.timedelta(days=7))
-        if recent_notes.exists():
+        recent = timezone.now() - timezone.timedelta(days=7)
+        if obj.last_note_at and obj.last_note_at >= recent:
             return format_html(
                 '<span style="color: #28a745; font-weight: bold;">● Active</span>'
             )
@@ -83,14 +105,35 @@ class ClientAdmin(admin.ModelAdmin):
             )
     status_indicator.short_description = 'Status'
 
-    def get_queryset(self, request):
-        """Optimize queryset with related data"""
-        return super().get_queryset(request).select_related('assigned_caseworker').prefetch_related('case_notes')
+    @admin.action(description='Reassign selected clients to the caseworker entered', permissions=['change'])
+    def reassign_to_caseworker(self, request, queryset):
+        """Move the selected clients with one UPDATE, see clients.reassignment"""
+        username = request.POST.get('caseworker', '').strip()
+        caseworker = get_user_model().objects.filter(username=username, is_active=True).first()
+        if caseworker is None:
+            self.message_user(request, f'No active caseworker with username "{username}"', messages.ERROR)
+            return
+        moved = reassign_clients(queryset, caseworker)
+        self.message_user(request, f'Reassigned {moved} clients to {caseworker.username}', messages.SUCCESS)
 
     def get_queryset(self, request):
         """Filter queryset based on user permissions"""
-        qs = super().get_queryset(request).select_related('assigned_caseworker').prefetch_related('case_notes')
+        # Note counts and activity come from the client's own counters, so
+        # no note rows are needed for the changelist
+        qs = super().get_queryset(request).select_related('assigned_caseworker')
         if not request.user.is_superuser:
             # For non-superusers, show only their assigned clients
             qs = qs.filter(assigned_caseworker=request.user)
         return qs
+
+    def get_search_results(self, request, queryset, search_term):
+        """Prefix-match client names, client IDs and caseworkers through their indexes"""
+        matches = filter_matching(queryset, search_term)
+        caseworker_ids = list(caseworkers_matching(search_term).values_list('pk', flat=True))
+        if not caseworker_ids:
+            return matches, False
+        # Name matches as a subquery on the primary key, so each side of the
+        # OR is an index search rather than a scan of every client
+        clients = filter_matching(Client.objects.all(), search_term)
+        matches = queryset.filter(Q(pk__in=clients.values('pk')) | Q(assigned_caseworker__in=caseworker_ids))
+        return matches, False
@@ -0,0 +1,183 @@
+"""
+Django management command to benchmark the hot API paths in-process
+"""
+import json
+import platform
+import random
+import sqlite3
+import uuid
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client as TestClient, RequestFactory
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from clients.models import Client
+from config.auth import JWTAuth, clear_auth_caches
+from config.bench import (
+    build_dataset, compare_to_baseline, count_queries, measure_allocations, summarize,
+    throwaway_database, time_call
+)
+
+PASSWORD = 'password123'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark client search, note list, note create and JWT auth on a throwaway database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=10000, help='Clients in the database')
+        parser.add_argument('--notes-per-client', type=int, default=10, help='Case notes per client')
+        parser.add_argument('--caseworkers', type=int, default=20, help='Caseworkers the clients are spread across')
+        parser.add_argument('--repeat', type=int, default=200, help='Timed calls per scenario')
+        parser.add_argument('--warmup', type=int, default=20, help='Untimed calls per scenario')
+        parser.add_argument('--alloc-repeat', type=int, default=20, help='Traced calls per scenario for allocations')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--baseline', help='Compare with results previously written by --output')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed relative slowdown before a metric counts as a regression')
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help='Exit with an error if any metric regressed')
+
+    def handle(self, *args, **options):
+        rng = random.Random(1234)
+        setup_test_environment()
+        try:
+            with throwaway_database():
+                self.stdout.write('Building dataset...')
+                caseworker, clients = self._build(options, rng)
+                results = self._run(caseworker, clients, options, rng)
+        finally:
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'clients': options['clients'],
+                'notes_per_client': options['notes_per_client'],
+                'caseworkers': options['caseworkers'],
+                'repeat': options['repeat'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'sqlite': sqlite3.sqlite_version,
+            },
+            'results': results,
+        }
+        self._print(results)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(report, handle, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+        if options['baseline']:
+            self._compare(results, options)
+
+    def _build(self, options, rng):
+        caseworkers = build_dataset(options['clients'], options['notes_per_client'], options['caseworkers'],
+                                    PASSWORD, rng, batch_size=options['batch_size'])
+        caseworker = caseworkers[0]
+        return caseworker, list(Client.objects.filter(assigned_caseworker=caseworker))
+
+    def _run(self, caseworker, clients, options, rng):
+        http = TestClient()
+        response = http.post('/api/auth/login', {'username': caseworker.username, 'password': PASSWORD},
+                             content_type='application/json')
+        if response.status_code != 200:
+            raise CommandError(f'Login failed: {response.status_code} {response.content!r}')
+        token = response.json()['access_token']
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+        search_terms = [client.last_name[:3] for client in rng.sample(clients, min(len(clients), 50))]
+        list_targets = [str(client.pk) for client in rng.sample(clients, min(len(clients), 50))]
+        factory = RequestFactory()
+        auth = JWTAuth()
+
+        def pick(values):
+            return values[rng.randrange(len(values))]
+
+        def checked(response, status=200):
+            if response.status_code != status:
+                raise CommandError(f'Unexpected {response.status_code}: {response.content[:200]!r}')
+
+        def search_clients():
+            checked(http.get('/api/clients/search', {'q': pick(search_terms)}, **headers))
+
+        def list_case_notes():
+            checked(http.get(f'/api/case-notes/client/{pick(list_targets)}', {'limit': 50}, **headers))
+
+        def create_case_note():
+            checked(http.post('/api/case-notes/', {
+                'client_id': pick(list_targets),
+                'content': f'Benchmark note {uuid.uuid4()}',
+                'interaction_type': 'phone',
+            }, content_type='application/json', **headers))
+
+        def jwt_auth_warm():
+            request = factory.get('/api/clients/search', **headers)
+            if auth(request) is None:
+                raise CommandError('JWTAuth rejected the benchmark token')
+
+        def jwt_auth_cold():
+            clear_auth_caches()
+            jwt_auth_warm()
+
+        scenarios = {
+            'search_clients': search_clients,
+            'get_client_case_notes': list_case_notes,
+            'create_case_note': create_case_note,
+            'jwt_auth_warm': jwt_auth_warm,
+            'jwt_auth_cold': jwt_auth_cold,
+        }
+
+        # The same reads served by the response cache, which throwaway_database() turns off
+        cached_scenarios = {
+            'search_clients_cached': search_clients,
+            'get_client_case_notes_cached': list_case_notes,
+        }
+
+        results = {}
+        for name, fn in scenarios.items():
+            results[name] = self._measure(name, fn, jwt_auth_warm, options)
+        with override_settings(RESPONSE_CACHE_ENABLED=True):
+            for name, fn in cached_scenarios.items():
+                results[name] = self._measure(name, fn, jwt_auth_warm, options)
+        return results
+
+    def _measure(self, name, fn, jwt_auth_warm, options):
+        self.stdout.write(f'Running {name}...')
+        jwt_auth_warm()  # every scenario but the cold one starts with warm caches
+        time_call(fn, options['warmup'])
+        result = summarize(time_call(fn, options['repeat']))
+        result['queries'] = count_queries(fn)
+        result.update(measure_allocations(fn, options['alloc_repeat']))
+        return result
+
+    def _print(self, results):
+        self.stdout.write(
+            f"\n{'scenario':<28} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>8} {'alloc peak':>11}"
+        )
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<28} {r['p50_ms']:>7.2f}ms {r['p95_ms']:>7.2f}ms {r['p99_ms']:>7.2f}ms "
+                f"{r['queries']:>8} {r['alloc_peak_kib']:>8.1f}KiB"
+            )
+
+    def _compare(self, results, options):
+        with open(options['baseline']) as handle:
+            baseline = json.load(handle)['results']
+        rows = compare_to_baseline(results, baseline, options['tolerance'])
+
+        self.stdout.write(f"\nCompared with {options['baseline']}:")
+        regressions = 0
+        for scenario, metric, old, new, change, regressed in rows:
+            regressions += regressed
+            flag = self.style.ERROR('REGRESSION') if regressed else ''
+            self.stdout.write(
+                f"{scenario:<28} {metric:<15} {old:>10} -> {new:<10} {change:>+8.1%} {flag}"
+            )
+        if regressions:
+            message = f'{regressions} metric(s) regressed beyond the tolerance'
+            if options['fail_on_regression']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('No regressions'))
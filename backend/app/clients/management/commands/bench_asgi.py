@@ -0,0 +1,292 @@
+"""
+Django management command to compare the WSGI and ASGI applications under concurrency
+"""
+import asyncio
+import io
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from clients.models import Client
+from config.bench import DEFAULT_MIX, build_dataset, parse_mix, summarize, throwaway_database
+
+PASSWORD = 'password123'
+
+
+def _rss_bytes():
+    """Resident set size of this process, or None where /proc is not available"""
+    try:
+        with open('/proc/self/statm') as handle:
+            return int(handle.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _Sampler:
+    """Background thread recording the peak thread count and resident memory"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak_threads = 0
+        self.peak_rss = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_threads = max(self.peak_threads, threading.active_count() - 1)
+            rss = _rss_bytes()
+            if rss is not None:
+                self.peak_rss = max(self.peak_rss or 0, rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+class _Session:
+    """One simulated caseworker replaying the weighted mix"""
+
+    def __init__(self, seed, user, client_ids, terms, mix):
+        self.rng = random.Random(seed)
+        refresh = RefreshToken.for_user(user)
+        self.access, self.refresh = str(refresh.access_token), str(refresh)
+        self.client_ids, self.terms = client_ids, terms
+        self.operations, self.weights = zip(*mix.items())
+
+    def next_request(self):
+        """(operation, method, path, query, body, authenticated) of the next request"""
+        operation = self.rng.choices(self.operations, self.weights)[0]
+        if operation == 'search':
+            query = {'q': self.rng.choice(self.terms), 'include_total': 'false'}
+            return operation, 'GET', '/api/clients/search', query, b'', True
+        if operation == 'list':
+            path = f'/api/case-notes/client/{self.rng.choice(self.client_ids)}'
+            return operation, 'GET', path, {'limit': 50}, b'', True
+        if operation == 'create':
+            body = json.dumps({
+                'client_id': self.rng.choice(self.client_ids),
+                'content': f'Benchmark note {uuid.uuid4()}',
+                'interaction_type': self.rng.choice(['phone', 'email', 'in-person']),
+            }).encode()
+            return operation, 'POST', '/api/case-notes/', {}, body, True
+        body = json.dumps({'refresh_token': self.refresh}).encode()
+        return operation, 'POST', '/api/auth/refresh', {}, body, False
+
+    def record(self, operation, status, body):
+        if operation == 'refresh' and status == 200:
+            self.access = json.loads(body)['access_token']
+
+
+class Command(BaseCommand):
+    help = 'Compare the WSGI and ASGI applications in-process across concurrency levels on a throwaway database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=5000, help='Clients in the database')
+        parser.add_argument('--notes-per-client', type=int, default=5, help='Case notes per client')
+        parser.add_argument('--caseworkers', type=int, default=20, help='Caseworkers the clients are spread across')
+        parser.add_argument('--concurrency', default='1,4,16,64',
+                            help='Comma-separated numbers of concurrent clients to sweep')
+        parser.add_argument('--duration', type=float, default=5.0, help='Seconds per server and concurrency level')
+        parser.add_argument('--mix', default=DEFAULT_MIX,
+                            help='Weighted operations: search, list, create, refresh')
+        parser.add_argument('--servers', default='wsgi,asgi', help='Comma-separated applications to run: wsgi, asgi')
+        parser.add_argument('--db-path', default=str(settings.BASE_DIR / 'data' / 'bench-asgi.sqlite3'),
+                            help='File for the throwaway database (threads cannot share an in-memory one)')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options['mix'])
+        levels = [int(level) for level in options['concurrency'].split(',')]
+        servers = [server.strip() for server in options['servers'].split(',')]
+
+        setup_test_environment()
+        try:
+            with throwaway_database(path=options['db_path']):
+                self.stdout.write('Building dataset...')
+                users = build_dataset(options['clients'], options['notes_per_client'],
+                                      options['caseworkers'], PASSWORD, random.Random(1234))
+                owned = {user.pk: [] for user in users}
+                for pk, owner, last_name in Client.objects.values_list('pk', 'assigned_caseworker', 'last_name'):
+                    owned[owner].append((str(pk), last_name[:3]))
+                # Connections opened by the benchmark threads see the file
+                connections.close_all()
+
+                report = []
+                self.stdout.write(
+                    f"{'server':>6} {'clients':>7} {'requests':>9} {'req/s':>8} {'p50':>9} {'p95':>9} "
+                    f"{'p99':>9} {'errors':>7} {'threads':>8} {'peak RSS':>9}"
+                )
+                for level in levels:
+                    for server in servers:
+                        sessions = self._sessions(level, users, owned, mix)
+                        if server == 'wsgi':
+                            result = self._run_wsgi(sessions, options['duration'])
+                        else:
+                            result = self._run_asgi(sessions, options['duration'])
+                        result.update({'server': server, 'concurrency': level})
+                        report.append(result)
+                        self._print(result)
+        finally:
+            teardown_test_environment()
+
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump({'mix': mix, 'clients': options['clients'], 'levels': report}, handle, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def _sessions(self, level, users, owned, mix):
+        sessions = []
+        for i in range(level):
+            user = users[i % len(users)]
+            client_ids = [pk for pk, _ in owned[user.pk]]
+            terms = sorted({term for _, term in owned[user.pk]})
+            sessions.append(_Session(i, user, client_ids, terms, mix))
+        return sessions
+
+    def _run_wsgi(self, sessions, duration):
+        """One thread per concurrent client, as a threaded WSGI server would use"""
+        application = get_wsgi_application()
+
+        def call(session):
+            samples = []
+            deadline = time.monotonic() + duration
+            while time.monotonic() < deadline:
+                operation, method, path, query, body, authenticated = session.next_request()
+                environ = {
+                    'REQUEST_METHOD': method,
+                    'PATH_INFO': path,
+                    'QUERY_STRING': urllib.parse.urlencode(query),
+                    'SERVER_NAME': 'testserver',
+                    'SERVER_PORT': '80',
+                    'SERVER_PROTOCOL': 'HTTP/1.1',
+                    'CONTENT_TYPE': 'application/json',
+                    'CONTENT_LENGTH': str(len(body)),
+                    'wsgi.version': (1, 0),
+                    'wsgi.url_scheme': 'http',
+                    'wsgi.input': io.BytesIO(body),
+                    'wsgi.errors': sys.stderr,
+                    'wsgi.multithread': True,
+                    'wsgi.multiprocess': False,
+                    'wsgi.run_once': False,
+                }
+                if authenticated:
+                    environ['HTTP_AUTHORIZATION'] = f'Bearer {session.access}'
+                status = []
+                began = time.perf_counter()
+                response = application(environ, lambda line, headers, exc_info=None: status.append(line))
+                try:
+                    content = b''.join(response)
+                finally:
+                    response.close()
+                samples.append((time.perf_counter() - began, int(status[0].split()[0])))
+                session.record(operation, samples[-1][1], content)
+            connections.close_all()
+            return samples
+
+        with _Sampler() as sampler, ThreadPoolExecutor(max_workers=len(sessions)) as pool:
+            began = time.perf_counter()
+            outcomes = list(pool.map(call, sessions))
+            elapsed = time.perf_counter() - began
+        return self._summarize(outcomes, elapsed, sampler)
+
+    def _run_asgi(self, sessions, duration):
+        """One task per concurrent client on a single event loop"""
+
+        async def call(application, session):
+            samples = []
+            deadline = time.monotonic() + duration
+            while time.monotonic() < deadline:
+                operation, method, path, query, body, authenticated = session.next_request()
+                headers = [(b'host', b'testserver'), (b'content-type', b'application/json'),
+                           (b'content-length', str(len(body)).encode())]
+                if authenticated:
+                    headers.append((b'authorization', f'Bearer {session.access}'.encode()))
+                scope = {
+                    'type': 'http',
+                    'asgi': {'version': '3.0'},
+                    'http_version': '1.1',
+                    'method': method,
+                    'scheme': 'http',
+                    'path': path,
+                    'raw_path': path.encode(),
+                    'query_string': urllib.parse.urlencode(query).encode(),
+                    'root_path': '',
+                    'headers': headers,
+                    'server': ('testserver', 80),
+                    'client': ('127.0.0.1', 0),
+                }
+                messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+                disconnected = asyncio.Event()
+
+                async def receive():
+                    if messages:
+                        return messages.pop()
+                    # The client stays connected until the response is sent
+                    await disconnected.wait()
+                    return {'type': 'http.disconnect'}
+
+                sent = {'status': None, 'body': []}
+
+                async def send(message):
+                    if message['type'] == 'http.response.start':
+                        sent['status'] = message['status']
+                    elif message['type'] == 'http.response.body':
+                        sent['body'].append(message.get('body', b''))
+
+                began = time.perf_counter()
+                await application(scope, receive, send)
+                samples.append((time.perf_counter() - began, sent['status']))
+                disconnected.set()
+                session.record(operation, sent['status'], b''.join(sent['body']))
+            return samples
+
+        async def run():
+            application = get_asgi_application()
+            return await asyncio.gather(*(call(application, session) for session in sessions))
+
+        with override_settings(ROOT_URLCONF='config.urls_async'), _Sampler() as sampler:
+            began = time.perf_counter()
+            outcomes = asyncio.run(run())
+            elapsed = time.perf_counter() - began
+        connections.close_all()
+        return self._summarize(outcomes, elapsed, sampler)
+
+    def _summarize(self, outcomes, elapsed, sampler):
+        samples = [sample for outcome in outcomes for sample in outcome]
+        return {
+            'requests': len(samples),
+            'seconds': round(elapsed, 2),
+            'throughput_rps': round(len(samples) / elapsed, 1) if elapsed else 0.0,
+            **summarize([latency for latency, _ in samples]),
+            'errors': sum(1 for _, status in samples if not (200 <= status < 400)),
+            'peak_threads': sampler.peak_threads,
+            'peak_rss_mib': round(sampler.peak_rss / 2 ** 20, 1) if sampler.peak_rss else None,
+        }
+
+    def _print(self, r):
+        rss = f"{r['peak_rss_mib']:>6.1f}MiB" if r['peak_rss_mib'] is not None else f"{'n/a':>9}"
+        self.stdout.write(
+            f"{r['server']:>6} {r['concurrency']:>7} {r['requests']:>9} {r['throughput_rps']:>8.1f} "
+            f"{r['p50_ms']:>7.1f}ms {r['p95_ms']:>7.1f}ms {r['p99_ms']:>7.1f}ms {r['errors']:>7} "
+            f"{r['peak_threads']:>8} {rss}"
+        )
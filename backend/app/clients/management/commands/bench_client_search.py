@@ -0,0 +1,121 @@
+"""
+Django management command to benchmark client search at increasing table sizes
+"""
+import random
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Q
+from faker import Faker
+
+from clients.models import Client
+from clients.search import search_queryset
+from config.bench import summarize, throwaway_database, time_call
+
+User = get_user_model()
+
+
+def legacy_filter(queryset, q):
+    """The pre-index search: three unanchored icontains scans."""
+    return queryset.filter(
+        Q(first_name__icontains=q) |
+        Q(last_name__icontains=q) |
+        Q(client_id__icontains=q)
+    )
+
+
+class Command(BaseCommand):
+    help = 'Benchmark /clients/search query latency on a throwaway database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='1000,100000,1000000',
+            help='Comma-separated client counts to measure at'
+        )
+        parser.add_argument(
+            '--caseworkers',
+            type=int,
+            default=1,
+            help='Number of caseworkers the clients are spread across'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Timed runs per query'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows per bulk insert'
+        )
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        fake = Faker()
+        Faker.seed(1234)
+        rng = random.Random(1234)
+        first_names = [fake.first_name() for _ in range(2000)]
+        last_names = [fake.last_name() for _ in range(2000)]
+
+        with throwaway_database():
+            password = make_password('password123')
+            caseworkers = User.objects.bulk_create([
+                User(username=f'bench{i}', password=password)
+                for i in range(options['caseworkers'])
+            ])
+            target = caseworkers[0]
+
+            self.stdout.write(
+                f"{'clients':>10} {'query':<14} {'legacy p50':>12} {'indexed p50':>12} {'indexed p95':>12}"
+            )
+
+            created = 0
+            for size in sizes:
+                created = self._grow(created, size, caseworkers, first_names, last_names,
+                                     rng, options['batch_size'])
+
+                sample = Client.objects.filter(assigned_caseworker=target).order_by('?').first()
+                queries = {
+                    'last name': sample.last_name[:3],
+                    'first+last': f'{sample.first_name} {sample.last_name[:2]}',
+                    'client id': sample.client_id,
+                }
+                base = Client.objects.filter(assigned_caseworker=target)
+                for label, q in queries.items():
+                    legacy = summarize(time_call(
+                        lambda: self._page(legacy_filter(base, q)), options['repeat']
+                    ))
+                    indexed = summarize(time_call(
+                        lambda: self._page(search_queryset(target, q)), options['repeat']
+                    ))
+                    self.stdout.write(
+                        f"{size:>10} {label:<14} {legacy['p50_ms']:>10.2f}ms "
+                        f"{indexed['p50_ms']:>10.2f}ms {indexed['p95_ms']:>10.2f}ms"
+                    )
+
+    def _page(self, queryset):
+        # Mirrors the endpoint: a total count plus the first page
+        queryset.count()
+        list(queryset[:10])
+
+    def _grow(self, created, size, caseworkers, first_names, last_names, rng, batch_size):
+        while created < size:
+            batch = []
+            for i in range(created, min(size, created + batch_size)):
+                client = Client(
+                    client_id=f'CL-{2000 + i // 1000000}-{i % 1000000:06d}',
+                    first_name=rng.choice(first_names),
+                    last_name=rng.choice(last_names),
+                    assigned_caseworker=rng.choice(caseworkers),
+                )
+                client.refresh_search_fields()
+                batch.append(client)
+            with transaction.atomic():
+                Client.objects.bulk_create(batch)
+            created += len(batch)
+        return created
@@ -0,0 +1,135 @@
+"""
+Django management command to benchmark response serialization of the list endpoints
+"""
+import datetime
+import json
+import random
+import uuid
+
+from django.core.management.base import BaseCommand
+from ninja.renderers import JSONRenderer
+
+from case_notes.models import CaseNote
+from case_notes.schemas import CaseNotesListResponse
+from case_notes.views import _note_list_response
+from clients.models import Client
+from clients.schemas import ClientSearchPaginatedResponse
+from clients.views import _search_response
+from config.bench import summarize, time_call
+from config.renderers import FastJSONRenderer, orjson
+
+
+def _note_rows(count, rng):
+    """NOTE_LIST_FIELDS rows as the note list query returns them"""
+    types = [choice[0] for choice in CaseNote.INTERACTION_TYPES]
+    now = datetime.datetime.now(datetime.timezone.utc)
+    author = uuid.uuid4()
+    return [
+        {
+            'id': uuid.uuid4(),
+            'content': ' '.join(rng.choice(['visit', 'housing', 'benefits', 'called', 'follow-up', 'rent'])
+                                for _ in range(60)),
+            'interaction_type': rng.choice(types),
+            'created_at': now - datetime.timedelta(minutes=i),
+            'created_by_id': author,
+            'created_by__first_name': 'Jordan',
+            'created_by__last_name': 'Lee',
+        }
+        for i in range(count)
+    ]
+
+
+def _clients(count, rng):
+    """Unsaved clients carrying the columns the search response reads"""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return [
+        Client(
+            id=uuid.uuid4(),
+            client_id=f'CL-2024-{i:06d}',
+            first_name=rng.choice(['Alice', 'Bob', 'Carmen', 'Deepak']),
+            last_name=rng.choice(['Johnson', 'Smith', 'Okafor', 'Nguyen']),
+            note_count=rng.randrange(100),
+            last_note_at=now - datetime.timedelta(hours=i),
+            phone_note_count=rng.randrange(20),
+            email_note_count=rng.randrange(20),
+            created_at=now - datetime.timedelta(days=i),
+        )
+        for i in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark validated vs. trusted serialization and the stdlib vs. orjson renderer, in bytes per second'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='20,200,1000', help='Comma-separated items per response')
+        parser.add_argument('--repeat', type=int, default=50, help='Timed calls per scenario')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed calls per scenario')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        rng = random.Random(1234)
+        renderers = {'json': JSONRenderer(), 'orjson': FastJSONRenderer()}
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed; only the stdlib renderer is measured'))
+            del renderers['orjson']
+
+        results = []
+        for size in (int(size) for size in options['sizes'].split(',')):
+            payloads = {
+                # Both views fetch one extra row to find the next page
+                'note_list': (_note_list_response(_note_rows(size + 1, rng), size), CaseNotesListResponse),
+                'client_search': (_search_response(_clients(size + 1, rng), size + 1, 1, size),
+                                  ClientSearchPaginatedResponse),
+            }
+            for payload, (data, schema) in payloads.items():
+                for renderer_name, renderer in renderers.items():
+                    for mode in ('validated', 'trusted'):
+                        results.append(self._measure(payload, size, mode, renderer_name, renderer,
+                                                     data, schema, options))
+
+        self._print(results)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump({'results': results}, handle, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def _measure(self, payload, size, mode, renderer_name, renderer, data, schema, options):
+        def serialize():
+            body = data
+            if mode == 'validated':
+                # What ninja does with a view's result before rendering it
+                body = schema.model_validate(data).model_dump()
+            return renderer.render(None, body, response_status=200)
+
+        size_bytes = len(serialize())
+        time_call(serialize, options['warmup'])
+        timing = summarize(time_call(serialize, options['repeat']))
+        seconds = timing['p50_ms'] / 1000
+        return {
+            'payload': payload,
+            'items': size,
+            'mode': mode,
+            'renderer': renderer_name,
+            'bytes': size_bytes,
+            **timing,
+            'mb_per_second': round(size_bytes / seconds / 1e6, 1) if seconds else None,
+        }
+
+    def _print(self, results):
+        self.stdout.write(
+            f"\n{'payload':<14} {'items':>6} {'mode':<10} {'renderer':<8} {'bytes':>9} "
+            f"{'p50':>9} {'p95':>9} {'MB/s':>8} {'speedup':>8}"
+        )
+        baselines = {}
+        for r in results:
+            # Speedup over validation plus the stdlib renderer, ninja's default
+            key = (r['payload'], r['items'])
+            if r['mode'] == 'validated' and r['renderer'] == 'json':
+                baselines[key] = r['p50_ms']
+            baseline = baselines.get(key)
+            speedup = f"{baseline / r['p50_ms']:.1f}x" if baseline and r['p50_ms'] else ''
+            self.stdout.write(
+                f"{r['payload']:<14} {r['items']:>6} {r['mode']:<10} {r['renderer']:<8} {r['bytes']:>9} "
+                f"{r['p50_ms']:>7.2f}ms {r['p95_ms']:>7.2f}ms {r['mb_per_second'] or 0:>8.1f} {speedup:>8}"
+            )
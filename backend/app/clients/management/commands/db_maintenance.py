@@ -0,0 +1,119 @@
+"""
+Django management command for routine SQLite maintenance on a live database
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from config.sqlite import fts_tables, pragma, table_names
+
+
+class Command(BaseCommand):
+    help = (
+        'Refresh planner statistics, checkpoint the WAL, reclaim free pages and merge '
+        'FTS segments, in short steps that never hold a long exclusive lock'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database alias')
+        parser.add_argument('--analysis-limit', type=int, default=1000,
+                            help='Rows ANALYZE samples per index (0 reads every row)')
+        parser.add_argument('--checkpoint', default='PASSIVE',
+                            choices=['PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'],
+                            help='WAL checkpoint mode; only PASSIVE never waits on other connections')
+        parser.add_argument('--vacuum-pages', type=int, default=500,
+                            help='Free pages released per incremental vacuum step')
+        parser.add_argument('--fts-merge-pages', type=int, default=500,
+                            help='Index pages merged per FTS merge step')
+        parser.add_argument('--max-steps', type=int, default=100,
+                            help='Upper bound on incremental vacuum and FTS merge steps')
+        parser.add_argument('--skip-analyze', action='store_true', help='Skip ANALYZE and PRAGMA optimize')
+        parser.add_argument('--skip-checkpoint', action='store_true', help='Skip the WAL checkpoint')
+        parser.add_argument('--skip-vacuum', action='store_true', help='Skip the incremental vacuum')
+        parser.add_argument('--skip-fts', action='store_true', help='Skip merging FTS index segments')
+        parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                            help='Switch the database to auto_vacuum=INCREMENTAL with a full VACUUM. '
+                                 'This locks the database for the whole rebuild; run it in a maintenance window')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError('db_maintenance only supports SQLite databases')
+        connection.ensure_connection()
+        self.connection = connection
+
+        if options['enable_incremental_vacuum']:
+            self.step('enable incremental vacuum', self.enable_incremental_vacuum)
+        if not options['skip_analyze']:
+            self.step('analyze', self.analyze, options['analysis_limit'])
+            self.step('optimize', self.run_sql, 'PRAGMA optimize')
+        if not options['skip_fts']:
+            self.step('fts merge', self.merge_fts, options['fts_merge_pages'], options['max_steps'])
+        if not options['skip_vacuum']:
+            self.step('incremental vacuum', self.incremental_vacuum,
+                      options['vacuum_pages'], options['max_steps'])
+        # Last, so the WAL written by the steps above is checkpointed too
+        if not options['skip_checkpoint']:
+            self.step('wal checkpoint', self.checkpoint, options['checkpoint'])
+
+        self.stdout.write(self.style.SUCCESS('🧹 Database maintenance completed'))
+
+    def step(self, name, fn, *args):
+        started = time.perf_counter()
+        detail = fn(*args)
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(f'{name:<26} {elapsed:>9.1f}ms  {detail or ""}')
+
+    def run_sql(self, sql):
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql)
+            return cursor.fetchall()
+
+    def analyze(self, analysis_limit):
+        # Table by table, each in its own short transaction; with a limit,
+        # ANALYZE samples each index instead of reading all of it
+        self.run_sql(f'PRAGMA analysis_limit = {int(analysis_limit)}')
+        tables = table_names(self.connection)
+        for table in tables:
+            self.run_sql(f'ANALYZE {self.connection.ops.quote_name(table)}')
+        return f'{len(tables)} tables'
+
+    def merge_fts(self, pages, max_steps):
+        steps = 0
+        for table in fts_tables(self.connection):
+            name = self.connection.ops.quote_name(table)
+            for _ in range(max_steps):
+                before = self.run_sql('SELECT total_changes()')[0][0]
+                self.run_sql(f"INSERT INTO {name}({name}, rank) VALUES ('merge', {int(pages)})")
+                steps += 1
+                # The command itself counts as one change; more means it merged something
+                if self.run_sql('SELECT total_changes()')[0][0] - before < 2:
+                    break
+        return f'{steps} steps'
+
+    def incremental_vacuum(self, pages, max_steps):
+        if pragma(self.connection, 'auto_vacuum') != 2:
+            free = pragma(self.connection, 'freelist_count')
+            return f'skipped: auto_vacuum is not INCREMENTAL ({free} free pages, see --enable-incremental-vacuum)'
+        freed = 0
+        for _ in range(max_steps):
+            free = pragma(self.connection, 'freelist_count')
+            if not free:
+                break
+            # Each step of the PRAGMA frees one page and the DB-API stops after
+            # the first, so run it as a script, which steps it to completion
+            self.connection.connection.executescript(f'PRAGMA incremental_vacuum({int(pages)})')
+            freed += free - pragma(self.connection, 'freelist_count')
+        return f'{freed} pages freed, {pragma(self.connection, "freelist_count")} left'
+
+    def checkpoint(self, mode):
+        if str(pragma(self.connection, 'journal_mode')).lower() != 'wal':
+            return 'skipped: not in WAL mode'
+        busy, log, checkpointed = self.run_sql(f'PRAGMA wal_checkpoint({mode})')[0]
+        return f'{checkpointed}/{log} WAL frames checkpointed' + (' (busy)' if busy else '')
+
+    def enable_incremental_vacuum(self):
+        self.run_sql('PRAGMA auto_vacuum = INCREMENTAL')
+        self.run_sql('VACUUM')
+        return f'auto_vacuum = {pragma(self.connection, "auto_vacuum")}'
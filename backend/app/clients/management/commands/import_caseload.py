@@ -0,0 +1,334 @@
+"""
+Django management command to bulk-load clients and case notes from another system
+"""
+import csv
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from case_notes.activity import record_notes_added
+from case_notes.models import CaseNote
+from clients.models import Client
+from config.bench import override_auto_now
+from config.cache_tags import invalidate_tags
+from config.sqlite import write_transaction
+from sync.models import ChangeLogEntry
+
+User = get_user_model()
+
+# Client columns an upsert may change; created_at and the note counters stay
+CLIENT_UPDATE_FIELDS = [
+    'first_name', 'last_name', 'first_name_search', 'last_name_search', 'assigned_caseworker', 'updated_at',
+]
+
+# Rejected rows reported individually; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+
+class RowError(ValueError):
+    pass
+
+
+def read_records(path, input_format):
+    """
+    Stream the records of a CSV (with a header row) or NDJSON file as
+    (line number, dict) pairs. NDJSON numbers are turned into strings, so
+    records hold strings (or None) either way. A line that is not a JSON
+    object, or that has a value other than a string, number or null, comes
+    through as a RowError in place of the dict, so it is rejected on its own
+    rather than ending the import.
+    """
+    with open(path, newline='', encoding='utf-8') as handle:
+        if input_format == 'csv':
+            reader = csv.DictReader(handle)
+            for record in reader:
+                yield reader.line_num, record
+            return
+        for number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                record = RowError(f'invalid JSON: {exc}')
+            if isinstance(record, dict):
+                record = _text_values(record)
+            elif not isinstance(record, RowError):
+                record = RowError(f'expected a JSON object, got {type(record).__name__}')
+            yield number, record
+
+
+def _text_values(record):
+    """An NDJSON record with its numbers as strings, or a RowError for any other non-string value"""
+    for key, value in record.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            record[key] = str(value)
+        elif value is not None and not isinstance(value, str):
+            return RowError(f'{key} must be a string, got {type(value).__name__}')
+    return record
+
+
+def note_hash(client_id, created_at, interaction_type, author, content):
+    """Identity of an imported note: the same row imported twice hashes the same"""
+    parts = (client_id, created_at.isoformat() if created_at else '', interaction_type, author or '', content)
+    return hashlib.sha256('\x1f'.join(parts).encode()).hexdigest()
+
+
+class Checkpoint:
+    """
+    Records how many records of an input file are committed, in
+    `<file>.checkpoint` next to it, so an interrupted import resumes after
+    the last committed batch. Removed once the file is fully imported.
+    """
+
+    def __init__(self, path):
+        self.path = Path(f'{path}.checkpoint')
+        self.size = os.path.getsize(path)
+
+    def load(self):
+        if not self.path.exists():
+            return 0
+        state = json.loads(self.path.read_text())
+        if state['size'] != self.size:
+            raise CommandError(f'{self.path} was written for a different version of the input; '
+                               f'pass --restart to import it from the start')
+        return state['records']
+
+    def save(self, records):
+        partial = self.path.with_suffix('.checkpoint.part')
+        partial.write_text(json.dumps({'size': self.size, 'records': records}))
+        partial.replace(self.path)
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
+
+
+class Command(BaseCommand):
+    help = (
+        'Import clients and case notes from CSV or NDJSON files. Clients are upserted by client_id '
+        'and notes already imported are skipped, so the command can be re-run; caseworkers are '
+        'matched by employee_id.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clients',
+            help='Client records: client_id, first_name, last_name, caseworker (employee ID)'
+        )
+        parser.add_argument(
+            '--notes',
+            help='Case note records: client_id, content, interaction_type, created_at (ISO 8601; naive '
+                 'times are in TIME_ZONE) and optionally author (employee ID; defaults to the client\'s '
+                 'caseworker)'
+        )
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'ndjson'],
+            help='Input format (default: from the file extension)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Records committed per transaction'
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore checkpoints left by an interrupted import'
+        )
+
+    def handle(self, *args, **options):
+        if not options['clients'] and not options['notes']:
+            raise CommandError('Pass --clients, --notes or both')
+
+        # employee_id -> pk of every caseworker, resolved without a query per row
+        self.caseworkers = dict(
+            User.objects.exclude(employee_id=None).exclude(employee_id='').values_list('employee_id', 'pk')
+        )
+        self.errors = 0
+        batch_size = max(1, options['batch_size'])
+
+        # Imported rows keep the timestamps set on them
+        with override_auto_now(Client, CaseNote):
+            if options['clients']:
+                self._import(options['clients'], self._import_clients, batch_size, options)
+            if options['notes']:
+                self._import(options['notes'], self._import_notes, batch_size, options)
+
+        if self.errors:
+            self.stderr.write(self.style.WARNING(f'⚠️  {self.errors} records were rejected'))
+
+    def _import(self, path, import_batch, batch_size, options):
+        input_format = options['format'] or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+        checkpoint = Checkpoint(path)
+        if options['restart']:
+            checkpoint.clear()
+        done = checkpoint.load()
+        if done:
+            self.stdout.write(f'↪️  Resuming {path} after {done} records')
+
+        totals = {'created': 0, 'updated': 0, 'skipped': 0}
+        batch = []
+        position = 0
+        for position, (line, record) in enumerate(read_records(path, input_format), start=1):
+            if position <= done:
+                continue
+            if isinstance(record, RowError):
+                self._reject(line, record)
+                continue
+            batch.append((line, record))
+            if len(batch) >= batch_size:
+                self._commit(import_batch, batch, totals, checkpoint, position)
+                self.stdout.write(f'  {path}: {position} records')
+                batch = []
+        if batch:
+            self._commit(import_batch, batch, totals, checkpoint, position)
+        checkpoint.clear()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {path}: {totals['created']} created, {totals['updated']} updated, "
+            f"{totals['skipped']} unchanged"
+        ))
+
+    def _commit(self, import_batch, batch, totals, checkpoint, position):
+        # Batches read the rows they upsert, so they hold the write lock from BEGIN
+        with write_transaction():
+            for key, count in import_batch(batch).items():
+                totals[key] += count
+        checkpoint.save(position)
+
+    def _reject(self, line, message):
+        self.errors += 1
+        if self.errors <= MAX_REPORTED_ERRORS:
+            self.stderr.write(f'  line {line}: {message}')
+
+    def _caseworker(self, employee_id):
+        try:
+            return self.caseworkers[(employee_id or '').strip()]
+        except KeyError:
+            raise RowError(f'unknown caseworker employee ID {employee_id!r}')
+
+    def _import_clients(self, batch):
+        """Insert new clients and update changed ones with one upsert"""
+        rows = {}
+        for line, record in batch:
+            try:
+                client_id = (record.get('client_id') or '').strip()
+                if not client_id:
+                    raise RowError('client_id is required')
+                # A later record for the same client wins
+                rows[client_id] = (
+                    (record.get('first_name') or '').strip(),
+                    (record.get('last_name') or '').strip(),
+                    self._caseworker(record.get('caseworker')),
+                )
+            except RowError as exc:
+                self._reject(line, exc)
+
+        existing = {
+            client_id: (pk, (first_name, last_name, caseworker_id))
+            for client_id, pk, first_name, last_name, caseworker_id in Client.objects.filter(
+                client_id__in=rows
+            ).values_list('client_id', 'pk', 'first_name', 'last_name', 'assigned_caseworker_id')
+        }
+
+        now = timezone.now()
+        upserts = []
+        log = []
+        tags = set()
+        for client_id, values in rows.items():
+            pk, current = existing.get(client_id, (None, None))
+            if values == current:
+                continue
+            first_name, last_name, caseworker_id = values
+            client = Client(client_id=client_id, first_name=first_name, last_name=last_name,
+                            assigned_caseworker_id=caseworker_id, created_at=now, updated_at=now)
+            if pk is not None:
+                # The conflicting row keeps its primary key
+                client.pk = pk
+                if current[2] != caseworker_id:
+                    # What the sync signals log for a reassignment saved through the ORM
+                    log += [
+                        ChangeLogEntry(caseworker_id=current[2], entity='client', object_id=pk, action='revoked'),
+                        ChangeLogEntry(caseworker_id=caseworker_id, entity='client', object_id=pk,
+                                       action='granted'),
+                    ]
+                    tags.add(f'caseworker:{current[2]}')
+            # bulk_create skips save(), which fills these in
+            client.refresh_search_fields()
+            upserts.append(client)
+            tags.update((f'client:{client.pk}', f'caseworker:{caseworker_id}'))
+
+        Client.objects.bulk_create(upserts, update_conflicts=True, unique_fields=['client_id'],
+                                   update_fields=CLIENT_UPDATE_FIELDS)
+        ChangeLogEntry.objects.bulk_create(log)
+        # After the batch commits, so a concurrent read cannot cache the old rows again
+        transaction.on_commit(lambda: invalidate_tags(*tags))
+
+        created = sum(1 for client in upserts if client.client_id not in existing)
+        return {'created': created, 'updated': len(upserts) - created, 'skipped': len(rows) - len(upserts)}
+
+    def _import_notes(self, batch):
+        """Insert the notes not imported before, and count them against their clients"""
+        clients = {
+            client_id: (pk, caseworker_id)
+            for client_id, pk, caseworker_id in Client.objects.filter(
+                client_id__in={(record.get('client_id') or '').strip() for _, record in batch}
+            ).values_list('client_id', 'pk', 'assigned_caseworker_id')
+        }
+        valid_types = {choice[0] for choice in CaseNote.INTERACTION_TYPES}
+
+        now = timezone.now()
+        notes = {}
+        accepted = 0
+        for line, record in batch:
+            try:
+                client_id = (record.get('client_id') or '').strip()
+                if client_id not in clients:
+                    raise RowError(f'unknown client {client_id!r}')
+                pk, caseworker_id = clients[client_id]
+
+                content = record.get('content') or ''
+                if not content.strip():
+                    raise RowError('content is required')
+                interaction_type = (record.get('interaction_type') or 'other').strip()
+                if interaction_type not in valid_types:
+                    raise RowError(f'invalid interaction type {interaction_type!r}')
+
+                created_at = None
+                if record.get('created_at'):
+                    created_at = parse_datetime(record['created_at'].strip())
+                    if created_at is None:
+                        raise RowError(f"invalid created_at {record['created_at']!r}")
+                    if timezone.is_naive(created_at):
+                        created_at = timezone.make_aware(created_at)
+
+                author = record.get('author')
+                created_by_id = self._caseworker(author) if author else caseworker_id
+            except RowError as exc:
+                self._reject(line, exc)
+                continue
+
+            accepted += 1
+            import_hash = note_hash(client_id, created_at, interaction_type, author, content)
+            notes[import_hash] = CaseNote(
+                client_id=pk, content=content, interaction_type=interaction_type,
+                created_by_id=created_by_id, created_at=created_at or now,
+                # Sync clients pick imported notes up as changed now
+                updated_at=now, import_hash=import_hash,
+            )
+
+        seen = set(CaseNote.objects.filter(import_hash__in=notes).values_list('import_hash', flat=True))
+        new_notes = [note for import_hash, note in notes.items() if import_hash not in seen]
+        CaseNote.objects.bulk_create(new_notes)
+        # bulk_create sends no signals, so count the notes here
+        record_notes_added(new_notes, caseworker_ids={caseworker_id for _, caseworker_id in clients.values()})
+        return {'created': len(new_notes), 'updated': 0, 'skipped': accepted - len(new_notes)}
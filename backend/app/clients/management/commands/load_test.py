@@ -0,0 +1,212 @@
+"""
+Django management command to load test a running server with many worker processes
+"""
+import json
+import multiprocessing
+import random
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from config.bench import DEFAULT_MIX, parse_mix, summarize
+
+
+def _request(base_url, method, path, timeout, token=None, params=None, payload=None):
+    """Send one request; returns (status, body). Connection failures are status 0."""
+    url = base_url + path
+    if params:
+        url += '?' + urllib.parse.urlencode(params)
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = urllib.request.Request(url, data=data, method=method)
+    request.add_header('Content-Type', 'application/json')
+    if token:
+        request.add_header('Authorization', f'Bearer {token}')
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as exc:
+        return exc.code, exc.read()
+    except (urllib.error.URLError, TimeoutError, ConnectionError) as exc:
+        return 0, str(exc).encode()
+
+
+def _is_locked(status, body):
+    # The API answers SQLite lock timeouts with 503; a server without that
+    # handler (or with DEBUG on) shows the message in the body instead
+    return status == 503 or b'database is locked' in body
+
+
+def _worker(worker_id, options, start, results):
+    """Log in as one caseworker and replay the weighted mix until the deadline."""
+    rng = random.Random(worker_id)
+    base_url, timeout = options['base_url'], options['timeout']
+    username = options['username_pattern'].format(n=worker_id % options['users'] + 1)
+
+    status, body = _request(base_url, 'POST', '/api/auth/login', timeout,
+                            payload={'username': username, 'password': options['password']})
+    if status != 200:
+        results.put({'worker': worker_id, 'error': f'login as {username} failed with {status}'})
+        return
+    tokens = json.loads(body)
+    access, refresh = tokens['access_token'], tokens['refresh_token']
+
+    status, body = _request(base_url, 'GET', '/api/clients/search', timeout, token=access,
+                            params={'page_size': 100, 'include_total': 'false'})
+    clients = json.loads(body)['clients'] if status == 200 else []
+    client_ids = [client['id'] for client in clients]
+    terms = sorted({client['last_name'][:3] for client in clients}) or ['a']
+
+    operations, weights = zip(*options['mix'].items())
+    samples = []
+    start.wait()
+    began_at = time.time()
+    deadline = time.monotonic() + options['duration']
+    while time.monotonic() < deadline:
+        operation = rng.choices(operations, weights)[0]
+        if operation in ('list', 'create') and not client_ids:
+            operation = 'search'
+        began = time.perf_counter()
+        if operation == 'search':
+            status, body = _request(base_url, 'GET', '/api/clients/search', timeout, token=access,
+                                    params={'q': rng.choice(terms), 'include_total': 'false'})
+        elif operation == 'list':
+            status, body = _request(base_url, 'GET', f'/api/case-notes/client/{rng.choice(client_ids)}',
+                                    timeout, token=access, params={'limit': 50})
+        elif operation == 'create':
+            status, body = _request(base_url, 'POST', '/api/case-notes/', timeout, token=access, payload={
+                'client_id': rng.choice(client_ids),
+                'content': f'Load test note from {username}',
+                'interaction_type': rng.choice(['phone', 'email', 'in-person']),
+            })
+        else:
+            status, body = _request(base_url, 'POST', '/api/auth/refresh', timeout,
+                                    payload={'refresh_token': refresh})
+            if status == 200:
+                access = json.loads(body)['access_token']
+        samples.append((operation, status, time.perf_counter() - began, _is_locked(status, body)))
+
+    results.put({'worker': worker_id, 'samples': samples, 'window': (began_at, time.time())})
+
+
+class Command(BaseCommand):
+    help = 'Load test a running server with N worker processes, sweeping concurrency levels'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://localhost:8000', help='Server to load')
+        parser.add_argument('--concurrency', default='1,2,4,8,16',
+                            help='Comma-separated worker process counts to sweep')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per concurrency level')
+        parser.add_argument('--mix', default=DEFAULT_MIX,
+                            help='Weighted operations: search, list, create, refresh')
+        parser.add_argument('--users', type=int, default=16,
+                            help='Seeded caseworkers, one per worker; at least the highest --concurrency')
+        parser.add_argument('--username-pattern', default='caseworker{n}',
+                            help='Username of caseworker n (1-based), as created by random_data')
+        parser.add_argument('--password', default='password123', help='Password of the seeded caseworkers')
+        parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+
+    def handle(self, *args, **options):
+        options['base_url'] = options['base_url'].rstrip('/')
+        options['mix'] = parse_mix(options['mix'])
+        levels = [int(level) for level in options['concurrency'].split(',')]
+        if max(levels) > options['users']:
+            # Workers sharing a caseworker share their caseload, so they would
+            # contend on the same rows and cached responses, unlike real users
+            raise CommandError(
+                f"--concurrency goes up to {max(levels)} workers but --users is {options['users']}; "
+                f"seed at least {max(levels)} caseworkers (random_data --users {max(levels)}) and pass "
+                f"--users {max(levels)}, or lower --concurrency"
+            )
+
+        self.stdout.write(
+            f"{'workers':>7} {'requests':>9} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} "
+            f"{'errors':>7} {'locked':>7} {'locked %':>9}"
+        )
+        report = []
+        for level in levels:
+            result = self._run_level(level, options)
+            report.append(result)
+            self.stdout.write(
+                f"{level:>7} {result['requests']:>9} {result['throughput_rps']:>8.1f} "
+                f"{result['p50_ms']:>7.1f}ms {result['p95_ms']:>7.1f}ms {result['p99_ms']:>7.1f}ms "
+                f"{result['errors']:>7} {result['locked']:>7} {result['locked_rate']:>8.2%}"
+            )
+            for operation, stats in result['operations'].items():
+                self.stdout.write(
+                    f"{'':>7} {operation:>9} {stats['requests']:>8} req  p95 {stats['p95_ms']:.1f}ms"
+                    f"  errors {stats['errors']}"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump({'base_url': options['base_url'], 'mix': options['mix'], 'levels': report},
+                          handle, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def _run_level(self, level, options):
+        # Fork where available so workers start fast; urllib is all they use
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+        start = context.Event()
+        results = context.Queue()
+        workers = [
+            context.Process(target=_worker, args=(i, options, start, results))
+            for i in range(level)
+        ]
+        for worker in workers:
+            worker.start()
+        # Workers log in first; measuring starts once they all could have
+        time.sleep(min(5.0, 0.2 + 0.05 * level))
+        start.set()
+
+        samples = []
+        windows = []
+        for _ in workers:
+            outcome = results.get(timeout=options['duration'] + options['timeout'] + 60)
+            if 'error' in outcome:
+                self.stderr.write(f"worker {outcome['worker']}: {outcome['error']}")
+            samples.extend(outcome.get('samples', []))
+            if 'window' in outcome:
+                windows.append(outcome['window'])
+        for worker in workers:
+            worker.join()
+        # Throughput over the span in which workers were actually sending
+        elapsed = max(end for _, end in windows) - min(begin for begin, _ in windows) if windows else 0.0
+
+        return self._summarize(level, samples, elapsed)
+
+    def _summarize(self, level, samples, elapsed):
+        def is_error(status):
+            return not (200 <= status < 400)
+
+        by_operation = defaultdict(list)
+        for sample in samples:
+            by_operation[sample[0]].append(sample)
+
+        statuses = Counter(status for _, status, _, _ in samples)
+        locked = sum(1 for sample in samples if sample[3])
+        result = {
+            'workers': level,
+            'requests': len(samples),
+            'seconds': round(elapsed, 2),
+            'throughput_rps': round(len(samples) / elapsed, 1) if elapsed else 0.0,
+            **summarize([latency for _, _, latency, _ in samples]),
+            'errors': sum(count for status, count in statuses.items() if is_error(status)),
+            'locked': locked,
+            'locked_rate': locked / len(samples) if samples else 0.0,
+            'statuses': {str(status): count for status, count in sorted(statuses.items())},
+            'operations': {},
+        }
+        for operation, op_samples in sorted(by_operation.items()):
+            result['operations'][operation] = {
+                'requests': len(op_samples),
+                **summarize([latency for _, _, latency, _ in op_samples]),
+                'errors': sum(1 for _, status, _, _ in op_samples if is_error(status)),
+                'locked': sum(1 for sample in op_samples if sample[3]),
+            }
+        return result
@@ -1,16 +1,101 @@
 """
 Django management command to seed the database with sample data
 """
+import multiprocessing
+import os
+import random
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import django
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
 from clients.models import Client
+from case_notes.activity import rebuild_note_counters
 from case_notes.models import CaseNote
+from config.bench import override_auto_now
+from config.cache_tags import invalidate_tags
 from faker import Faker
-import random
 
 User = get_user_model()
 fake = Faker()
 
+DEPARTMENTS = ['Social Services', 'Mental Health', 'Family Support', 'Youth Services']
+
+# Relative frequency of each interaction type in generated notes
+INTERACTION_WEIGHTS = {'phone': 40, 'in-person': 25, 'email': 20, 'video': 10, 'other': 5}
+
+# Caps the power-law weight of a single client, so one outlier cannot take
+# most of the notes in a small dataset
+MAX_CLIENT_WEIGHT = 1000.0
+
+# Notes arrive in bursts around a few dates per client: roughly one burst per
+# NOTES_PER_BURST notes, with notes spread exponentially after its start
+NOTES_PER_BURST = 8
+BURST_SECONDS = 2 * 24 * 3600
+
+
+def client_id_for(i):
+    """Human-readable ID of the i-th (0-based) generated client."""
+    return f'CL-2024-{str(i + 1).zfill(3)}'
+
+
+def bursty_timestamps(rng, start, end, count):
+    """
+    `count` sorted datetimes between start and end, clustered into bursts of
+    activity and mostly falling in office hours, the way case notes do.
+    """
+    span = max((end - start).total_seconds(), 0.0)
+    bursts = [rng.uniform(0, span) for _ in range(1 + count // NOTES_PER_BURST)]
+    timestamps = []
+    for _ in range(count):
+        offset = min(rng.choice(bursts) + rng.expovariate(1 / BURST_SECONDS), span)
+        moment = start + timedelta(seconds=offset)
+        if rng.random() < 0.8:
+            moment = moment.replace(hour=rng.randint(8, 17), minute=rng.randrange(60))
+            moment = min(max(moment, start), end)
+        timestamps.append(moment)
+    timestamps.sort()
+    return timestamps
+
+
+def fake_batch(seed, clients, notes):
+    """Names for `clients` clients and content for `notes` notes; runs in a pool worker."""
+    generator = Faker()
+    generator.seed_instance(seed)
+    names = [(generator.first_name(), generator.last_name()) for _ in range(clients)]
+    contents = [generator.paragraph(nb_sentences=4) for _ in range(notes)]
+    return names, contents
+
+
+def generate_batches(jobs, workers):
+    """
+    Yield fake_batch(*job) for every job, in order. With more than one
+    worker the jobs run in a process pool, a couple per worker ahead of the
+    consumer so memory stays bounded.
+    """
+    if workers <= 1:
+        for job in jobs:
+            yield fake_batch(*job)
+        return
+
+    # Fork where available; spawned workers need Django set up to import this module
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+    initializer = None if context.get_start_method() == 'fork' else django.setup
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=initializer) as pool:
+        pending = deque()
+        for job in jobs:
+            pending.append(pool.submit(fake_batch, *job))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
 
 class Command(BaseCommand):
     help = 'Seed the database with sample data for development'
@@ -34,12 +119,59 @@ class Command(BaseCommand):
             default=50,
             help='Number of case notes to create'
         )
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='Generate a large dataset with batched bulk inserts and skewed distributions'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Bulk mode: clients per batch and rows per insert'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Bulk mode: processes generating fake text (1 to generate inline)'
+        )
+        parser.add_argument(
+            '--distribution',
+            choices=['power-law', 'uniform'],
+            default='power-law',
+            help='Bulk mode: how notes are spread across clients'
+        )
+        parser.add_argument(
+            '--alpha',
+            type=float,
+            default=1.5,
+            help='Bulk mode: Pareto shape of the power-law; lower is more skewed'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='Bulk mode: how far back client and note timestamps go'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=1234,
+            help='Bulk mode: random seed, for reproducible datasets'
+        )
 
     def handle(self, *args, **options):
         self.stdout.write(
             self.style.SUCCESS('🌱 Starting database seeding...')
         )
+        self.create_admin()
+        if options['bulk']:
+            self.seed_bulk(options)
+        else:
+            self.seed_rows(options)
 
+    def create_admin(self):
         # Create superuser if it doesn't exist
         if not User.objects.filter(username='admin').exists():
             admin = User.objects.create_superuser(
@@ -55,8 +187,8 @@ class Command(BaseCommand):
                 self.style.SUCCESS(f'✅ Created superuser: {admin.username}')
             )
 
+    def seed_rows(self, options):
         # Create caseworker users
-        departments = ['Social Services', 'Mental Health', 'Family Support', 'Youth Services']
         caseworkers = []
 
         for i in range(options['users']):
@@ -69,7 +201,7 @@ class Command(BaseCommand):
                     first_name=fake.first_name(),
                     last_name=fake.last_name(),
                     employee_id=f'EMP-{1000 + i}',
-                    department=random.choice(departments),
+                    department=random.choice(DEPARTMENTS),
                     phone_number=fake.phone_number()[:15]
                 )
                 caseworkers.append(user)
@@ -82,7 +214,7 @@ class Command(BaseCommand):
         # Create clients
         clients = []
         for i in range(options['clients']):
-            client_id = f'CL-2024-{str(i+1).zfill(3)}'
+            client_id = client_id_for(i)
             if not Client.objects.filter(client_id=client_id).exists():
                 client = Client.objects.create(
                     client_id=client_id,
@@ -134,4 +266,127 @@ class Command(BaseCommand):
                 f'   Admin: admin / admin123\n'
                 f'   Caseworkers: caseworker1-{options["users"]} / password123'
             )
-        )
\ No newline at end of file
+        )
+
+    def seed_bulk(self, options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        end = timezone.now()
+        start = end - timedelta(days=options['days'])
+        span = (end - start).total_seconds()
+
+        caseworker_ids = self.bulk_caseworkers(options, rng)
+        total_clients = options['clients']
+
+        # Notes per client: a few clients get most of the notes under the power-law
+        if options['distribution'] == 'power-law':
+            weights = [min(rng.paretovariate(options['alpha']), MAX_CLIENT_WEIGHT) for _ in range(total_clients)]
+        else:
+            weights = None
+        note_counts = Counter(rng.choices(range(total_clients), weights, k=options['notes'])) if total_clients else Counter()
+
+        jobs = [
+            (options['seed'] + first, min(batch_size, total_clients - first),
+             sum(note_counts[i] for i in range(first, min(total_clients, first + batch_size))))
+            for first in range(0, total_clients, batch_size)
+        ]
+        types, type_weights = zip(*INTERACTION_WEIGHTS.items())
+        clients_created = notes_created = 0
+        touched_caseworkers = set()
+
+        # Backdated timestamps have to survive the bulk inserts
+        with override_auto_now(Client, CaseNote):
+            batches = generate_batches(jobs, options['workers'])
+            for first, (names, contents) in zip(range(0, total_clients, batch_size), batches):
+                client_ids = [client_id_for(i) for i in range(first, first + len(names))]
+                existing = {
+                    client_id: (pk, caseworker_id, created_at)
+                    for client_id, pk, caseworker_id, created_at in Client.objects.filter(
+                        client_id__in=client_ids
+                    ).values_list('client_id', 'pk', 'assigned_caseworker_id', 'created_at')
+                }
+
+                new_clients = []
+                targets = []
+                for offset, client_id in enumerate(client_ids):
+                    if client_id in existing:
+                        pk, caseworker_id, created_at = existing[client_id]
+                    else:
+                        first_name, last_name = names[offset]
+                        created_at = start + timedelta(seconds=rng.uniform(0, span))
+                        client = Client(
+                            client_id=client_id,
+                            first_name=first_name,
+                            last_name=last_name,
+                            assigned_caseworker_id=rng.choice(caseworker_ids),
+                            created_at=created_at,
+                            updated_at=created_at
+                        )
+                        # bulk_create skips save(), which fills these in
+                        client.refresh_search_fields()
+                        new_clients.append(client)
+                        pk, caseworker_id = client.pk, client.assigned_caseworker_id
+                    targets.append((pk, caseworker_id, created_at, note_counts[first + offset]))
+
+                contents = iter(contents)
+                notes = [
+                    CaseNote(
+                        client_id=pk,
+                        content=next(contents),
+                        interaction_type=rng.choices(types, type_weights)[0],
+                        created_by_id=caseworker_id,
+                        created_at=timestamp,
+                        updated_at=timestamp
+                    )
+                    for pk, caseworker_id, created_at, count in targets
+                    for timestamp in bursty_timestamps(rng, created_at, end, count)
+                ]
+
+                with transaction.atomic():
+                    Client.objects.bulk_create(new_clients, batch_size=batch_size)
+                    CaseNote.objects.bulk_create(notes, batch_size=batch_size)
+                    # bulk_create sends no signals, so count the notes here
+                    rebuild_note_counters(pk for pk, _, _, count in targets if count)
+
+                clients_created += len(new_clients)
+                notes_created += len(notes)
+                touched_caseworkers.update(caseworker_id for _, caseworker_id, _, _ in targets)
+                self.stdout.write(
+                    f'  {first + len(names)}/{total_clients} clients, {notes_created} notes'
+                )
+
+        # Cached caseload searches predate the new rows
+        invalidate_tags(*(f'caseworker:{pk}' for pk in touched_caseworkers))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'\n🎉 Bulk seeding completed!\n'
+                f'   - {len(caseworker_ids)} caseworkers\n'
+                f'   - {clients_created} clients created\n'
+                f'   - {notes_created} case notes created\n\n'
+                f'💡 Caseworkers: caseworker1-{options["users"]} / password123'
+            )
+        )
+
+    def bulk_caseworkers(self, options, rng):
+        """Create the missing caseworkers in one insert and return every caseworker's pk."""
+        usernames = [f'caseworker{i+1}' for i in range(options['users'])]
+        existing = dict(User.objects.filter(username__in=usernames).values_list('username', 'pk'))
+
+        # Hashing is deliberately slow; every seeded caseworker shares one hash
+        password = make_password('password123')
+        User.objects.bulk_create([
+            User(
+                username=username,
+                email=fake.email(),
+                password=password,
+                first_name=fake.first_name(),
+                last_name=fake.last_name(),
+                employee_id=f'EMP-{1000 + i}',
+                department=rng.choice(DEPARTMENTS),
+                phone_number=fake.phone_number()[:15]
+            )
+            for i, username in enumerate(usernames)
+            if username not in existing
+        ], batch_size=options['batch_size'])
+        return list(User.objects.filter(username__in=usernames).values_list('pk', flat=True))
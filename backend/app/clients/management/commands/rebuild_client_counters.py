@@ -0,0 +1,49 @@
+"""
+Django management command to recount every client's note activity counters
+"""
+from django.core.management.base import BaseCommand
+
+from case_notes.activity import rebuild_note_counters
+from clients.models import Client
+from config.sqlite import write_transaction
+
+
+class Command(BaseCommand):
+    help = 'Recompute note_count, last_note_at and per-type note counts from the case notes table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Clients recounted per UPDATE'
+        )
+        parser.add_argument(
+            '--caseworker',
+            help='Only rebuild the clients assigned to this username'
+        )
+
+    def handle(self, *args, **options):
+        clients = Client.objects.order_by('pk')
+        if options['caseworker']:
+            clients = clients.filter(assigned_caseworker__username=options['caseworker'])
+
+        batch_size = max(1, options['batch_size'])
+        rebuilt = 0
+        batch = []
+        for pk in clients.values_list('pk', flat=True).iterator(chunk_size=batch_size):
+            batch.append(pk)
+            if len(batch) >= batch_size:
+                rebuilt += self._rebuild(batch)
+                batch = []
+        if batch:
+            rebuilt += self._rebuild(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Rebuilt note counters for {rebuilt} clients'))
+
+    def _rebuild(self, client_ids):
+        # Short transactions so writers are not held up on a large table; each
+        # takes the write lock at BEGIN, as it reads the counts it writes back
+        with write_transaction():
+            rebuild_note_counters(client_ids)
+        return len(client_ids)
@@ -0,0 +1,62 @@
+"""
+Django management command to copy the primary database to the read replica
+"""
+import os
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = 'Snapshot the primary into REPLICA_DATABASE_PATH with the SQLite online backup API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Refresh every N seconds until interrupted (default: once)')
+        parser.add_argument('--pages', type=int, default=-1,
+                            help='Pages copied per backup step; -1 copies the whole file in one step')
+
+    def handle(self, *args, **options):
+        connection = connections[DEFAULT_DB_ALIAS]
+        if connection.vendor != 'sqlite':
+            raise CommandError('refresh_replica only supports SQLite databases')
+
+        while True:
+            started = time.perf_counter()
+            size = self.refresh(connection, options['pages'])
+            self.stdout.write(
+                f'Replica refreshed in {(time.perf_counter() - started) * 1000:.0f}ms '
+                f'({size / 1024 / 1024:.1f} MB)'
+            )
+            if options['interval'] <= 0:
+                break
+            time.sleep(options['interval'])
+
+    def refresh(self, connection, pages):
+        """Copy the primary to a temporary file, then swap it in; returns the size in bytes."""
+        target = str(settings.REPLICA_DATABASE_PATH)
+        partial = target + '.tmp'
+        os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+        if os.path.exists(partial):
+            os.remove(partial)
+
+        connection.ensure_connection()
+        # Everything committed before this moment is in the copy; the router
+        # compares it with users' last writes, via the file's mtime
+        snapshot_at = time.time()
+        replica = sqlite3.connect(partial)
+        try:
+            # In WAL mode this reads a consistent snapshot without blocking writers
+            connection.connection.backup(replica, pages=pages)
+            # A rollback journal, so the read-only replica never has -wal or
+            # -shm files that could outlive the copy they belong to
+            replica.execute('PRAGMA journal_mode = DELETE')
+        finally:
+            replica.close()
+        os.utime(partial, (snapshot_at, snapshot_at))
+        # Readers that already have the old copy open keep reading it
+        os.replace(partial, target)
+        return os.path.getsize(target)
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+from clients.search import normalize_search_text
+
+
+def populate_search_fields(apps, schema_editor):
+    Client = apps.get_model('clients', 'Client')
+    batch = []
+    for client in Client.objects.only('first_name', 'last_name').iterator(chunk_size=2000):
+        client.first_name_search = normalize_search_text(client.first_name)
+        client.last_name_search = normalize_search_text(client.last_name)
+        batch.append(client)
+        if len(batch) >= 2000:
+            Client.objects.bulk_update(batch, ['first_name_search', 'last_name_search'])
+            batch = []
+    if batch:
+        Client.objects.bulk_update(batch, ['first_name_search', 'last_name_search'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='first_name_search',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='last_name_search',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(populate_search_fields, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['assigned_caseworker', 'first_name_search'], name='client_cw_first_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['assigned_caseworker', 'last_name_search'], name='client_cw_last_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['assigned_caseworker', 'client_id'], name='client_cw_client_id_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0002_client_search_fields'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['assigned_caseworker', 'updated_at'], name='client_cw_updated_idx'),
+        ),
+    ]
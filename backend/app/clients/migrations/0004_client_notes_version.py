@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0003_client_cw_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='notes_changed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='notes_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+POPULATE_COUNTERS_SQL = """
+UPDATE clients_client SET
+    note_count = (SELECT COUNT(*) FROM case_notes_casenote n WHERE n.client_id = clients_client.id),
+    last_note_at = (SELECT MAX(created_at) FROM case_notes_casenote n WHERE n.client_id = clients_client.id),
+    phone_note_count = (SELECT COUNT(*) FROM case_notes_casenote n
+                        WHERE n.client_id = clients_client.id AND n.interaction_type = 'phone'),
+    in_person_note_count = (SELECT COUNT(*) FROM case_notes_casenote n
+                            WHERE n.client_id = clients_client.id AND n.interaction_type = 'in-person'),
+    email_note_count = (SELECT COUNT(*) FROM case_notes_casenote n
+                        WHERE n.client_id = clients_client.id AND n.interaction_type = 'email'),
+    video_note_count = (SELECT COUNT(*) FROM case_notes_casenote n
+                        WHERE n.client_id = clients_client.id AND n.interaction_type = 'video'),
+    other_note_count = (SELECT COUNT(*) FROM case_notes_casenote n
+                        WHERE n.client_id = clients_client.id AND n.interaction_type = 'other')
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0004_client_notes_version'),
+        ('case_notes', '0004_casenote_updated_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='email_note_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='in_person_note_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='last_note_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='note_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='other_note_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='phone_note_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='video_note_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(POPULATE_COUNTERS_SQL, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['assigned_caseworker', 'notes_changed_at'], name='client_cw_notes_changed_idx'),
+        ),
+    ]
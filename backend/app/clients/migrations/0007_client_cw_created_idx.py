@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0006_admin_changelist_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['assigned_caseworker', 'created_at'], name='client_cw_created_idx'),
+        ),
+    ]
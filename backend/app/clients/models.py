@@ -2,6 +2,8 @@ import uuid
 from django.db import models
 from django.conf import settings
 
+from .search import normalize_search_text
+
 
 class Client(models.Model):
     """Model for storing client information."""
@@ -18,14 +20,95 @@ class Client(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Casefolded, accent-stripped copies of the names, maintained on save
+    first_name_search = models.CharField(max_length=100, blank=True, default='', editable=False)
+    last_name_search = models.CharField(max_length=100, blank=True, default='', editable=False)
+
+    # Bumped whenever one of the client's notes is written or deleted, so the
+    # note list can be revalidated without reading the notes
+    notes_version = models.PositiveIntegerField(default=0, editable=False)
+    notes_changed_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    # Denormalized note activity, see case_notes.activity
+    note_count = models.PositiveIntegerField(default=0, editable=False)
+    last_note_at = models.DateTimeField(null=True, blank=True, editable=False)
+    phone_note_count = models.PositiveIntegerField(default=0, editable=False)
+    in_person_note_count = models.PositiveIntegerField(default=0, editable=False)
+    email_note_count = models.PositiveIntegerField(default=0, editable=False)
+    video_note_count = models.PositiveIntegerField(default=0, editable=False)
+    other_note_count = models.PositiveIntegerField(default=0, editable=False)
+
+    # Maintained with UPDATE ... SET x = x + 1; a full save of a stale
+    # instance must not write them back
+    NOTE_ACTIVITY_FIELDS = (
+        'notes_version', 'notes_changed_at', 'note_count', 'last_note_at',
+        'phone_note_count', 'in_person_note_count', 'email_note_count',
+        'video_note_count', 'other_note_count',
+    )
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = "Client"
         verbose_name_plural = "Clients"
+        indexes = [
+            models.Index(fields=['assigned_caseworker', 'first_name_search'], name='client_cw_first_search_idx'),
+            models.Index(fields=['assigned_caseworker', 'last_name_search'], name='client_cw_last_search_idx'),
+            models.Index(fields=['assigned_caseworker', 'client_id'], name='client_cw_client_id_idx'),
+            models.Index(fields=['assigned_caseworker', 'updated_at'], name='client_cw_updated_idx'),
+            # Caseload listing, newest first (client search without a query)
+            models.Index(fields=['assigned_caseworker', 'created_at'], name='client_cw_created_idx'),
+            models.Index(fields=['assigned_caseworker', 'notes_changed_at'], name='client_cw_notes_changed_idx'),
+            # Admin changelist: default ordering and search across caseloads
+            models.Index(fields=['created_at'], name='client_created_idx'),
+            models.Index(fields=['first_name_search'], name='client_first_search_idx'),
+            models.Index(fields=['last_name_search'], name='client_last_search_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember who the client was assigned to when loaded, so saves can
+        # tell a reassignment apart from an ordinary edit
+        instance._loaded_caseworker_id = instance.__dict__.get('assigned_caseworker_id')
+        return instance
+
+    @property
+    def loaded_caseworker_id(self):
+        """Caseworker the client was assigned to when read from the database."""
+        return getattr(self, '_loaded_caseworker_id', None)
+
+    def save(self, *args, **kwargs):
+        self.refresh_search_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'first_name', 'last_name'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'first_name_search', 'last_name_search'}
+        elif update_fields is None and not self._state.adding and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.NOTE_ACTIVITY_FIELDS
+            ]
+        super().save(*args, **kwargs)
+        self._loaded_caseworker_id = self.assigned_caseworker_id
+
+    def refresh_search_fields(self):
+        """Recompute the normalized search columns; call before bulk_create."""
+        self.first_name_search = normalize_search_text(self.first_name)
+        self.last_name_search = normalize_search_text(self.last_name)
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.client_id})"
 
+    @property
+    def note_counts(self):
+        """Number of notes per interaction type."""
+        return {
+            'phone': self.phone_note_count,
+            'in-person': self.in_person_note_count,
+            'email': self.email_note_count,
+            'video': self.video_note_count,
+            'other': self.other_note_count,
+        }
+
     @property
     def full_name(self):
         """Return the client's full name."""
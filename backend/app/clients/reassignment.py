@@ -0,0 +1,66 @@
+"""
+Moving clients between caseworkers in bulk
+
+Saving a reassigned client through the ORM costs a save and its signals per
+row. reassign_clients() moves any number of clients with one UPDATE and
+does the signals' bookkeeping for all of them in the same transaction: a
+revoked and a granted sync change log entry per client, each set written
+with one INSERT ... SELECT over the moving clients, and, once the
+transaction commits, invalidation of the cached responses
+built on the clients and on their old and new caseworkers' caseloads. Note
+counters belong to the client and are unaffected.
+"""
+from django.db import connections, models, transaction
+from django.db.models import Value
+from django.utils import timezone
+
+from config.cache_tags import invalidate_tags
+from config.sqlite import write_transaction
+from sync.models import ChangeLogEntry
+
+
+def _log_changes(moving, caseworker_id, action, now):
+    """
+    Insert a change log entry for every client in `moving` with one
+    INSERT ... SELECT; caseworker_id None logs against the current caseworker
+    """
+    caseworker = 'assigned_caseworker_id' if caseworker_id is None else Value(caseworker_id)
+    rows = moving.order_by().values_list(
+        caseworker, Value('client'), 'pk', Value(action), Value(now, output_field=models.DateTimeField())
+    )
+    select, params = rows.query.sql_with_params()
+    connection = connections[moving.db]
+    table = connection.ops.quote_name(ChangeLogEntry._meta.db_table)
+    columns = ', '.join(connection.ops.quote_name(column)
+                        for column in ('caseworker_id', 'entity', 'object_id', 'action', 'created_at'))
+    with connection.cursor() as cursor:
+        cursor.execute(f'INSERT INTO {table} ({columns}) {select}', params)
+
+
+def reassign_clients(clients, caseworker):
+    """
+    Assign every client in the `clients` queryset to `caseworker`; returns
+    the number of clients moved. Clients already assigned to them are left
+    untouched.
+    """
+    with write_transaction():
+        # The database's write lock is taken at BEGIN, so the clients read
+        # here are exactly the ones the UPDATE moves
+        moving = clients.exclude(assigned_caseworker=caseworker)
+        moved = list(moving.order_by().values_list('pk', 'assigned_caseworker_id'))
+        if not moved:
+            return 0
+
+        # What the sync signals log for one reassigned client
+        now = timezone.now()
+        _log_changes(moving, None, 'revoked', now)
+        _log_changes(moving, caseworker.pk, 'granted', now)
+        # updated_at brings the clients to the new caseworker's next sync
+        moving.update(assigned_caseworker=caseworker, updated_at=now)
+
+        # After the commit, so a concurrent read cannot cache the old rows again
+        tags = {f'caseworker:{caseworker.pk}'}
+        for pk, previous in moved:
+            tags.update((f'client:{pk}', f'caseworker:{previous}'))
+        transaction.on_commit(lambda: invalidate_tags(*tags))
+    return len(moved)
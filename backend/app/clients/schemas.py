@@ -2,7 +2,7 @@
 Client API Schemas
 """
 from ninja import Schema
-from typing import List
+from typing import Dict, List, Optional
 
 
 class ClientSearchResponse(Schema):
@@ -10,15 +10,29 @@ class ClientSearchResponse(Schema):
     first_name: str
     last_name: str
     client_id: str
+    note_count: int = 0
+    last_note_at: Optional[str] = None
+    note_counts: Dict[str, int] = {}
 
 
 class ClientSearchPaginatedResponse(Schema):
     clients: List[ClientSearchResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class ErrorResponse(Schema):
-    error: str
\ No newline at end of file
+    error: str
+
+class ClientReassignRequest(Schema):
+    from_caseworker: int
+    to_caseworker: int
+    # Only these of the from_caseworker's clients (UUIDs); all of them when omitted
+    client_ids: Optional[List[str]] = None
+
+
+class ClientReassignResponse(Schema):
+    reassigned: int
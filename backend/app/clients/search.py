@@ -0,0 +1,99 @@
+"""
+Indexed client search helpers
+"""
+import re
+import unicodedata
+
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+# Human-readable client IDs, e.g. CL-2024-001
+CLIENT_ID_RE = re.compile(r'^CL-\d{4}-\d{3,}$', re.IGNORECASE)
+
+# Sorts after every valid character, so [token, token + _PREFIX_END) covers
+# exactly the strings that start with `token`.
+_PREFIX_END = '\U0010ffff'
+
+
+def normalize_search_text(value: str) -> str:
+    """Casefold and strip accents so that 'José' and 'jose' index the same."""
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(stripped.casefold().split())
+
+
+def _prefix(field: str, token: str) -> Q:
+    # A range rather than startswith: on SQLite, LIKE cannot use a
+    # binary-collated index, but a range comparison can.
+    return Q(**{f'{field}__gte': token, f'{field}__lt': token + _PREFIX_END})
+
+
+def _matches_token(token: str, **scope) -> Q:
+    return (
+        Q(_prefix('first_name_search', token), **scope) |
+        Q(_prefix('last_name_search', token), **scope) |
+        Q(_prefix('client_id', token.upper()), **scope)
+    )
+
+
+def search_queryset(caseworker, q: str):
+    """
+    Clients assigned to `caseworker` that match the search text `q`.
+
+    A full client ID is looked up exactly via its unique index. Otherwise
+    every word in `q` must prefix-match the client's normalized first or last
+    name, or the client ID.
+    """
+    from .models import Client
+
+    q = (q or '').strip()
+    if CLIENT_ID_RE.match(q):
+        return Client.objects.filter(assigned_caseworker=caseworker, client_id=q.upper())
+
+    # Text that normalizes to nothing, e.g. a lone accent, is an empty query
+    tokens = normalize_search_text(q).split()
+    if not tokens:
+        return Client.objects.filter(assigned_caseworker=caseworker)
+
+    # The caseworker is repeated inside each branch of the first word's OR so
+    # SQLite serves it as a union of (caseworker, name) index range scans
+    # instead of walking the caseworker's whole client list.
+    queryset = Client.objects.filter(_matches_token(tokens[0], assigned_caseworker=caseworker))
+    for token in tokens[1:]:
+        queryset = queryset.filter(_matches_token(token))
+    return queryset
+
+
+def filter_matching(queryset, q: str):
+    """
+    Restrict a Client queryset to matches for `q` without scoping it to a
+    caseworker, e.g. for the admin. Same matching rules as search_queryset.
+    """
+    q = (q or '').strip()
+    if not q:
+        return queryset
+    if CLIENT_ID_RE.match(q):
+        return queryset.filter(client_id=q.upper())
+    for token in normalize_search_text(q).split():
+        queryset = queryset.filter(_matches_token(token))
+    return queryset
+
+
+def caseworkers_matching(q: str):
+    """
+    Users whose username, first name or last name starts with each word of
+    `q`, ignoring case, through the Lower() indexes on those columns.
+    """
+    from django.contrib.auth import get_user_model
+
+    users = get_user_model().objects.alias(
+        username_lower=Lower('username'), first_name_lower=Lower('first_name'), last_name_lower=Lower('last_name')
+    )
+    tokens = (q or '').lower().split()
+    if not tokens:
+        return users.none()
+    for token in tokens:
+        users = users.filter(
+            _prefix('username_lower', token) | _prefix('first_name_lower', token) | _prefix('last_name_lower', token)
+        )
+    return users
@@ -0,0 +1,16 @@
+"""
+Client signal handlers
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from config.cache_tags import invalidate_tags
+from .models import Client
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+def invalidate_caseload_caches(sender, instance, **kwargs):
+    """Drop cached responses for the client and its old and new caseworker"""
+    caseworker_ids = {instance.assigned_caseworker_id, instance.loaded_caseworker_id}
+    invalidate_tags(f'client:{instance.pk}', *(f'caseworker:{pk}' for pk in caseworker_ids if pk is not None))
@@ -4,6 +4,7 @@ Test cases for the clients app
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from .models import Client
+from .search import normalize_search_text, search_queryset
 import uuid
 
 User = get_user_model()
@@ -77,4 +78,381 @@ class ClientModelTest(TestCase):
         
         clients = list(Client.objects.all())
         self.assertEqual(clients[0], client2)  # Newest first
-        self.assertEqual(clients[1], client1)
\ No newline at end of file
+        self.assertEqual(clients[1], client1)
+
+
+class ClientSearchTest(TestCase):
+    """Test cases for the indexed client search"""
+
+    def setUp(self):
+        self.caseworker = User.objects.create_user(
+            username='caseworker1',
+            password='testpass123'
+        )
+        self.other_caseworker = User.objects.create_user(
+            username='caseworker2',
+            password='testpass123'
+        )
+        self.jose = Client.objects.create(
+            client_id='CL-2024-001',
+            first_name='José',
+            last_name='Álvarez',
+            assigned_caseworker=self.caseworker
+        )
+        self.mary = Client.objects.create(
+            client_id='CL-2024-002',
+            first_name='Mary',
+            last_name='Jones',
+            assigned_caseworker=self.caseworker
+        )
+        Client.objects.create(
+            client_id='CL-2024-003',
+            first_name='Josephine',
+            last_name='Baker',
+            assigned_caseworker=self.other_caseworker
+        )
+
+    def test_normalize_search_text(self):
+        """Search text is casefolded and stripped of accents"""
+        self.assertEqual(normalize_search_text('  José  ÁLVAREZ '), 'jose alvarez')
+        self.assertEqual(normalize_search_text('Straße'), 'strasse')
+
+    def test_search_fields_maintained_on_save(self):
+        """Normalized columns follow name changes"""
+        self.assertEqual(self.jose.first_name_search, 'jose')
+        self.mary.last_name = 'Ñúñez'
+        self.mary.save(update_fields=['last_name'])
+        self.mary.refresh_from_db()
+        self.assertEqual(self.mary.last_name_search, 'nunez')
+
+    def test_prefix_search_ignores_case_and_accents(self):
+        """Name prefixes match regardless of case and accents, within the caseload"""
+        self.assertEqual(list(search_queryset(self.caseworker, 'jos')), [self.jose])
+        self.assertEqual(list(search_queryset(self.caseworker, 'ALV')), [self.jose])
+        self.assertEqual(list(search_queryset(self.caseworker, 'jose alv')), [self.jose])
+        self.assertEqual(list(search_queryset(self.caseworker, 'jose jones')), [])
+
+    def test_client_id_search(self):
+        """Full client IDs match exactly, partial ones by prefix"""
+        self.assertEqual(list(search_queryset(self.caseworker, 'cl-2024-002')), [self.mary])
+        self.assertEqual(list(search_queryset(self.caseworker, 'CL-2024-003')), [])
+        self.assertEqual(set(search_queryset(self.caseworker, 'cl-2024')), {self.jose, self.mary})
+
+    def test_query_without_words_lists_caseload(self):
+        """Text that normalizes to no words, e.g. a lone accent, searches like an empty query"""
+        self.assertEqual(set(search_queryset(self.caseworker, '\u0301 ')), {self.jose, self.mary})
+
+        from rest_framework_simplejwt.tokens import RefreshToken
+        token = RefreshToken.for_user(self.caseworker).access_token
+        response = self.client.get('/api/clients/search', {'q': '\u0301'}, HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['clients']), 2)
+
+
+class BulkRandomDataTest(TestCase):
+    """Test the bulk mode of the random_data command"""
+
+    def seed(self, **options):
+        from io import StringIO
+        from django.core.management import call_command
+
+        call_command('random_data', bulk=True, workers=1, batch_size=7, stdout=StringIO(), **options)
+
+    def test_creates_consistent_dataset(self):
+        """Rows, search columns, counters and backdated timestamps are all filled in"""
+        from django.utils import timezone
+        from case_notes.models import CaseNote
+
+        self.seed(users=3, clients=20, notes=150, days=30)
+
+        self.assertEqual(User.objects.filter(username__startswith='caseworker').count(), 3)
+        self.assertTrue(User.objects.get(username='caseworker2').check_password('password123'))
+        self.assertEqual(Client.objects.count(), 20)
+        self.assertEqual(CaseNote.objects.count(), 150)
+
+        oldest = timezone.now() - timezone.timedelta(days=30, minutes=1)
+        for client in Client.objects.all():
+            self.assertEqual(client.last_name_search, normalize_search_text(client.last_name))
+            self.assertGreaterEqual(client.created_at, oldest)
+            notes = CaseNote.objects.filter(client=client)
+            self.assertEqual(client.note_count, notes.count())
+            self.assertEqual(sum(client.note_counts.values()), client.note_count)
+            if client.note_count:
+                self.assertEqual(client.last_note_at, notes.order_by('-created_at').first().created_at)
+                self.assertGreaterEqual(notes.order_by('created_at').first().created_at, client.created_at)
+                self.assertFalse(notes.exclude(created_by=client.assigned_caseworker).exists())
+
+    def test_power_law_skews_notes(self):
+        """A few clients hold a large share of the notes"""
+        self.seed(users=2, clients=50, notes=1000, alpha=1.1)
+        counts = sorted(Client.objects.values_list('note_count', flat=True), reverse=True)
+        self.assertGreater(sum(counts[:5]), sum(counts) * 0.3)
+
+    def test_rerun_skips_existing_rows(self):
+        """Existing caseworkers and clients are reused; their notes are added to"""
+        self.seed(users=2, clients=10, notes=30)
+        self.seed(users=3, clients=12, notes=30)
+        self.assertEqual(User.objects.filter(username__startswith='caseworker').count(), 3)
+        self.assertEqual(Client.objects.count(), 12)
+        self.assertEqual(sum(Client.objects.values_list('note_count', flat=True)), 60)
+
+
+class ImportCaseloadTest(TestCase):
+    """Test the import_caseload command"""
+
+    def setUp(self):
+        import shutil
+        import tempfile
+        from pathlib import Path
+
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.sarah = User.objects.create_user(username='sarah', employee_id='EMP-1')
+        self.john = User.objects.create_user(username='john', employee_id='EMP-2')
+
+    def write(self, name, text):
+        path = self.directory / name
+        path.write_text(text)
+        return str(path)
+
+    def run_import(self, **options):
+        from io import StringIO
+        from django.core.management import call_command
+
+        stderr = StringIO()
+        call_command('import_caseload', stdout=StringIO(), stderr=stderr, **options)
+        return stderr.getvalue()
+
+    def test_imports_clients_and_notes(self):
+        """Rows, search columns, counters and historic timestamps are all filled in"""
+        from case_notes.models import CaseNote
+
+        clients = self.write('clients.csv', 'client_id,first_name,last_name,caseworker\n'
+                                            'CL-1,Zoë,Walker,EMP-1\nCL-2,Bob,Smith,EMP-2\nCL-3,Eve,Nobody,EMP-9\n')
+        notes = self.write('notes.ndjson', '\n'.join([
+            '{"client_id": "CL-1", "content": "Intake", "interaction_type": "phone", '
+            '"created_at": "2020-01-02T10:00:00Z"}',
+            '{"client_id": "CL-1", "content": "Visit", "interaction_type": "in-person", '
+            '"created_at": "2020-02-03T10:00:00Z", "author": "EMP-2"}',
+            '{"client_id": "CL-3", "content": "Lost", "interaction_type": "phone"}',
+        ]))
+        errors = self.run_import(clients=clients, notes=notes, batch_size=1)
+
+        self.assertIn('EMP-9', errors)
+        self.assertIn("'CL-3'", errors)
+        zoe = Client.objects.get(client_id='CL-1')
+        self.assertEqual((zoe.assigned_caseworker, zoe.first_name_search), (self.sarah, 'zoe'))
+        self.assertEqual(Client.objects.count(), 2)
+        self.assertEqual((zoe.note_count, zoe.phone_note_count), (2, 1))
+        self.assertEqual(zoe.last_note_at.isoformat(), '2020-02-03T10:00:00+00:00')
+        visit = CaseNote.objects.get(content='Visit')
+        self.assertEqual(visit.created_by, self.john)
+        self.assertGreater(visit.updated_at, visit.created_at)
+        self.assertEqual(list(self.directory.glob('*.checkpoint')), [])
+
+    def test_rerun_is_idempotent_and_upserts(self):
+        """Re-imported notes are skipped; changed clients are updated, and reassignments logged"""
+        from case_notes.models import CaseNote
+        from sync.models import ChangeLogEntry
+
+        notes = self.write('notes.csv', 'client_id,content,interaction_type,created_at\n'
+                                        'CL-1,"Intake, with comma",email,2020-01-02T10:00:00\n')
+        self.run_import(clients=self.write('a.csv', 'client_id,first_name,last_name,caseworker\n'
+                                                    'CL-1,Ann,Lee,EMP-1\n'), notes=notes)
+        client = Client.objects.get()
+        self.run_import(clients=self.write('b.csv', 'client_id,first_name,last_name,caseworker\n'
+                                                    'CL-1,Anne,Lee,EMP-2\n'), notes=notes)
+
+        client.refresh_from_db()
+        self.assertEqual((client.first_name, client.first_name_search, client.assigned_caseworker),
+                         ('Anne', 'anne', self.john))
+        self.assertEqual(Client.objects.count(), 1)
+        self.assertEqual((CaseNote.objects.count(), client.note_count), (1, 1))
+        self.assertEqual(
+            list(ChangeLogEntry.objects.values_list('caseworker', 'action')),
+            [(self.sarah.pk, 'revoked'), (self.john.pk, 'granted')]
+        )
+
+    def test_bad_ndjson_lines_are_rejected(self):
+        """A line that is not a JSON object is reported by line number; the rest of the file still loads"""
+        from case_notes.models import CaseNote
+
+        Client.objects.create(client_id='CL-1', first_name='Ann', last_name='Lee', assigned_caseworker=self.sarah)
+        notes = self.write('notes.ndjson', '\n'.join([
+            '{"client_id": "CL-1", "content": "Before"}',
+            '',
+            '{"client_id": "CL-1", "content": truncated',
+            '["client_id", "CL-1"]',
+            '{"client_id": "CL-1", "content": "After"}',
+        ]))
+        errors = self.run_import(notes=notes, batch_size=2)
+
+        self.assertIn('line 3: invalid JSON', errors)
+        self.assertIn('line 4: expected a JSON object, got list', errors)
+        self.assertIn('2 records were rejected', errors)
+        self.assertEqual(sorted(CaseNote.objects.values_list('content', flat=True)), ['After', 'Before'])
+
+    def test_ndjson_values_other_than_strings(self):
+        """Numbers are read as strings; objects, lists and booleans reject only their record"""
+        clients = self.write('clients.ndjson', '\n'.join([
+            '{"client_id": 123, "first_name": "Ann", "last_name": "Lee", "caseworker": "EMP-1"}',
+            '{"client_id": "CL-2", "first_name": {"given": "Bob"}, "last_name": "Ray", "caseworker": "EMP-1"}',
+            '{"client_id": "CL-3", "first_name": "Cy", "last_name": null, "caseworker": true}',
+            '{"client_id": "CL-4", "first_name": "Di", "last_name": "Fox", "caseworker": "EMP-2"}',
+        ]))
+        errors = self.run_import(clients=clients)
+
+        self.assertIn('line 2: first_name must be a string, got dict', errors)
+        self.assertIn('line 3: caseworker must be a string, got bool', errors)
+        self.assertEqual(sorted(Client.objects.values_list('client_id', flat=True)), ['123', 'CL-4'])
+
+    def test_caches_invalidated_after_commit(self):
+        """Client caches are dropped once the batch commits, not while its rows are still uncommitted"""
+        from unittest import mock
+
+        clients = self.write('clients.csv', 'client_id,first_name,last_name,caseworker\nCL-1,Ann,Lee,EMP-1\n')
+        target = 'clients.management.commands.import_caseload.invalidate_tags'
+        with mock.patch(target) as invalidate_tags:
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.run_import(clients=clients)
+            invalidate_tags.assert_not_called()
+            for callback in callbacks:
+                callback()
+        client = Client.objects.get()
+        invalidate_tags.assert_called_once()
+        self.assertIn(f'client:{client.pk}', invalidate_tags.call_args.args)
+        self.assertIn(f'caseworker:{self.sarah.pk}', invalidate_tags.call_args.args)
+
+    def test_resumes_from_checkpoint(self):
+        """Records committed before an interruption are not read again"""
+        import json
+        from unittest import mock
+        from django.core.management.base import CommandError
+        from case_notes.models import CaseNote
+
+        Client.objects.create(client_id='CL-1', first_name='Ann', last_name='Lee', assigned_caseworker=self.sarah)
+        notes = self.write('notes.ndjson', ''.join(
+            json.dumps({'client_id': 'CL-1', 'content': f'Note {i}'}) + '\n' for i in range(5)
+        ))
+        real = CaseNote.objects.bulk_create
+        calls = []
+
+        def fail_third_batch(objs, *args, **kwargs):
+            calls.append(len(objs))
+            if len(calls) == 3:
+                raise RuntimeError('interrupted')
+            return real(objs, *args, **kwargs)
+
+        with mock.patch.object(CaseNote.objects, 'bulk_create', fail_third_batch):
+            with self.assertRaises(RuntimeError):
+                self.run_import(notes=notes, batch_size=2)
+        self.assertEqual(CaseNote.objects.count(), 4)
+        self.assertTrue((self.directory / 'notes.ndjson.checkpoint').exists())
+
+        with mock.patch.object(CaseNote.objects, 'bulk_create', fail_third_batch):
+            self.run_import(notes=notes, batch_size=2)
+        self.assertEqual(calls, [2, 2, 1, 1])
+        self.assertEqual(Client.objects.get().note_count, 5)
+
+        with open(notes, 'a') as handle:
+            handle.write('{"client_id": "CL-1", "content": "Late"}\n')
+        (self.directory / 'notes.ndjson.checkpoint').write_text('{"size": 1, "records": 2}')
+        with self.assertRaises(CommandError):
+            self.run_import(notes=notes)
+
+
+class BulkReassignmentTest(TestCase):
+    """Test clients.reassignment and the routes built on it"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        cache.clear()
+        self.leaving = User.objects.create_user(username='leaving', password='testpass123')
+        self.taking_over = User.objects.create_user(username='taking_over', password='testpass123')
+        self.supervisor = User.objects.create_superuser(username='supervisor', password='testpass123')
+        self.clients = [
+            Client.objects.create(client_id=f'CL-2024-{i:03d}', first_name='Client', last_name=str(i),
+                                  assigned_caseworker=self.leaving)
+            for i in range(6)
+        ]
+        self.tokens = {user: f'Bearer {RefreshToken.for_user(user).access_token}'
+                       for user in (self.leaving, self.taking_over, self.supervisor)}
+
+    def reassign(self, user, **payload):
+        payload.setdefault('from_caseworker', self.leaving.pk)
+        payload.setdefault('to_caseworker', self.taking_over.pk)
+        return self.client.post('/api/clients/reassign', payload, content_type='application/json',
+                                HTTP_AUTHORIZATION=self.tokens[user])
+
+    def search(self, user):
+        response = self.client.get('/api/clients/search', HTTP_AUTHORIZATION=self.tokens[user])
+        return [client['client_id'] for client in response.json()['clients']]
+
+    def test_query_count_is_independent_of_client_count(self):
+        """Read the moving clients, two change log inserts, one UPDATE, in a savepoint"""
+        from .reassignment import reassign_clients
+
+        with self.assertNumQueries(6):
+            moved = reassign_clients(Client.objects.filter(client_id__lte='CL-2024-001'), self.taking_over)
+        self.assertEqual(moved, 2)
+        with self.assertNumQueries(6):
+            moved = reassign_clients(Client.objects.all(), self.taking_over)
+        self.assertEqual(moved, 4)
+        self.assertEqual(reassign_clients(Client.objects.all(), self.taking_over), 0)
+
+    def test_caches_and_sync_follow_the_move(self):
+        """Cached searches are dropped and both caseworkers' sync sees the move"""
+        from sync.models import ChangeLogEntry
+
+        leaving_sync = self.client.get('/api/sync', HTTP_AUTHORIZATION=self.tokens[self.leaving]).json()
+        taking_over_sync = self.client.get('/api/sync', HTTP_AUTHORIZATION=self.tokens[self.taking_over]).json()
+        self.assertEqual(len(self.search(self.leaving)), 6)
+        self.assertEqual(self.search(self.taking_over), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.reassign(self.supervisor, client_ids=[str(self.clients[0].id), str(self.clients[1].id)])
+        self.assertEqual(response.json(), {'reassigned': 2})
+
+        self.assertEqual(len(self.search(self.leaving)), 4)
+        self.assertEqual(sorted(self.search(self.taking_over)), ['CL-2024-000', 'CL-2024-001'])
+        moved = [self.clients[0].id, self.clients[1].id]
+        self.assertEqual(
+            set(ChangeLogEntry.objects.values_list('caseworker', 'entity', 'object_id', 'action')),
+            {(caseworker.pk, 'client', pk, action) for pk in moved
+             for caseworker, action in ((self.leaving, 'revoked'), (self.taking_over, 'granted'))}
+        )
+        data = self.client.get('/api/sync', {'since': leaving_sync['watermark']},
+                               HTTP_AUTHORIZATION=self.tokens[self.leaving]).json()
+        self.assertEqual(len(data['deleted']), 2)
+        data = self.client.get('/api/sync', {'since': taking_over_sync['watermark']},
+                               HTTP_AUTHORIZATION=self.tokens[self.taking_over]).json()
+        self.assertEqual(len(data['clients']), 2)
+
+    def test_api_checks(self):
+        self.assertEqual(self.reassign(self.leaving).status_code, 403)
+        self.assertEqual(self.reassign(self.supervisor, to_caseworker=999).status_code, 404)
+        self.assertEqual(self.reassign(self.supervisor, to_caseworker=self.leaving.pk).status_code, 400)
+        self.assertEqual(self.reassign(self.supervisor, client_ids=['nope']).status_code, 400)
+        self.assertFalse(Client.objects.filter(assigned_caseworker=self.taking_over).exists())
+
+    def test_admin_action(self):
+        self.client.force_login(self.supervisor)
+        response = self.client.post('/admin/clients/client/', {
+            'action': 'reassign_to_caseworker',
+            'caseworker': 'taking_over',
+            'select_across': '1',
+            'index': '0',
+            '_selected_action': [str(self.clients[0].pk)],
+        }, follow=True)
+        self.assertContains(response, 'Reassigned 6 clients to taking_over')
+        self.assertEqual(Client.objects.filter(assigned_caseworker=self.taking_over).count(), 6)
+
+        response = self.client.post('/admin/clients/client/', {
+            'action': 'reassign_to_caseworker',
+            'caseworker': 'nobody',
+            'index': '0',
+            '_selected_action': [str(self.clients[0].pk)],
+        }, follow=True)
+        self.assertContains(response, 'No active caseworker with username')
@@ -1,63 +1,225 @@
 """
 Client API Views
 """
-from django.db.models import Q
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.db.models import Count, OuterRef, Subquery
+
+from config.cache_tags import versioned_key
+from config.conditional import not_modified, response_etag
+from config.pagination import InvalidCursor, newest_first_cursor, older_than_cursor
 from .models import Client
-from .schemas import ClientSearchResponse
+from .reassignment import reassign_clients
+from .search import search_queryset
+
+User = get_user_model()
+
+MAX_PAGE_SIZE = 100
+
+
+def _count_key(user, q):
+    return versioned_key('clients:count', [f'caseworker:{user.id}'], user.id, q)
+
+
+def _cached_count(user, q, queryset):
+    """
+    Total number of matches, cached briefly per caseworker and query.
+    Any change to the caseworker's clients invalidates it immediately.
+    """
+    key = _count_key(user, q)
+    total = cache.get(key)
+    if total is None:
+        total = queryset.count()
+        cache.set(key, total, settings.CLIENT_SEARCH_COUNT_TTL)
+    return total
+
+
+async def _acached_count(user, q, queryset):
+    """Async _cached_count."""
+    key = _count_key(user, q)
+    total = await cache.aget(key)
+    if total is None:
+        total = await queryset.acount()
+        await cache.aset(key, total, settings.CLIENT_SEARCH_COUNT_TTL)
+    return total
+
+
+def _caseload_validators(user):
+    """
+    Latest client edit, latest note activity and client count for a caseload,
+    read in one query; each part is answered from its own index. Returns the
+    one-row queryset, to be read with get() or aget().
+    """
+    clients = Client.objects.filter(assigned_caseworker=OuterRef('pk')).order_by()
+    return User.objects.filter(pk=user.pk).values_list(
+        Subquery(clients.order_by('-updated_at').values('updated_at')[:1]),
+        Subquery(clients.exclude(notes_changed_at=None)
+                 .order_by('-notes_changed_at').values('notes_changed_at')[:1]),
+        Subquery(clients.values('assigned_caseworker').annotate(n=Count('*')).values('n')),
+    )
+
+
+def _unchanged_caseload(request, response, user, validators):
+    """A 304 when the client's copy of this caseload search is current, else None."""
+    etag = response_etag(request, user.pk, *validators)
+    last_modified = max((ts for ts in validators[:2] if ts is not None), default=None)
+    return not_modified(request, response, etag, last_modified)
+
+
+def _search_page(user, q, page, page_size, after):
+    """
+    The matches for `q` and the (lazy) slice holding the requested page plus
+    one extra row. Raises InvalidCursor for a malformed `after`.
+    """
+    # Search by name or client_id, but only for assigned clients
+    matches = search_queryset(user, q)
+
+    # Newest first, with the primary key as a tiebreaker so the keyset is unique
+    ordered = matches.order_by('-created_at', '-id')
+    if after:
+        return matches, ordered.filter(older_than_cursor(after))[:page_size + 1]
+    offset = (page - 1) * page_size
+    return matches, ordered[offset:offset + page_size + 1]
+
+
+def serialize_client(client):
+    """Build a ClientSearchResponse-shaped dict from a client"""
+    return {
+        "id": str(client.id),
+        "first_name": client.first_name,
+        "last_name": client.last_name,
+        "client_id": client.client_id,
+        "note_count": client.note_count,
+        "last_note_at": client.last_note_at.isoformat() if client.last_note_at else None,
+        "note_counts": client.note_counts
+    }
+
+
+def _search_response(clients, total_clients, page, page_size):
+    # One extra row tells us whether there is a next page without counting
+    next_cursor = None
+    if len(clients) > page_size:
+        clients = clients[:page_size]
+        next_cursor = newest_first_cursor(clients[-1].created_at, clients[-1].pk)
+
+    total_pages = None
+    if total_clients is not None:
+        total_pages = (total_clients + page_size - 1) // page_size
+
+    return {
+        "clients": [serialize_client(client) for client in clients],
+        "total": total_clients,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": total_pages,
+        "next_cursor": next_cursor
+    }
+
+
+def _empty_search(page, page_size):
+    return {
+        "clients": [],
+        "total": 0,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": 0,
+        "next_cursor": None
+    }
 
 
-def search_clients(request, q: str = "", page: int = 1, page_size: int = 10):
+def search_clients(request, q: str = "", page: int = 1, page_size: int = 10,
+                   after: str = None, include_total: bool = True, response=None):
     """
     Search for clients by name or client ID with pagination.
     Only returns clients assigned to the authenticated caseworker.
+
+    Pages are either addressed by `page` number or, preferably, by passing the
+    previous response's `next_cursor` as `after`, which costs the same on
+    every page. The total comes from a short-lived cached count and can be
+    skipped altogether with `include_total=False`.
+
+    Responses are validated against the caseworker's caseload as a whole
+    (latest client edit, latest note activity and client count), which one
+    index-backed query answers; an unchanged caseload gets a 304 without
+    running the search.
     """
     # Get the authenticated user from the request
     # In Django Ninja with JWT, the user is set by the auth handler
     user = getattr(request, 'auth', None) or getattr(request, 'user', None)
     
     if not user or not user.is_authenticated:
-        return {
-            "clients": [],
-            "total": 0,
-            "page": page,
-            "page_size": page_size,
-            "total_pages": 0
-        }
-    
-    # Search by name or client_id, but only for assigned clients
-    query = Q(assigned_caseworker=user)
-    
-    if q:
-        query &= (
-            Q(first_name__icontains=q) |
-            Q(last_name__icontains=q) |
-            Q(client_id__icontains=q)
-        )
-    
-    # Get total count for pagination
-    total_clients = Client.objects.filter(query).count()
+        return _empty_search(page, page_size), None
     
-    # Calculate pagination
-    offset = (page - 1) * page_size
-    clients = Client.objects.filter(query)[offset:offset + page_size]
-    
-    # Calculate total pages
-    total_pages = (total_clients + page_size - 1) // page_size
-    
-    client_list = [
-        ClientSearchResponse(
-            id=str(client.id),
-            first_name=client.first_name,
-            last_name=client.last_name,
-            client_id=client.client_id
-        )
-        for client in clients
-    ]
-    
-    return {
-        "clients": client_list,
-        "total": total_clients,
-        "page": page,
-        "page_size": page_size,
-        "total_pages": total_pages
-    }
+    page = max(page, 1)
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+
+    unchanged = _unchanged_caseload(request, response, user, _caseload_validators(user).get())
+    if unchanged:
+        return unchanged, None
+
+    try:
+        matches, clients = _search_page(user, q, page, page_size, after)
+        clients = list(clients)
+    except InvalidCursor:
+        return None, "Invalid cursor"
+
+    total_clients = _cached_count(user, q, matches) if include_total else None
+    return _search_response(clients, total_clients, page, page_size), None
+
+
+async def asearch_clients(request, q: str = "", page: int = 1, page_size: int = 10,
+                          after: str = None, include_total: bool = True, response=None):
+    """search_clients on the async ORM, for the ASGI API (config.urls_async)."""
+    user = getattr(request, 'auth', None)
+
+    if not user or not user.is_authenticated:
+        return _empty_search(page, page_size), None
+
+    page = max(page, 1)
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+
+    validators = await _caseload_validators(user).aget()
+    unchanged = _unchanged_caseload(request, response, user, validators)
+    if unchanged:
+        return unchanged, None
+
+    try:
+        matches, clients = _search_page(user, q, page, page_size, after)
+        clients = [client async for client in clients]
+    except InvalidCursor:
+        return None, "Invalid cursor"
+
+    total_clients = await _acached_count(user, q, matches) if include_total else None
+    return _search_response(clients, total_clients, page, page_size), None
+
+
+def reassign_caseload(request, payload):
+    """
+    Move a caseworker's clients, or the listed ones among them, to another
+    caseworker in one set-based update (clients.reassignment). Staff only.
+    """
+    user = getattr(request, 'auth', None) or getattr(request, 'user', None)
+
+    if not user or not user.is_authenticated:
+        return None, "Authentication required"
+    if not user.is_staff:
+        return None, "Staff access required"
+
+    if payload.from_caseworker == payload.to_caseworker:
+        return None, "Caseworkers must differ"
+    caseworkers = User.objects.in_bulk([payload.from_caseworker, payload.to_caseworker])
+    target = caseworkers.get(payload.to_caseworker)
+    if payload.from_caseworker not in caseworkers or target is None or not target.is_active:
+        return None, "Caseworker not found"
+
+    clients = Client.objects.filter(assigned_caseworker_id=payload.from_caseworker)
+    if payload.client_ids is not None:
+        try:
+            clients = clients.filter(id__in=[uuid.UUID(client_id) for client_id in payload.client_ids])
+        except ValueError:
+            return None, "Invalid client id"
+
+    return {"reassigned": reassign_clients(clients, target)}, None
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class ProjectConfig(AppConfig):
+    name = 'config'
+    verbose_name = 'Project configuration'
+
+    def ready(self):
+        # metrics installs its query timer on every connection from the first
+        from . import checks, metrics, sqlite  # noqa: F401
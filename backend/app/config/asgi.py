@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Serve the async API routes (config/urls_async.py)
+os.environ.setdefault('ASYNC_API', '1')
 
 application = get_asgi_application()
@@ -1,4 +1,10 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
 from ninja.security import HttpBearer
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.http import HttpRequest
 from rest_framework_simplejwt.tokens import AccessToken
@@ -7,18 +13,162 @@ from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 User = get_user_model()
 
 
+class ExpiringLRUCache:
+    """A small thread-safe LRU whose entries also expire at a given time"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] > time.time():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Verified access token claims keyed by the token's digest, valid until `exp`
+_token_cache = ExpiringLRUCache(settings.JWT_AUTH_TOKEN_CACHE_SIZE)
+# Resolved users keyed by id, as (database alias, field values): every
+# request gets a User of its own, so nothing set on one (a permission cache,
+# an edited field) leaks into others. Dropped by accounts.signals when the
+# row changes.
+_user_cache = ExpiringLRUCache(settings.JWT_AUTH_USER_CACHE_SIZE)
+_USER_FIELDS = [field.attname for field in User._meta.concrete_fields]
+
+
+def _cache_user(user_id, user):
+    # The TTL bounds staleness in other worker processes, which do not
+    # see this process's invalidation signals
+    values = tuple(getattr(user, name) for name in _USER_FIELDS)
+    _user_cache.set(user_id, (user._state.db, values), time.time() + settings.JWT_AUTH_USER_CACHE_TTL)
+
+
+def _cached_user(user_id):
+    entry = _user_cache.get(user_id)
+    if entry is None:
+        return None
+    db, values = entry
+    return User.from_db(db, _USER_FIELDS, values)
+
+
+def invalidate_cached_user(user_id=None):
+    """Forget a cached user, or every cached user when no id is given"""
+    if user_id is None:
+        _user_cache.clear()
+    else:
+        _user_cache.delete(str(user_id))
+
+
+def clear_auth_caches():
+    _token_cache.clear()
+    _user_cache.clear()
+    for cache in (_token_cache, _user_cache):
+        cache.hits = cache.misses = 0
+
+
+def auth_cache_stats():
+    """Hit/miss counters and sizes of the token and user caches"""
+    return {
+        'token_hits': _token_cache.hits,
+        'token_misses': _token_cache.misses,
+        'token_entries': len(_token_cache),
+        'user_hits': _user_cache.hits,
+        'user_misses': _user_cache.misses,
+        'user_entries': len(_user_cache),
+    }
+
+
 class JWTAuth(HttpBearer):
     """JWT Authentication for Django Ninja"""
     
     def authenticate(self, request, token):
+        user_id = self._verified_user_id(token)
+        if user_id is None:
+            return None
+        user = self._resolve_user(user_id)
+        if user is None or not user.is_active:
+            return None
+        return user
+
+    def _verified_user_id(self, token):
+        """Verify the signature once per token, then trust the cached claims until exp"""
+        digest = hashlib.sha256(token.encode()).digest()
+        user_id = _token_cache.get(digest)
+        if user_id is not None:
+            return user_id
         try:
             # Validate the JWT token
             validated_token = AccessToken(token)
-            user_id = validated_token['user_id']
+            # Claims may carry the id as a string or an int; key caches on the string
+            user_id = str(validated_token['user_id'])
+        except (InvalidToken, TokenError, KeyError):
+            return None
+        _token_cache.set(digest, user_id, validated_token['exp'])
+        return user_id
+
+    def _resolve_user(self, user_id):
+        user = _cached_user(user_id)
+        if user is not None:
+            return user
+        try:
             user = User.objects.get(id=user_id)
+        except User.DoesNotExist:
+            return None
+        _cache_user(user_id, user)
+        return user
+
+
+class AsyncJWTAuth(JWTAuth):
+    """JWTAuth for async operations; only a user cache miss touches the database"""
+    is_async = True
+
+    async def authenticate(self, request, token):
+        user_id = self._verified_user_id(token)
+        if user_id is None:
+            return None
+        user = await self._aresolve_user(user_id)
+        if user is None or not user.is_active:
+            return None
+        return user
+
+    async def _aresolve_user(self, user_id):
+        user = _cached_user(user_id)
+        if user is not None:
             return user
-        except (InvalidToken, TokenError, User.DoesNotExist):
+        try:
+            user = await User.objects.aget(id=user_id)
+        except User.DoesNotExist:
             return None
+        _cache_user(user_id, user)
+        return user
 
 
 class SessionAuth(HttpBearer):
@@ -0,0 +1,230 @@
+"""
+Shared helpers for the benchmark management commands
+"""
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.core.management.base import CommandError
+from django.test.utils import override_settings, setup_databases, teardown_databases
+
+# Weighted operations the concurrency benchmarks replay
+DEFAULT_MIX = 'search=50,list=30,create=15,refresh=5'
+MIX_OPERATIONS = ('search', 'list', 'create', 'refresh')
+
+
+@contextmanager
+def throwaway_database(verbosity=0, path=None):
+    """
+    Point the default connection at a freshly migrated test database for the
+    duration of the block, and destroy it afterwards. The real database is
+    never touched, and neither is the real read replica. The response cache
+    is off, so every repeat times the view rather than a cache hit.
+
+    SQLite test databases live in memory unless `path` names a file, which
+    benchmarks with many threads need: shared-cache memory databases lock
+    whole tables.
+    """
+    from django.db import connections
+
+    test_settings = connections['default'].settings_dict.setdefault('TEST', {})
+    saved_name = test_settings.get('NAME')
+    if path is not None:
+        test_settings['NAME'] = str(path)
+    try:
+        # Without routers every read stays on the throwaway primary
+        with override_settings(DATABASE_ROUTERS=[], RESPONSE_CACHE_ENABLED=False):
+            old_config = setup_databases(verbosity=verbosity, interactive=False, aliases={'default'})
+            try:
+                yield
+            finally:
+                teardown_databases(old_config, verbosity=verbosity)
+    finally:
+        test_settings['NAME'] = saved_name
+
+
+def build_dataset(clients, notes_per_client, caseworkers, password, rng, batch_size=5000, username='bench{i}'):
+    """
+    Bulk-insert `caseworkers` users sharing `password`, `clients` clients
+    spread evenly across them and `notes_per_client` notes each, with their
+    counters. Returns the caseworkers.
+    """
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.db import transaction
+    from faker import Faker
+
+    from case_notes.activity import rebuild_note_counters
+    from case_notes.models import CaseNote
+    from clients.models import Client
+
+    fake = Faker()
+    Faker.seed(1234)
+    first_names = [fake.first_name() for _ in range(1000)]
+    last_names = [fake.last_name() for _ in range(1000)]
+    hashed = make_password(password)
+
+    users = get_user_model().objects.bulk_create([
+        get_user_model()(username=username.format(i=i), password=hashed, first_name=fake.first_name(),
+                         last_name=fake.last_name())
+        for i in range(caseworkers)
+    ])
+    types = [choice[0] for choice in CaseNote.INTERACTION_TYPES]
+
+    for start in range(0, clients, batch_size):
+        batch = []
+        for i in range(start, min(clients, start + batch_size)):
+            client = Client(
+                client_id=f'CL-{2000 + i // 1000000}-{i % 1000000:06d}',
+                first_name=rng.choice(first_names),
+                last_name=rng.choice(last_names),
+                assigned_caseworker=users[i % len(users)],
+            )
+            client.refresh_search_fields()
+            batch.append(client)
+        notes = [
+            CaseNote(client=client, content=fake.paragraph(nb_sentences=4),
+                     interaction_type=rng.choice(types), created_by=client.assigned_caseworker)
+            for client in batch
+            for _ in range(notes_per_client)
+        ]
+        with transaction.atomic():
+            Client.objects.bulk_create(batch)
+            CaseNote.objects.bulk_create(notes, batch_size=batch_size)
+            rebuild_note_counters(client.pk for client in batch)
+    return users
+
+
+@contextmanager
+def override_auto_now(*models):
+    """
+    Let bulk inserts into `models` keep the created_at / updated_at values
+    set on the instances instead of stamping the current time, e.g. to
+    backdate generated data. Every such field must then be set explicitly.
+    """
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def parse_mix(mix):
+    """{operation: weight} from 'search=50,list=30,...'."""
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in MIX_OPERATIONS:
+            raise CommandError(f'Unknown operation in --mix: {name}')
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def summarize(samples):
+    """p50/p95/p99 and mean of latency samples given in seconds, reported in ms."""
+    return {
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 95) * 1000, 3),
+        'p99_ms': round(percentile(samples, 99) * 1000, 3),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 3) if samples else 0.0,
+    }
+
+
+def time_call(fn, repeat):
+    """Call fn() `repeat` times and return the individual durations in seconds."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def count_queries(fn):
+    """Number of SQL queries fn() runs on the default connection."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as queries:
+        fn()
+    return len(queries)
+
+
+def measure_allocations(fn, repeat):
+    """
+    Largest tracemalloc peak over `repeat` calls of fn(), in KiB, and the
+    mean number of bytes each call left allocated. Run separately from the
+    timed calls, since tracing slows everything down.
+    """
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        peaks = []
+        retained = []
+        for _ in range(repeat):
+            tracemalloc.reset_peak()
+            before, _peak = tracemalloc.get_traced_memory()
+            fn()
+            after, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(after - before)
+    finally:
+        tracemalloc.stop()
+    return {
+        'alloc_peak_kib': round(max(peaks) / 1024, 1),
+        'alloc_retained_kib': round(statistics.fmean(retained) / 1024, 1),
+    }
+
+
+# Metrics compared against a baseline and the slack allowed before a change
+# counts as a regression; query counts must not grow at all
+BASELINE_METRICS = {
+    'p50_ms': None,
+    'p95_ms': None,
+    'p99_ms': None,
+    'queries': 0.0,
+    'alloc_peak_kib': None,
+}
+
+# Latency changes smaller than this are timer noise, whatever the ratio
+MIN_LATENCY_DELTA_MS = 0.1
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    Compare {scenario: {metric: value}} results with a stored baseline.
+    Returns rows of (scenario, metric, baseline, current, change, regressed).
+    """
+    rows = []
+    for scenario, metrics in results.items():
+        previous = baseline.get(scenario)
+        if not previous:
+            continue
+        for metric, slack in BASELINE_METRICS.items():
+            if metric not in metrics or metric not in previous:
+                continue
+            old, new = previous[metric], metrics[metric]
+            allowed = tolerance if slack is None else slack
+            change = (new - old) / old if old else (0.0 if new == old else float('inf'))
+            regressed = change > allowed
+            if metric.endswith('_ms') and new - old < MIN_LATENCY_DELTA_MS:
+                regressed = False
+            rows.append((scenario, metric, old, new, change, regressed))
+    return rows
@@ -0,0 +1,50 @@
+"""
+Tag-versioned cache keys
+
+Every tag (e.g. ``caseworker:42``) has a version number stored in the cache.
+Keys built with versioned_key() embed the current versions of their tags, so
+invalidating a tag just bumps its version and every entry built on it stops
+being reachable; stale entries then age out on their own timeout.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+
+
+def _tag_key(tag):
+    return f'tag:{tag}'
+
+
+def tag_versions(tags):
+    """Return the current version of each tag, initialising missing ones."""
+    keys = [_tag_key(tag) for tag in tags]
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        if key not in found:
+            # Seeding from the clock rather than 1 means an evicted tag can
+            # never come back at a version that old entries were built on.
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+        versions.append(found[key])
+    return versions
+
+
+def invalidate_tags(*tags):
+    """Bump the version of each tag, orphaning every entry built on it."""
+    for tag in tags:
+        try:
+            cache.incr(_tag_key(tag))
+        except ValueError:
+            # No version means no entry is reachable through this tag, and
+            # the next tag_versions() starts it from the clock, past any old
+            # one; writing it now would only fill the cache with bulk writes
+            pass
+
+
+def versioned_key(prefix, tags, *parts):
+    """Cache key for `parts` that changes whenever any of `tags` is invalidated."""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    versions = '.'.join(str(version) for version in tag_versions(tags))
+    return f'{prefix}:{digest}:{versions}'
@@ -0,0 +1,41 @@
+"""
+System checks for settings that only work with a cache shared between processes
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends whose entries live in one process (or nowhere)
+PROCESS_LOCAL_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def _shared_cache_features():
+    """Enabled features that keep cross-request state in the default cache"""
+    features = []
+    if settings.RESPONSE_CACHE_ENABLED:
+        features.append('RESPONSE_CACHE_ENABLED (response cache invalidation)')
+    if settings.REPLICA_READS_ENABLED:
+        features.append('REPLICA_READS_ENABLED (read-your-writes pins)')
+    return features
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    A write handled by one worker must be visible to the others through the
+    cache, or users read stale data after their own writes
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Error(
+            f'{feature} needs a cache shared between worker processes, but the default cache is {backend}.',
+            hint="Point CACHES['default'] at a shared backend such as Redis or Memcached, or, when a single "
+                 "process serves every request, add 'config.E001' to SILENCED_SYSTEM_CHECKS.",
+            id='config.E001',
+        )
+        for feature in _shared_cache_features()
+    ]
@@ -0,0 +1,35 @@
+"""
+Conditional GET helpers (ETag / Last-Modified -> 304 Not Modified)
+"""
+import hashlib
+
+from django.http import HttpResponseNotModified
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def response_etag(request, *validators):
+    """
+    Weak ETag for a response identified by `validators` and the query string.
+    Any value that changes whenever the response body would change will do.
+    """
+    raw = repr((validators, sorted(request.GET.lists())))
+    return 'W/' + quote_etag(hashlib.sha1(raw.encode()).hexdigest())
+
+
+def not_modified(request, response, etag, last_modified=None):
+    """
+    Stamp validators on `response` (ninja's temporal response, so they end up
+    on the 200 as well) and return a 304 if the client's copy is current.
+    Returns None when the full response has to be built.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    if response is not None:
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+    result = get_conditional_response(
+        request, etag=etag, last_modified=timestamp, response=response
+    )
+    return result if isinstance(result, HttpResponseNotModified) else None
@@ -0,0 +1,410 @@
+"""
+Per-route API metrics, exported in the Prometheus text format
+
+APIMetricsMiddleware times every request routed to the ninja API and counts
+its SQL queries through an execute wrapper installed on every connection;
+TimedJSONRenderer adds the time spent rendering the response body;
+config.response_cache counts its hits, misses and stale answers per route.
+Each worker process keeps its own totals in memory and periodically writes
+them to METRICS_DIR/<pid>.json, and the metrics endpoint sums every process's
+file, so a scrape sees the whole server no matter which worker answers it.
+
+The files of processes that have exited (or whose pid a new process took
+over) are folded into METRICS_DIR/retired.json, which keeps their counters
+but not their gauges, such as the JWTAuth cache sizes. Liveness is checked
+by pid, so the workers must share the host's process table (POSIX only).
+"""
+import fcntl
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from config.auth import auth_cache_stats
+from config.renderers import FastJSONRenderer
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# auth_cache values that are gauges: summed over live processes only
+AUTH_CACHE_GAUGES = ('token_entries', 'user_entries')
+
+_PROCESS_FILE_RE = re.compile(r'^(\d+)\.json$')
+RETIRED_FILE = 'retired.json'
+
+
+class _SQLTimer:
+    """execute_wrapper counting the queries of one request and their time"""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.seconds += time.perf_counter() - started
+
+
+# Timer of the request being served. A context variable follows the request
+# onto whichever thread runs its queries: under ASGI the ORM runs on a sync
+# worker thread (sync_to_async copies the context), whose connections are
+# not the event loop thread's.
+_current_timer = ContextVar('metrics_sql_timer', default=None)
+
+
+def _time_query(execute, sql, params, many, context):
+    timer = _current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def time_connection_queries(sender, connection, **kwargs):
+    """Install the query timer on every new connection, in any thread"""
+    if _time_query not in connection.execute_wrappers:
+        # First, since execute_wrapper() blocks pop the last wrapper on exit
+        connection.execute_wrappers.insert(0, _time_query)
+
+
+class MetricsRegistry:
+    """Cumulative per-(route, method) totals for this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+        self._cache = {}
+        self._flushed_at = 0.0
+        # Which process last flushed, and a token telling it apart from an
+        # earlier process that had the same pid
+        self._pid = None
+        self._process = None
+
+    def observe(self, route, method, status, seconds, queries, sql_seconds, render_seconds):
+        with self._lock:
+            series = self._series.get((route, method))
+            if series is None:
+                series = self._series[(route, method)] = {
+                    'route': route,
+                    'method': method,
+                    'statuses': {},
+                    'buckets': [0] * len(LATENCY_BUCKETS),
+                    'count': 0,
+                    'sum': 0.0,
+                    'sql_queries': 0,
+                    'sql_seconds': 0.0,
+                    'render_seconds': 0.0,
+                }
+            status = str(status)
+            series['statuses'][status] = series['statuses'].get(status, 0) + 1
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    series['buckets'][i] += 1
+                    break
+            series['count'] += 1
+            series['sum'] += seconds
+            series['sql_queries'] += queries
+            series['sql_seconds'] += sql_seconds
+            series['render_seconds'] += render_seconds
+        self.flush(force=False)
+
+    def observe_cache(self, route, result):
+        """Count a response cache lookup: 'hit', 'miss' or 'stale'"""
+        with self._lock:
+            counts = self._cache.setdefault(route, {'hit': 0, 'miss': 0, 'stale': 0})
+            counts[result] += 1
+        self.flush(force=False)
+
+    def snapshot(self):
+        with self._lock:
+            series = json.loads(json.dumps(list(self._series.values())))
+            response_cache = json.loads(json.dumps(self._cache))
+        return {'process': self._process, 'series': series, 'auth_cache': auth_cache_stats(),
+                'response_cache': response_cache}
+
+    def flush(self, force=True):
+        """Write this process's totals to its file in METRICS_DIR"""
+        now = time.monotonic()
+        if not force and now - self._flushed_at < settings.METRICS_FLUSH_INTERVAL:
+            return
+        self._flushed_at = now
+        directory = metrics_dir()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{os.getpid()}.json')
+        if self._pid != os.getpid():
+            # A file already there was left by an exited process with our pid
+            self._pid, self._process = os.getpid(), uuid.uuid4().hex
+            with _locked(directory):
+                _retire(directory, path)
+        _write(path, self.snapshot())
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self._cache.clear()
+            self._flushed_at = 0.0
+            self._pid = None
+
+
+registry = MetricsRegistry()
+
+
+def metrics_dir():
+    return str(settings.METRICS_DIR)
+
+
+def api_route(request):
+    """'/api/<route pattern>' for a request served by the ninja API, else None"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None or not match.namespace.startswith('api-'):
+        return None
+    return '/' + match.route
+
+
+class APIMetricsMiddleware:
+    """Record latency, status and SQL usage of every ninja API request"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        timer = _SQLTimer()
+        started = time.perf_counter()
+        token = _current_timer.set(timer)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_timer.reset(token)
+        self._observe(request, response, timer, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.METRICS_ENABLED:
+            return await self.get_response(request)
+
+        timer = _SQLTimer()
+        started = time.perf_counter()
+        token = _current_timer.set(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_timer.reset(token)
+        self._observe(request, response, timer, time.perf_counter() - started)
+        return response
+
+    def _observe(self, request, response, timer, elapsed):
+        route = api_route(request)
+        if route is not None:
+            registry.observe(
+                route, request.method, response.status_code, elapsed,
+                timer.queries, timer.seconds, getattr(request, '_metrics_render_seconds', 0.0)
+            )
+
+
+class TimedJSONRenderer(FastJSONRenderer):
+    """FastJSONRenderer that leaves its render time on the request for the metrics"""
+
+    def render(self, request, data, *, response_status):
+        started = time.perf_counter()
+        try:
+            return super().render(request, data, response_status=response_status)
+        finally:
+            request._metrics_render_seconds = (
+                getattr(request, '_metrics_render_seconds', 0.0) + time.perf_counter() - started
+            )
+
+
+def _write(path, snapshot):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w') as handle:
+        json.dump(snapshot, handle)
+    # Readers only ever see a complete file
+    os.replace(tmp_path, path)
+
+
+def _read(path):
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+@contextmanager
+def _locked(directory):
+    """Hold METRICS_DIR's lock, which serializes changes to the retired totals"""
+    with open(os.path.join(directory, '.lock'), 'a') as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        yield
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Running, as another user
+        return True
+    return True
+
+
+def _retire(directory, path):
+    """Fold the counters of an exited process's file into the retired totals, and remove it"""
+    snapshot = _read(path)
+    if snapshot is not None:
+        snapshot['auth_cache'] = {key: value for key, value in snapshot.get('auth_cache', {}).items()
+                                  if key not in AUTH_CACHE_GAUGES}
+        retired_path = os.path.join(directory, RETIRED_FILE)
+        series, auth, response_cache = _sum([_read(retired_path) or {}, snapshot])
+        _write(retired_path, {'series': list(series.values()), 'auth_cache': auth,
+                              'response_cache': response_cache})
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def collect():
+    """
+    Sum the totals written by every live worker process and the retired
+    totals of exited ones; returns (series, auth cache stats, response cache
+    counts)
+    """
+    registry.flush()
+    directory = metrics_dir()
+    snapshots = []
+    with _locked(directory):
+        for name in sorted(os.listdir(directory)):
+            match = _PROCESS_FILE_RE.match(name)
+            if match is None:
+                continue
+            path = os.path.join(directory, name)
+            if not _process_alive(int(match[1])):
+                _retire(directory, path)
+                continue
+            snapshot = _read(path)
+            if snapshot is not None:
+                snapshots.append(snapshot)
+        snapshots.append(_read(os.path.join(directory, RETIRED_FILE)) or {})
+    merged, auth, response_cache = _sum(snapshots)
+    return [merged[key] for key in sorted(merged)], auth, response_cache
+
+
+def _sum(snapshots):
+    """Add up snapshots into (series by (route, method), auth cache stats, response cache counts)"""
+    merged = {}
+    auth = {}
+    response_cache = {}
+    for snapshot in snapshots:
+        for key, value in snapshot.get('auth_cache', {}).items():
+            auth[key] = auth.get(key, 0) + value
+        for route, counts in snapshot.get('response_cache', {}).items():
+            total = response_cache.setdefault(route, {})
+            for result, count in counts.items():
+                total[result] = total.get(result, 0) + count
+        for series in snapshot.get('series', []):
+            key = (series['route'], series['method'])
+            total = merged.get(key)
+            if total is None:
+                merged[key] = series
+                continue
+            for status, count in series['statuses'].items():
+                total['statuses'][status] = total['statuses'].get(status, 0) + count
+            total['buckets'] = [a + b for a, b in zip(total['buckets'], series['buckets'])]
+            for field in ('count', 'sum', 'sql_queries', 'sql_seconds', 'render_seconds'):
+                total[field] += series[field]
+    return merged, auth, response_cache
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format"""
+    series, auth, response_cache = collect()
+    lines = [
+        '# HELP api_requests_total API requests by route, method and status code.',
+        '# TYPE api_requests_total counter',
+    ]
+    for s in series:
+        for status, count in sorted(s['statuses'].items()):
+            lines.append(f"api_requests_total{_labels(route=s['route'], method=s['method'], status=status)} {count}")
+
+    lines += [
+        '# HELP api_request_duration_seconds API request latency.',
+        '# TYPE api_request_duration_seconds histogram',
+    ]
+    for s in series:
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, s['buckets']):
+            cumulative += count
+            labels = _labels(route=s['route'], method=s['method'], le=bound)
+            lines.append(f'api_request_duration_seconds_bucket{labels} {cumulative}')
+        labels = _labels(route=s['route'], method=s['method'], le='+Inf')
+        lines.append(f"api_request_duration_seconds_bucket{labels} {s['count']}")
+        labels = _labels(route=s['route'], method=s['method'])
+        lines.append(f"api_request_duration_seconds_sum{labels} {s['sum']}")
+        lines.append(f"api_request_duration_seconds_count{labels} {s['count']}")
+
+    for name, field, help_text in (
+        ('api_sql_queries_total', 'sql_queries', 'SQL queries run while serving API requests.'),
+        ('api_sql_duration_seconds_total', 'sql_seconds', 'Time spent in SQL queries.'),
+        ('api_render_duration_seconds_total', 'render_seconds', 'Time spent rendering response bodies.'),
+    ):
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for s in series:
+            lines.append(f"{name}{_labels(route=s['route'], method=s['method'])} {s[field]}")
+
+    lines += [
+        '# HELP jwt_auth_cache_requests_total JWTAuth cache lookups by cache and result.',
+        '# TYPE jwt_auth_cache_requests_total counter',
+    ]
+    for cache in ('token', 'user'):
+        for result, field in (('hit', 'hits'), ('miss', 'misses')):
+            value = auth.get(f'{cache}_{field}', 0)
+            lines.append(f'jwt_auth_cache_requests_total{_labels(cache=cache, result=result)} {value}')
+    lines += [
+        '# HELP jwt_auth_cache_entries Entries held by the JWTAuth caches.',
+        '# TYPE jwt_auth_cache_entries gauge',
+    ]
+    for cache in ('token', 'user'):
+        lines.append(f"jwt_auth_cache_entries{_labels(cache=cache)} {auth.get(f'{cache}_entries', 0)}")
+    lines += [
+        '# HELP api_response_cache_requests_total Response cache lookups by route and result.',
+        '# TYPE api_response_cache_requests_total counter',
+    ]
+    for route, counts in sorted(response_cache.items()):
+        for result in ('hit', 'miss', 'stale'):
+            lines.append(
+                f"api_response_cache_requests_total{_labels(route=route, result=result)} {counts.get(result, 0)}"
+            )
+    return '\n'.join(lines) + '\n'
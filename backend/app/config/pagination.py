@@ -0,0 +1,52 @@
+"""
+Opaque cursor helpers for keyset pagination
+"""
+import base64
+import json
+import uuid
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token cannot be decoded"""
+
+
+def encode_cursor(*values):
+    """Encode the sort key of the last row on a page as an opaque token."""
+    raw = json.dumps(list(values), separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str, size: int):
+    """Decode a token produced by encode_cursor into a list of `size` values."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("Invalid cursor")
+    return values
+
+
+def newest_first_cursor(created_at, pk):
+    """Cursor for a row in a (-created_at, -pk) ordered listing."""
+    return encode_cursor(created_at.isoformat(), str(pk))
+
+
+def older_than_cursor(token: str) -> Q:
+    """
+    Filter selecting the rows after `token` in a (-created_at, -pk) listing.
+    Backed by a (.., created_at) index this reads only the rows it returns.
+    """
+    created_at, pk = decode_cursor(token, 2)
+    try:
+        created_at = parse_datetime(created_at)
+        pk = uuid.UUID(pk)
+    except (TypeError, ValueError):
+        raise InvalidCursor("Invalid cursor")
+    if created_at is None:
+        raise InvalidCursor("Invalid cursor")
+    return Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
@@ -0,0 +1,59 @@
+"""
+Fast JSON rendering for the ninja APIs
+
+FastJSONRenderer encodes with orjson when it is installed and falls back to
+ninja's stdlib encoder otherwise. Apart from whitespace its output is the
+same: datetimes, Decimals and pydantic models still go through ninja's
+encoder.
+
+trusted_response() renders a view's result without validating it against
+the route's response schema, for views that build their output from ORM
+rows in exactly the schema's shape. The schema still documents the route,
+and API_TRUSTED_OUTPUT = False validates every response again.
+"""
+import json
+
+from django.conf import settings
+from django.http import HttpResponseBase
+from ninja.renderers import JSONRenderer
+from ninja.responses import NinjaJSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional; rendering falls back to the stdlib encoder
+    orjson = None
+
+# Leave datetimes to ninja's encoder so they keep its format; json.dumps
+# turns non-string dict keys into strings, and so must orjson
+ORJSON_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+_encoder = NinjaJSONEncoder()
+
+
+def json_bytes(data):
+    """`data` as compact JSON, encoded like FastJSONRenderer does"""
+    if orjson is None:
+        return json.dumps(data, cls=NinjaJSONEncoder, separators=(',', ':')).encode()
+    return orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that uses orjson when available"""
+
+    def render(self, request, data, *, response_status):
+        if orjson is None:
+            return super().render(request, data, response_status=response_status)
+        return orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+
+
+def trusted_response(api, request, response, result):
+    """
+    Render `result` straight into ninja's temporal `response` (keeping the
+    headers the view set on it), skipping the response schema. Responses the
+    view built itself, such as a 304, pass through; with API_TRUSTED_OUTPUT
+    off the result is returned for ninja to validate as usual.
+    """
+    if isinstance(result, HttpResponseBase) or not settings.API_TRUSTED_OUTPUT:
+        return result
+    return api.create_response(request, result, temporal_response=response)
+
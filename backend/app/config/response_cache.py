@@ -0,0 +1,152 @@
+"""
+Per-user cache of rendered API responses, invalidated by tags
+
+cached_route() wraps a GET operation (through ninja's decorate_view) and
+keeps its rendered 200 responses for RESPONSE_CACHE_TTL seconds, keyed by
+the authenticated user, the path and the query string. Each entry is built
+on tags such as ``caseworker:<id>`` or ``client:<id>``; writes bump those
+tags (see config.cache_tags), so a change is visible on the very next
+request. A hit skips the queries, the schema validation and the rendering.
+
+When the database is busy (the API answers 503) and RESPONSE_CACHE_SERVE_STALE
+is on, the last good response is served instead, for up to
+RESPONSE_CACHE_STALE_TTL seconds after it was built, marked ``X-Cache: STALE``;
+the next request tries the database again.
+"""
+import hashlib
+import uuid
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from config.cache_tags import versioned_key
+from config.metrics import api_route, registry
+
+# Response headers kept with a cached body
+STORED_HEADERS = ('ETag', 'Last-Modified', 'Cache-Control')
+
+
+def caseworker_tags(request, params):
+    """Tags of a response built from the caller's whole caseload"""
+    return [f'caseworker:{request.auth.pk}']
+
+
+def client_tags(request, params):
+    """Tags of a response built from one client's notes; None for a malformed id"""
+    try:
+        return [f"client:{uuid.UUID(str(params['client_id']))}"]
+    except ValueError:
+        return None
+
+
+def _keys(name, request, tags):
+    parts = (request.auth.pk, request.path, sorted(request.GET.lists()))
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return versioned_key(f'response:{name}', tags, *parts), f'response-stale:{name}:{digest}'
+
+
+def _entry(response):
+    return {
+        'status': response.status_code,
+        'content': response.content,
+        'content_type': response['Content-Type'],
+        'headers': {name: response[name] for name in STORED_HEADERS if response.has_header(name)},
+    }
+
+
+def _replay(request, entry, label):
+    """A fresh response from a stored entry, or a 304 if the client's copy is current"""
+    response = HttpResponse(entry['content'], status=entry['status'], content_type=entry['content_type'])
+    for name, value in entry['headers'].items():
+        response[name] = value
+    response['X-Cache'] = label
+    conditional = get_conditional_response(
+        request,
+        etag=entry['headers'].get('ETag'),
+        last_modified=parse_http_date_safe(entry['headers'].get('Last-Modified', '')),
+        response=response,
+    )
+    return conditional if conditional is not None else response
+
+
+def cached_route(name, tags):
+    """
+    View decorator for a GET operation whose 200 responses depend only on the
+    caller and the query, and change only when one of `tags(request, params)`
+    is invalidated. `tags` may return None to leave a request uncached.
+
+        @api.get("/clients/search", ...)
+        @decorate_view(cached_route('clients.search', caseworker_tags))
+        def client_search(request, ...):
+    """
+    def decorator(run):
+        # run is the operation's bound run(); the checks authenticate the
+        # caller before the lookup, and run() repeats them (from the JWT caches).
+        # The cache is read synchronously on the async path as well, as
+        # versioned_key() does: a thread hop would cost more than the lookup.
+        operation = run.__self__
+
+        def lookup(request, params):
+            if request.method != 'GET' or not settings.RESPONSE_CACHE_ENABLED:
+                return None
+            entry_tags = tags(request, params)
+            if entry_tags is None:
+                return None
+            return _keys(name, request, entry_tags)
+
+        def finish(request, keys, response):
+            """Store a 200, or answer a busy database with the stale copy"""
+            if response.status_code == 503 and settings.RESPONSE_CACHE_SERVE_STALE:
+                stale = cache.get(keys[1])
+                if stale is not None:
+                    registry.observe_cache(api_route(request), 'stale')
+                    return _replay(request, stale, 'STALE')
+            if response.status_code == 200:
+                entry = _entry(response)
+                cache.set(keys[0], entry, settings.RESPONSE_CACHE_TTL)
+                cache.set(keys[1], entry, settings.RESPONSE_CACHE_STALE_TTL)
+                response['X-Cache'] = 'MISS'
+            registry.observe_cache(api_route(request), 'miss')
+            return response
+
+        def hit(request, keys):
+            entry = cache.get(keys[0])
+            if entry is None:
+                return None
+            registry.observe_cache(api_route(request), 'hit')
+            return _replay(request, entry, 'HIT')
+
+        if iscoroutinefunction(run):
+            @wraps(run)
+            async def async_wrapper(request, **params):
+                error = await operation._run_checks(request)
+                if error:
+                    return error
+                keys = lookup(request, params)
+                if keys is None:
+                    return await run(request, **params)
+                cached = hit(request, keys)
+                if cached is not None:
+                    return cached
+                return finish(request, keys, await run(request, **params))
+            return async_wrapper
+
+        @wraps(run)
+        def wrapper(request, **params):
+            error = operation._run_checks(request)
+            if error:
+                return error
+            keys = lookup(request, params)
+            if keys is None:
+                return run(request, **params)
+            cached = hit(request, keys)
+            if cached is not None:
+                return cached
+            return finish(request, keys, run(request, **params))
+        return wrapper
+    return decorator
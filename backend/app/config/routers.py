@@ -0,0 +1,157 @@
+"""
+Read replica routing with read-your-writes
+
+Reads go to the primary unless the code runs inside replica_reads(), which
+the read-only API views and admin changelists use. Even then a read stays
+on the primary when:
+
+- REPLICA_READS_ENABLED is off,
+- the replica is missing or older than REPLICA_MAX_LAG_SECONDS,
+- the current request has already written something, or
+- the user wrote something after the replica's snapshot was taken, so a
+  caseworker always sees the note they just posted.
+
+The replica is a read-only copy of the primary made by refresh_replica, whose
+file modification time is the moment the snapshot was taken. Writes always
+go to the primary. Pins are kept in the default cache, which must be shared
+between worker processes (see config.checks).
+"""
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_DB_ALIAS = 'replica'
+
+
+class _Routing:
+    """Routing state of one request"""
+
+    def __init__(self):
+        self.use_replica = False
+        self.wrote = False
+
+
+_routing = ContextVar('db_routing', default=None)
+
+
+def replica_synced_at():
+    """When the replica's snapshot was taken (epoch seconds), or None without a replica"""
+    if not settings.REPLICA_READS_ENABLED or REPLICA_DB_ALIAS not in settings.DATABASES:
+        return None
+    try:
+        return os.stat(settings.REPLICA_DATABASE_PATH).st_mtime
+    except OSError:
+        return None
+
+
+def _pin_key(user_id):
+    return f'replica-pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """Serve the user's reads from the primary until the replica has their writes."""
+    cache.set(_pin_key(user_id), time.time(), settings.REPLICA_MAX_LAG_SECONDS)
+
+
+def replica_usable_for(user_id):
+    """Whether the replica is fresh enough and already holds the user's own writes."""
+    synced_at = replica_synced_at()
+    if synced_at is None or time.time() - synced_at > settings.REPLICA_MAX_LAG_SECONDS:
+        return False
+    if user_id is None:
+        return True
+    written_at = cache.get(_pin_key(user_id))
+    return written_at is None or written_at < synced_at
+
+
+@contextmanager
+def replica_reads(user=None):
+    """Send the reads in the block to the replica when it is safe for `user`."""
+    state = _routing.get()
+    token = None
+    if state is None:
+        # Outside a request, e.g. in a management command
+        state = _Routing()
+        token = _routing.set(state)
+    previous = state.use_replica
+    state.use_replica = replica_usable_for(getattr(user, 'pk', None))
+    try:
+        yield
+    finally:
+        state.use_replica = previous
+        if token is not None:
+            _routing.reset(token)
+
+
+class ReplicaRouter:
+    """Route reads inside replica_reads() to the replica and everything else to the primary"""
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is not None and state.use_replica and not state.wrote:
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Explicitly the primary: instances read from the replica remember
+        # it as their database and would otherwise be saved there
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema with every copy of the primary
+        return db != REPLICA_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """Give every request fresh routing state and pin users who wrote to the primary"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = _Routing()
+        token = _routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        self._pin_writer(request, state)
+        return response
+
+    async def __acall__(self, request):
+        # The async ORM runs queries via sync_to_async, which copies this
+        # context, so the router sees the same state object
+        state = _Routing()
+        token = _routing.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        self._pin_writer(request, state)
+        return response
+
+    def _pin_writer(self, request, state):
+        if state.wrote:
+            # request.auth is the API's JWT user, request.user the admin session's
+            user = getattr(request, 'auth', None) or getattr(request, 'user', None)
+            if getattr(user, 'is_authenticated', False):
+                pin_to_primary(user.pk)
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -40,12 +42,17 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
+    'config',
     'accounts',
     'clients',
     'case_notes',
+    'sync',
+    'export_jobs',
 ]
 
 MIDDLEWARE = [
+    'config.metrics.APIMetricsMiddleware',
+    'config.routers.ReplicaRoutingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -56,7 +63,9 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'config.urls'
+# ASGI servers (config/asgi.py sets ASYNC_API=1) serve the hot routes with
+# async views; everything else falls through to the sync API
+ROOT_URLCONF = 'config.urls_async' if os.environ.get('ASYNC_API') == '1' else 'config.urls'
 
 TEMPLATES = [
     {
@@ -79,11 +88,69 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Where refresh_replica writes the read replica
+REPLICA_DATABASE_PATH = BASE_DIR / 'data' / 'db-replica.sqlite3'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'data' / 'db.sqlite3',
-    }
+        # Connections (and the PRAGMAs set on them, see SQLITE_PRAGMAS) are
+        # reused across requests; a connection that broke is replaced
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Transactions stay deferred, so readers never wait for the write
+            # lock; the write paths that read first use
+            # config.sqlite.write_transaction() to take it at BEGIN
+            'timeout': 5,
+        },
+    },
+    # Read-only copy of the primary kept fresh by refresh_replica; see
+    # config.routers. Tests read the test database through it. Connected per
+    # request (no CONN_MAX_AGE): an open connection keeps reading the copy
+    # it opened after refresh_replica swaps in a new one.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f'file:{REPLICA_DATABASE_PATH}?mode=ro',
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+DATABASE_ROUTERS = ['config.routers.ReplicaRouter']
+
+# Cross-request state (read-your-writes pins, response cache tags) lives in
+# the default cache. This in-process cache suits a single server process;
+# with several workers point it at a shared backend such as Redis, or the
+# config.E001 system check fails startup while those features are enabled.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Read replica reads (config.routers). Off by default: a user who just wrote
+# is pinned to the primary through the cache, so enabling this needs a
+# cache shared between worker processes.
+REPLICA_READS_ENABLED = False
+
+# How old the replica may get before reads fall back to the primary (also
+# the longest a user who just wrote stays pinned to the primary)
+REPLICA_MAX_LAG_SECONDS = 60
+
+# Production SQLite profile, applied to every new connection (config.sqlite):
+# WAL lets readers run alongside the single writer, NORMAL sync is durable in
+# WAL mode except on power loss, and the page cache, memory-mapped I/O and
+# in-memory temp tables keep hot pages out of syscalls. auto_vacuum only
+# takes effect on a new database (see db_maintenance --enable-incremental-vacuum).
+SQLITE_PRAGMAS = {
+    'auto_vacuum': 'INCREMENTAL',
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,               # ms
+    'cache_size': -64000,               # KiB, i.e. 64 MB per connection
+    'mmap_size': 256 * 1024 * 1024,     # bytes
+    'temp_store': 'MEMORY',
 }
 
 
@@ -171,6 +238,68 @@ SIMPLE_JWT = {
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
 
+# JWTAuth caches: verified token claims (kept until the token expires) and
+# resolved users (kept for the TTL, or until the user row changes)
+JWT_AUTH_TOKEN_CACHE_SIZE = 4096
+JWT_AUTH_USER_CACHE_SIZE = 1024
+JWT_AUTH_USER_CACHE_TTL = 60
+
+# Maximum number of notes accepted by one POST /case-notes/bulk request
+CASE_NOTE_BULK_MAX = 500
+
+# Delta sync: a row's updated_at is stamped before its transaction commits,
+# up to the busy timeout (waiting for the write lock) plus the longest write
+# transaction earlier, e.g. an import_caseload batch. Watermarks overlap the
+# previous window by that much so such rows are not missed. The change log
+# (deletions, reassignments) is kept for the retention period; older
+# watermarks get a full resync.
+SYNC_MAX_WRITE_TRANSACTION_SECONDS = 30
+SYNC_WATERMARK_OVERLAP_SECONDS = DATABASES['default']['OPTIONS']['timeout'] + SYNC_MAX_WRITE_TRANSACTION_SECONDS
+SYNC_LOG_RETENTION_DAYS = 30
+
+# Client search: how long a search's total match count may be served from cache (seconds)
+CLIENT_SEARCH_COUNT_TTL = 30
+
+# Client search and note lists build their output in their schemas' shape
+# and skip ninja's response validation (config.renderers.trusted_response);
+# turn off to validate every response, e.g. while changing those views
+API_TRUSTED_OUTPUT = True
+
+# Response cache for client search and note lists (config.response_cache).
+# Off by default: writes invalidate entries through tag versions in the
+# default cache, so with several worker processes it needs a shared cache
+# (see CACHES). While the database is busy the last good response, up to
+# RESPONSE_CACHE_STALE_TTL seconds old, is served instead of a 503.
+RESPONSE_CACHE_ENABLED = False
+RESPONSE_CACHE_TTL = 30
+RESPONSE_CACHE_SERVE_STALE = True
+RESPONSE_CACHE_STALE_TTL = 300
+
+# Case note exports (case_notes.exports): rows read per database round trip,
+# and bytes of output gathered before a block is (compressed and) sent
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_BUFFER_BYTES = 64 * 1024
+
+# Export jobs (export_jobs.runner): caseload and department exports run one
+# job at a time in each web process, split per caseworker across
+# EXPORT_MAX_WORKERS processes at lowered priority (0 runs each job inline,
+# in the request that submits it). A server running N web processes can run
+# N jobs, and N * EXPORT_MAX_WORKERS export processes, at once. Archives are
+# kept in EXPORT_ROOT until prune_export_jobs deletes them after
+# EXPORT_RETENTION_DAYS.
+EXPORT_MAX_WORKERS = 2
+EXPORT_WORKER_NICE = 10
+EXPORT_ROOT = BASE_DIR / 'data' / 'exports'
+EXPORT_RETENTION_DAYS = 7
+
+# API metrics (GET /api/metrics, staff only): each worker process writes its
+# totals to METRICS_DIR at most every METRICS_FLUSH_INTERVAL seconds, and the
+# endpoint sums all of them (exited workers' counters are kept, their gauges
+# dropped). Clear the directory on deploy to reset counters.
+METRICS_ENABLED = True
+METRICS_DIR = Path(tempfile.gettempdir()) / 'case-note-metrics'
+METRICS_FLUSH_INTERVAL = 5
+
 # Admin site customization
 ADMIN_SITE_HEADER = "Case Note Management System"
 ADMIN_SITE_TITLE = "Case Note Admin"
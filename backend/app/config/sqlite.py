@@ -0,0 +1,106 @@
+"""
+SQLite connection tuning and online maintenance
+
+apply_pragmas() runs on every new connection (connection_created), so each
+connection gets the production profile in SQLITE_PRAGMAS once; connections
+are kept open between requests (CONN_MAX_AGE). write_transaction() is
+transaction.atomic() for the write paths that read before they write. The
+maintenance helpers each work in short autocommit steps, so readers are never
+blocked and writers wait for at most one step.
+"""
+import re
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_PRAGMA_NAME_RE = re.compile(r'^[a-z_]+$')
+
+# Settings stored in the database file itself. A read-only connection (such
+# as the replica's) cannot change them, and an in-memory database (the test
+# database) has no file, while another connection may hold its lock.
+_PERSISTENT_PRAGMAS = {'auto_vacuum', 'journal_mode'}
+
+
+def stores_settings(connection):
+    """Whether the connection may set the _PERSISTENT_PRAGMAS"""
+    return not connection.is_in_memory_db() and 'mode=ro' not in str(connection.settings_dict['NAME'])
+
+
+def apply_pragmas(connection, pragmas=None):
+    """Set each PRAGMA in `pragmas` (default: SQLITE_PRAGMAS) on a SQLite connection."""
+    if connection.vendor != 'sqlite':
+        return
+    if pragmas is None:
+        pragmas = settings.SQLITE_PRAGMAS
+    persistent = stores_settings(connection)
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            if not _PRAGMA_NAME_RE.match(name):
+                raise ValueError(f'Invalid PRAGMA name: {name!r}')
+            if not persistent and name in _PERSISTENT_PRAGMAS:
+                continue
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created)
+def configure_connection(sender, connection, **kwargs):
+    apply_pragmas(connection)
+
+
+@contextmanager
+def write_transaction(using=None):
+    """
+    transaction.atomic() that takes SQLite's write lock at BEGIN (BEGIN
+    IMMEDIATE), where SQLite waits up to the busy timeout for it. A plain
+    (deferred) transaction that reads first fails with "database is locked"
+    when its first write finds another writer committed meanwhile. Other
+    transactions stay deferred, so read-only ones never queue behind writers.
+    Nested in an atomic block it is a plain savepoint.
+    """
+    connection = connections[using or DEFAULT_DB_ALIAS]
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+    # Connecting resets transaction_mode from OPTIONS, so connect first
+    connection.ensure_connection()
+    previous = connection.transaction_mode
+    connection.transaction_mode = 'IMMEDIATE'
+    try:
+        with transaction.atomic(using=using):
+            # BEGIN has run; nothing else on this connection should inherit it
+            connection.transaction_mode = previous
+            yield
+    finally:
+        connection.transaction_mode = previous
+
+
+def pragma(connection, name):
+    """Current value of a PRAGMA"""
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def fts_tables(connection):
+    """FTS5 virtual tables"""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE sql LIKE 'CREATE VIRTUAL TABLE%USING fts5%'")
+        return [row[0] for row in cursor.fetchall()]
+
+
+def table_names(connection):
+    """Ordinary tables, leaving out SQLite's own and FTS5's shadow tables"""
+    virtual = fts_tables(connection)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' "
+            "AND sql NOT LIKE 'CREATE VIRTUAL TABLE%' ORDER BY name"
+        )
+        tables = [row[0] for row in cursor.fetchall()]
+    # FTS5 keeps its index in <table>_data, _idx, _config, _docsize and _content
+    return [table for table in tables if not any(table.startswith(f'{name}_') for name in virtual)]
@@ -6,9 +6,18 @@ The `urlpatterns` list routes URLs to views. For more information please see:
 """
 from django.urls import path
 from django.contrib import admin
+from django.db import OperationalError
+from django.http import HttpResponse
 from ninja import NinjaAPI
+from ninja.decorators import decorate_view
+from ninja.security import django_auth
 from typing import List
+from datetime import datetime
 from config.auth import JWTAuth
+from config.metrics import CONTENT_TYPE, TimedJSONRenderer, render_prometheus
+from config.renderers import trusted_response
+from config.response_cache import cached_route, caseworker_tags, client_tags
+from config.routers import replica_reads
 
 # Import views directly from each app
 from accounts.views import login_user, logout_user, refresh_token
@@ -16,16 +25,37 @@ from accounts.schemas import (
     LoginRequest, LoginResponse, LogoutRequest, LogoutResponse,
     RefreshTokenRequest, RefreshTokenResponse, ErrorResponse
 )
-from clients.views import search_clients
-from clients.schemas import ClientSearchResponse, ClientSearchPaginatedResponse
-from case_notes.views import create_case_note, get_client_case_notes
+from clients.views import reassign_caseload, search_clients
+from clients.schemas import (
+    ClientReassignRequest, ClientReassignResponse, ClientSearchResponse, ClientSearchPaginatedResponse
+)
+from case_notes.views import (
+    bulk_create_case_notes, create_case_note, get_client_case_notes, search_case_notes
+)
 from case_notes.schemas import (
     CaseNoteCreateRequest, CaseNoteCreateResponse, 
-    CaseNotesListResponse, CaseNoteResponse
+    CaseNotesListResponse, CaseNoteResponse, CaseNoteSearchResponse,
+    CaseNoteBulkCreateRequest, CaseNoteBulkCreateResponse
 )
+from case_notes.exports import export_client_case_notes
+from export_jobs.views import create_export_job, download_export_job, get_export_job
+from export_jobs.schemas import ExportJobCreateRequest, ExportJobResponse
+from sync.views import get_changes
+from sync.schemas import SyncResponse
 
 # Create main API instance with JWT authentication
-api = NinjaAPI(title="Case Note Management API", version="1.0.0", auth=JWTAuth())
+api = NinjaAPI(title="Case Note Management API", version="1.0.0", auth=JWTAuth(),
+               renderer=TimedJSONRenderer())
+
+# SQLite reports a write lock it could not get within its timeout as an
+# OperationalError; tell the client to retry instead of answering 500
+@api.exception_handler(OperationalError)
+def database_busy(request, exc):
+    if 'database is locked' not in str(exc):
+        raise exc
+    response = api.create_response(request, {"error": "Database is busy, please retry"}, status=503)
+    response['Retry-After'] = '1'
+    return response
 
 # Authentication endpoints (no auth required)
 @api.post("/auth/login", response={200: LoginResponse, 401: ErrorResponse}, auth=None)
@@ -51,9 +81,30 @@ def auth_refresh(request, payload: RefreshTokenRequest):
         return 401, {"error": "Invalid refresh token"}
 
 # Client endpoints (JWT auth required)
-@api.get("/clients/search", response=ClientSearchPaginatedResponse)
-def client_search(request, q: str = "", page: int = 1, page_size: int = 10):
-    return search_clients(request, q, page, page_size)
+@api.get("/clients/search", response={200: ClientSearchPaginatedResponse, 400: ErrorResponse})
+@decorate_view(cached_route('clients.search', caseworker_tags))
+def client_search(request, response: HttpResponse, q: str = "", page: int = 1, page_size: int = 10,
+                  after: str = None, include_total: bool = True):
+    with replica_reads(request.auth):
+        result, error = search_clients(request, q, page, page_size, after, include_total,
+                                       response=response)
+    if result:
+        return trusted_response(api, request, response, result)
+    else:
+        return 400, {"error": error}
+
+@api.post("/clients/reassign", response={200: ClientReassignResponse, 400: ErrorResponse, 403: ErrorResponse,
+                                         404: ErrorResponse})
+def client_reassign(request, payload: ClientReassignRequest):
+    result, error = reassign_caseload(request, payload)
+    if result:
+        return result
+    elif "not found" in error:
+        return 404, {"error": error}
+    elif "Staff" in error:
+        return 403, {"error": error}
+    else:
+        return 400, {"error": error}
 
 # Case note endpoints (JWT auth required)
 @api.post("/case-notes/", response={200: CaseNoteCreateResponse, 400: ErrorResponse, 404: ErrorResponse})
@@ -66,13 +117,90 @@ def case_note_create(request, payload: CaseNoteCreateRequest):
     else:
         return 400, {"error": error}
 
-@api.get("/case-notes/client/{client_id}", response={200: CaseNotesListResponse, 404: ErrorResponse})
-def case_note_list(request, client_id: str):
-    result, error = get_client_case_notes(request, client_id)
+@api.post("/case-notes/bulk", response={200: CaseNoteBulkCreateResponse, 400: ErrorResponse})
+def case_note_bulk_create(request, payload: CaseNoteBulkCreateRequest):
+    result, error = bulk_create_case_notes(request, payload)
+    if result:
+        return result
+    else:
+        return 400, {"error": error}
+
+@api.get("/case-notes/search", response={200: CaseNoteSearchResponse, 400: ErrorResponse})
+def case_note_search(request, q: str = "", after: str = None, limit: int = 20):
+    with replica_reads(request.auth):
+        result, error = search_case_notes(request, q, after, limit)
+    if result:
+        return result
+    else:
+        return 400, {"error": error}
+
+@api.get("/case-notes/client/{client_id}", response={200: CaseNotesListResponse, 400: ErrorResponse, 404: ErrorResponse})
+@decorate_view(cached_route('case_notes.list', client_tags))
+def case_note_list(request, response: HttpResponse, client_id: str, interaction_type: str = None,
+                   created_after: datetime = None, created_before: datetime = None,
+                   limit: int = None, after: str = None):
+    with replica_reads(request.auth):
+        result, error = get_client_case_notes(
+            request, client_id, interaction_type, created_after, created_before, limit, after,
+            response=response
+        )
+    if result:
+        return trusted_response(api, request, response, result)
+    elif "not found" in error:
+        return 404, {"error": error}
+    else:
+        return 400, {"error": error}
+
+@api.get("/case-notes/client/{client_id}/export", response={400: ErrorResponse, 404: ErrorResponse})
+def case_note_export(request, client_id: str, format: str = "ndjson", gzip: bool = False):
+    result, error = export_client_case_notes(request, client_id, format, gzip)
+    if result:
+        return result
+    elif "not found" in error:
+        return 404, {"error": error}
+    else:
+        return 400, {"error": error}
+
+# Sync endpoint (JWT auth required)
+@api.get("/sync", response={200: SyncResponse, 400: ErrorResponse})
+def sync_changes(request, since: str = None):
+    result, error = get_changes(request, since)
     if result:
         return result
     else:
+        return 400, {"error": error}
+
+# Export job endpoints (staff only)
+def _export_job_error(error):
+    if "not found" in error:
         return 404, {"error": error}
+    elif "Staff" in error:
+        return 403, {"error": error}
+    else:
+        return 400, {"error": error}
+
+@api.post("/exports", response={200: ExportJobResponse, 400: ErrorResponse, 403: ErrorResponse, 404: ErrorResponse})
+def export_job_create(request, payload: ExportJobCreateRequest):
+    result, error = create_export_job(request, payload)
+    return result if result else _export_job_error(error)
+
+@api.get("/exports/{job_id}", response={200: ExportJobResponse, 403: ErrorResponse, 404: ErrorResponse})
+def export_job_status(request, job_id: str):
+    result, error = get_export_job(request, job_id)
+    return result if result else _export_job_error(error)
+
+@api.get("/exports/{job_id}/download", response={400: ErrorResponse, 403: ErrorResponse, 404: ErrorResponse})
+def export_job_download(request, job_id: str):
+    result, error = download_export_job(request, job_id)
+    return result if result else _export_job_error(error)
+
+# Metrics endpoint (staff only; JWT or an admin session)
+@api.get("/metrics", auth=[JWTAuth(), django_auth], include_in_schema=False,
+         response={403: ErrorResponse})
+def metrics(request):
+    if not request.auth.is_staff:
+        return 403, {"error": "Staff access required"}
+    return HttpResponse(render_prometheus(), content_type=CONTENT_TYPE)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
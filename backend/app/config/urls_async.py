@@ -0,0 +1,109 @@
+"""
+URL configuration for ASGI deployments (ASYNC_API=1, set by config/asgi.py)
+
+The client search, note list, note create and auth routes are served by
+async handlers on the async ORM, so a request waiting on the database does
+not hold a thread. Every other route falls through to the sync API in
+config.urls, which is mounted under the same prefix after this one.
+"""
+from django.urls import path
+from django.db import OperationalError
+from django.http import HttpResponse
+from ninja import NinjaAPI
+from ninja.decorators import decorate_view
+from datetime import datetime
+from config.auth import AsyncJWTAuth
+from config.metrics import TimedJSONRenderer
+from config.renderers import trusted_response
+from config.response_cache import cached_route, caseworker_tags, client_tags
+from config.routers import replica_reads
+from config.urls import database_busy, urlpatterns as sync_urlpatterns
+
+from accounts.views import alogin_user, arefresh_token
+from accounts.schemas import (
+    LoginRequest, LoginResponse, RefreshTokenRequest, RefreshTokenResponse, ErrorResponse
+)
+from clients.views import asearch_clients
+from clients.schemas import ClientSearchPaginatedResponse
+from case_notes.exports import aexport_client_case_notes
+from case_notes.views import acreate_case_note, aget_client_case_notes
+from case_notes.schemas import CaseNoteCreateRequest, CaseNoteCreateResponse, CaseNotesListResponse
+
+# The sync API publishes the OpenAPI schema and docs for both
+api = NinjaAPI(title="Case Note Management API (async)", version="1.0.0", urls_namespace="api-async",
+               auth=AsyncJWTAuth(), renderer=TimedJSONRenderer(), docs_url=None, openapi_url=None)
+api.add_exception_handler(OperationalError, database_busy)
+
+# Authentication endpoints (no auth required)
+@api.post("/auth/login", response={200: LoginResponse, 401: ErrorResponse}, auth=None)
+async def auth_login(request, payload: LoginRequest):
+    result = await alogin_user(request, payload.username, payload.password)
+    if result:
+        return result
+    else:
+        return 401, {"error": "Invalid credentials"}
+
+@api.post("/auth/refresh", response={200: RefreshTokenResponse, 401: ErrorResponse}, auth=None)
+async def auth_refresh(request, payload: RefreshTokenRequest):
+    result = await arefresh_token(payload.refresh_token)
+    if result:
+        return result
+    else:
+        return 401, {"error": "Invalid refresh token"}
+
+# Client endpoints (JWT auth required)
+@api.get("/clients/search", response={200: ClientSearchPaginatedResponse, 400: ErrorResponse})
+@decorate_view(cached_route('clients.search', caseworker_tags))
+async def client_search(request, response: HttpResponse, q: str = "", page: int = 1, page_size: int = 10,
+                        after: str = None, include_total: bool = True):
+    with replica_reads(request.auth):
+        result, error = await asearch_clients(request, q, page, page_size, after, include_total,
+                                              response=response)
+    if result:
+        return trusted_response(api, request, response, result)
+    else:
+        return 400, {"error": error}
+
+# Case note endpoints (JWT auth required)
+@api.post("/case-notes/", response={200: CaseNoteCreateResponse, 400: ErrorResponse, 404: ErrorResponse})
+async def case_note_create(request, payload: CaseNoteCreateRequest):
+    result, error = await acreate_case_note(request, payload)
+    if result:
+        return result
+    elif "not found" in error:
+        return 404, {"error": error}
+    else:
+        return 400, {"error": error}
+
+@api.get("/case-notes/client/{client_id}", response={200: CaseNotesListResponse, 400: ErrorResponse, 404: ErrorResponse})
+@decorate_view(cached_route('case_notes.list', client_tags))
+async def case_note_list(request, response: HttpResponse, client_id: str, interaction_type: str = None,
+                         created_after: datetime = None, created_before: datetime = None,
+                         limit: int = None, after: str = None):
+    with replica_reads(request.auth):
+        result, error = await aget_client_case_notes(
+            request, client_id, interaction_type, created_after, created_before, limit, after,
+            response=response
+        )
+    if result:
+        return trusted_response(api, request, response, result)
+    elif "not found" in error:
+        return 404, {"error": error}
+    else:
+        return 400, {"error": error}
+
+@api.get("/case-notes/client/{client_id}/export", response={400: ErrorResponse, 404: ErrorResponse})
+async def case_note_export(request, client_id: str, format: str = "ndjson", gzip: bool = False):
+    result, error = await aexport_client_case_notes(request, client_id, format, gzip)
+    if result:
+        return result
+    elif "not found" in error:
+        return 404, {"error": error}
+    else:
+        return 400, {"error": error}
+
+# Matched first; the sync URLconf (admin and the full sync API) after it
+urlpatterns = [
+    path('api/', api.urls),
+    *sync_urlpatterns,
+]
@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from .models import ExportJob
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'scope', 'target', 'format', 'status', 'parts_done', 'parts_total',
+                    'row_count', 'requested_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'scope', 'format')
+    list_select_related = ('requested_by',)
+    ordering = ('-created_at',)
+
+    def has_add_permission(self, request):
+        # Jobs are submitted through POST /api/exports, which also runs them
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,64 @@
+"""
+Django management command to delete expired export jobs and their archives
+"""
+import shutil
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from export_jobs.models import ExportJob
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete export jobs older than EXPORT_RETENTION_DAYS with their archives, and files in '
+        'EXPORT_ROOT left behind by jobs that no longer run'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interrupted',
+            action='store_true',
+            help='First mark every pending or running job failed. Jobs run inside the web '
+                 'processes, so use this only while none is up, e.g. at startup.'
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        if options['interrupted']:
+            failed = ExportJob.objects.filter(status__in=['pending', 'running']).update(
+                status='failed', error='Interrupted by a server restart', finished_at=now
+            )
+            self.stdout.write(f'⚠️  Marked {failed} interrupted export jobs failed')
+
+        cutoff = now - timedelta(days=settings.EXPORT_RETENTION_DAYS)
+        expired = ExportJob.objects.filter(created_at__lt=cutoff).exclude(status__in=['pending', 'running'])
+        for job in expired.only('pk'):
+            job.archive_path.unlink(missing_ok=True)
+        deleted, _ = expired.delete()
+
+        # Archives of deleted jobs, and the work directories and partial
+        # archives of jobs that died without cleaning up after themselves.
+        # Listed before the jobs are read, so a job started meanwhile is not
+        # mistaken for a dead one.
+        root = settings.EXPORT_ROOT
+        paths = list(root.iterdir()) if root.exists() else []
+        active = {str(pk) for pk in ExportJob.objects.filter(status__in=['pending', 'running'])
+                  .values_list('pk', flat=True)}
+        done = {str(pk) for pk in ExportJob.objects.filter(status='done').values_list('pk', flat=True)}
+        removed = 0
+        for path in paths:
+            job_id = path.name.split('.')[0]
+            if job_id in active or (path.suffix == '.zip' and job_id in done):
+                continue
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink(missing_ok=True)
+            removed += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'🧹 Deleted {deleted} export jobs older than {cutoff:%Y-%m-%d} and {removed} stray files'
+        ))
@@ -0,0 +1,59 @@
+import uuid
+
+from django.conf import settings
+from django.db import models
+
+
+class ExportJob(models.Model):
+    """
+    A background export of every case note of one caseworker's caseload or of
+    a whole department, written to a zip archive with one file per caseworker.
+    """
+
+    SCOPES = [
+        ('caseworker', 'Caseworker'),
+        ('department', 'Department'),
+    ]
+
+    FORMATS = [
+        ('ndjson', 'NDJSON'),
+        ('csv', 'CSV'),
+    ]
+
+    STATUSES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='export_jobs'
+    )
+    scope = models.CharField(max_length=20, choices=SCOPES)
+    # The caseworker's id, or the department's name
+    target = models.CharField(max_length=100)
+    format = models.CharField(max_length=10, choices=FORMATS, default='ndjson')
+    status = models.CharField(max_length=20, choices=STATUSES, default='pending')
+    parts_total = models.PositiveIntegerField(default=0)
+    parts_done = models.PositiveIntegerField(default=0)
+    row_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Export Job"
+        verbose_name_plural = "Export Jobs"
+
+    def __str__(self):
+        return f"{self.get_scope_display()} export of {self.target} ({self.get_status_display()})"
+
+    @property
+    def archive_path(self):
+        return settings.EXPORT_ROOT / f'{self.pk}.zip'
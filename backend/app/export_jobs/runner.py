@@ -0,0 +1,179 @@
+"""
+Running export jobs
+
+submit() queues a job once the transaction that created it commits. Jobs run
+one at a time on a dispatcher thread, and each job writes every caseworker's
+notes to a part file of its own on a pool of EXPORT_MAX_WORKERS processes.
+The workers are spawned fresh (no database connections inherited from the
+web process) and run at a lowered CPU priority, EXPORT_WORKER_NICE, so a
+large export never starves the API's workers. Each reads its rows in chunks
+of EXPORT_CHUNK_SIZE, from the replica when it is fresh enough. The parts
+are then deflated into the job's zip archive under EXPORT_ROOT.
+
+The queue lives in the web process, so the one-job-at-a-time limit is per
+web process, and jobs queued or running when it stops are lost; the
+prune_export_jobs command fails those at startup and deletes expired
+archives.
+
+A worker that dies breaks the pool: the job it was working on fails and
+the next job starts a new pool.
+
+With EXPORT_MAX_WORKERS = 0 a job runs inline, in the thread that
+submitted it, as in tests and development.
+"""
+import multiprocessing
+import shutil
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from case_notes.exports import EXPORT_FORMATS, ExportEncoder
+from case_notes.models import CaseNote
+from case_notes.views import NOTE_LIST_FIELDS
+from config.routers import replica_reads
+from .models import ExportJob
+from .worker import init_worker
+
+_lock = threading.Lock()
+_dispatcher = None
+_pool = None
+
+
+def _job_dispatcher():
+    global _dispatcher
+    with _lock:
+        if _dispatcher is None:
+            _dispatcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix='export-jobs')
+        return _dispatcher
+
+
+def _process_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            database_names = {alias: connections[alias].settings_dict['NAME'] for alias in connections}
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.EXPORT_MAX_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker,
+                initargs=(database_names, settings.EXPORT_WORKER_NICE),
+            )
+        return _pool
+
+
+def _discard_pool(pool):
+    """Drop a pool broken by a dead worker; the next _process_pool() starts a new one"""
+    global _pool
+    with _lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def submit(job):
+    """Run `job` in the background once the current transaction commits"""
+    if settings.EXPORT_MAX_WORKERS == 0:
+        transaction.on_commit(lambda: run_job(job.pk))
+    else:
+        transaction.on_commit(lambda: _job_dispatcher().submit(_run_in_background, job.pk))
+
+
+def _run_in_background(job_id):
+    try:
+        run_job(job_id)
+    finally:
+        # The dispatcher thread outlives the job; don't leave its connections open
+        connections.close_all()
+
+
+def job_caseworkers(job):
+    """(id, username) of every caseworker the job covers who has clients"""
+    users = get_user_model().objects.filter(assigned_clients__isnull=False).distinct()
+    if job.scope == 'department':
+        users = users.filter(department=job.target)
+    else:
+        users = users.filter(pk=job.target)
+    return list(users.order_by('username').values_list('id', 'username'))
+
+
+def write_part(caseworker_id, export_format, path):
+    """Write every note of one caseworker's clients to `path`; returns the row count"""
+    rows = CaseNote.objects.filter(
+        client__assigned_caseworker_id=caseworker_id
+    ).order_by('client_id', 'created_at', 'id').values(*NOTE_LIST_FIELDS, 'client__client_id')
+    encoder = ExportEncoder(export_format, with_client=True)
+    count = 0
+    with replica_reads(), open(path, 'wb') as part:
+        part.write(encoder.header() or b'')
+        for row in rows.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+            part.write(encoder.row(row) or b'')
+            count += 1
+        part.write(encoder.finish() or b'')
+    return count
+
+
+def _write_parts(parts, export_format):
+    """Write the parts, yielding each one's row count as it finishes"""
+    if settings.EXPORT_MAX_WORKERS == 0:
+        for caseworker_id, path in parts:
+            yield write_part(caseworker_id, export_format, path)
+        return
+
+    def submit_all(pool):
+        return [pool.submit(write_part, caseworker_id, export_format, path) for caseworker_id, path in parts]
+
+    pool = _process_pool()
+    try:
+        futures = submit_all(pool)
+    except BrokenProcessPool:
+        # A worker died since the last job; nothing of this one has run yet
+        _discard_pool(pool)
+        pool = _process_pool()
+        futures = submit_all(pool)
+    try:
+        for future in as_completed(futures):
+            yield future.result()
+    except BrokenProcessPool:
+        # Fail this job, but let the next one start with fresh workers
+        _discard_pool(pool)
+        raise
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def run_job(job_id):
+    """Export everything the job covers into its archive, recording progress on the job"""
+    job = ExportJob.objects.get(pk=job_id)
+    jobs = ExportJob.objects.filter(pk=job_id)
+    jobs.update(status='running', started_at=timezone.now())
+    workdir = settings.EXPORT_ROOT / str(job.pk)
+    partial = job.archive_path.with_suffix('.zip.part')
+    try:
+        workdir.mkdir(parents=True, exist_ok=True)
+        extension = EXPORT_FORMATS[job.format][1]
+        parts = [(caseworker_id, workdir / f'{username}.{extension}')
+                 for caseworker_id, username in job_caseworkers(job)]
+        jobs.update(parts_total=len(parts))
+
+        for count in _write_parts(parts, job.format):
+            jobs.update(parts_done=F('parts_done') + 1, row_count=F('row_count') + count)
+
+        with zipfile.ZipFile(partial, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for _, path in parts:
+                archive.write(path, path.name)
+        partial.replace(job.archive_path)
+    except Exception as exc:
+        partial.unlink(missing_ok=True)
+        jobs.update(status='failed', error=f'{type(exc).__name__}: {exc}', finished_at=timezone.now())
+    else:
+        jobs.update(status='done', finished_at=timezone.now())
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
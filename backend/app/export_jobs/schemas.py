@@ -0,0 +1,26 @@
+"""
+Export Job API Schemas
+"""
+from ninja import Schema
+from typing import Optional
+
+
+class ExportJobCreateRequest(Schema):
+    scope: str  # 'caseworker' or 'department'
+    target: str  # the caseworker's id, or the department's name
+    format: str = 'ndjson'
+
+
+class ExportJobResponse(Schema):
+    id: str
+    scope: str
+    target: str
+    format: str
+    status: str
+    parts_total: int
+    parts_done: int
+    row_count: int
+    error: str
+    created_at: str
+    finished_at: Optional[str] = None
+    download_url: Optional[str] = None
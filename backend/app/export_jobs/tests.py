@@ -0,0 +1,210 @@
+"""
+Test cases for the export_jobs app
+"""
+import csv
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
+from io import StringIO
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from case_notes.models import CaseNote
+from clients.models import Client
+from . import runner
+from .models import ExportJob
+
+User = get_user_model()
+
+
+class FakePool:
+    """ProcessPoolExecutor stand-in running tasks inline; `broken` makes it behave like a pool whose worker died"""
+    created = []
+
+    def __init__(self, **kwargs):
+        self.broken = None
+        self.shut_down = False
+        FakePool.created.append(self)
+
+    def submit(self, fn, *args):
+        if self.broken == 'submit':
+            raise BrokenProcessPool('A child process terminated abruptly')
+        future = Future()
+        if self.broken == 'result':
+            future.set_exception(BrokenProcessPool('A child process terminated abruptly'))
+        else:
+            future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+
+class ExportJobTest(TestCase):
+    """Test cases for /api/exports, with jobs run inline"""
+
+    def setUp(self):
+        self.export_root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.export_root, ignore_errors=True)
+        settings = override_settings(EXPORT_MAX_WORKERS=0, EXPORT_ROOT=self.export_root, EXPORT_CHUNK_SIZE=2)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.supervisor = User.objects.create_user(username='supervisor', password='testpass123', is_staff=True)
+        self.caseworker = User.objects.create_user(username='caseworker1', password='testpass123',
+                                                   first_name='John', last_name='Doe', department='North')
+        self.colleague = User.objects.create_user(username='caseworker2', password='testpass123',
+                                                  department='North')
+        User.objects.create_user(username='caseworker3', password='testpass123', department='North')
+        other = User.objects.create_user(username='caseworker4', password='testpass123', department='South')
+        for i, caseworker in enumerate([self.caseworker, self.caseworker, self.colleague, other]):
+            client = Client.objects.create(client_id=f'CL-2024-{i:03d}', first_name='Client', last_name=str(i),
+                                           assigned_caseworker=caseworker)
+            for n in range(3):
+                CaseNote.objects.create(client=client, content=f'Note {n}', created_by=caseworker)
+
+        self.auth = self.auth_for(self.supervisor)
+
+    def auth_for(self, user):
+        return {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+    def submit(self, scope, target, export_format='ndjson', auth=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/exports', {'scope': scope, 'target': target, 'format': export_format},
+                                    content_type='application/json', **(auth or self.auth))
+
+    def download(self, job_id):
+        response = self.client.get(f'/api/exports/{job_id}/download', **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        return zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+    def test_department_export(self):
+        """One file per caseworker with clients in the department"""
+        response = self.submit('department', 'North')
+        self.assertEqual(response.status_code, 200)
+        job_id = response.json()['id']
+
+        status = self.client.get(f'/api/exports/{job_id}', **self.auth).json()
+        self.assertEqual(status['status'], 'done')
+        self.assertEqual((status['parts_done'], status['parts_total'], status['row_count']), (2, 2, 9))
+        self.assertEqual(status['download_url'], f'/api/exports/{job_id}/download')
+
+        archive = self.download(job_id)
+        self.assertEqual(archive.namelist(), ['caseworker1.ndjson', 'caseworker2.ndjson'])
+        notes = [json.loads(line) for line in archive.read('caseworker1.ndjson').splitlines()]
+        self.assertEqual(len(notes), 6)
+        self.assertEqual({note['client_id'] for note in notes}, {'CL-2024-000', 'CL-2024-001'})
+        self.assertEqual(notes[0]['created_by']['name'], 'John Doe')
+        self.assertEqual(list(self.export_root.iterdir()), [self.export_root / f'{job_id}.zip'])
+
+    def test_caseworker_export_as_csv(self):
+        job_id = self.submit('caseworker', str(self.colleague.pk), 'csv').json()['id']
+        rows = list(csv.reader(io.StringIO(self.download(job_id).read('caseworker2.csv').decode())))
+        self.assertEqual(rows[0][:2], ['client_id', 'id'])
+        self.assertEqual([row[0] for row in rows[1:]], ['CL-2024-002'] * 3)
+
+    def test_requires_staff(self):
+        response = self.submit('department', 'North', auth=self.auth_for(self.caseworker))
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(ExportJob.objects.exists())
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.submit('department', 'Nowhere').status_code, 404)
+        self.assertEqual(self.submit('caseworker', '999').status_code, 404)
+        self.assertEqual(self.submit('team', 'North').status_code, 400)
+        self.assertEqual(self.submit('department', 'North', 'xml').status_code, 400)
+
+    def test_jobs_are_private_to_their_requester(self):
+        job_id = self.submit('department', 'South').json()['id']
+        other_supervisor = User.objects.create_user(username='supervisor2', password='testpass123', is_staff=True)
+        response = self.client.get(f'/api/exports/{job_id}', **self.auth_for(other_supervisor))
+        self.assertEqual(response.status_code, 404)
+
+    def test_unfinished_job_cannot_be_downloaded(self):
+        job = ExportJob.objects.create(requested_by=self.supervisor, scope='department', target='North')
+        response = self.client.get(f'/api/exports/{job.id}/download', **self.auth)
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(self.client.get(f'/api/exports/{job.id}', **self.auth).json()['download_url'])
+
+
+    def use_fake_pool(self):
+        """Run parts on a FakePool, as EXPORT_MAX_WORKERS > 0 does on real worker processes"""
+        settings = override_settings(EXPORT_MAX_WORKERS=2)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        patcher = mock.patch.object(runner, 'ProcessPoolExecutor', FakePool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        FakePool.created = []
+        runner._pool = None
+        self.addCleanup(setattr, runner, '_pool', None)
+
+    def department_job(self):
+        return ExportJob.objects.create(requested_by=self.supervisor, scope='department', target='North')
+
+    def test_pool_broken_before_the_job_is_replaced(self):
+        self.use_fake_pool()
+        runner._process_pool().broken = 'submit'
+        job = self.department_job()
+        runner.run_job(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.parts_done, job.row_count), ('done', 2, 9))
+        broken, fresh = FakePool.created
+        self.assertTrue(broken.shut_down)
+        self.assertIs(runner._process_pool(), fresh)
+
+    def test_pool_broken_during_a_job_fails_only_that_job(self):
+        self.use_fake_pool()
+        runner._process_pool().broken = 'result'
+        failed = self.department_job()
+        runner.run_job(failed.pk)
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, 'failed')
+        self.assertIn('BrokenProcessPool', failed.error)
+
+        job = self.department_job()
+        runner.run_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(len(FakePool.created), 2)
+
+    def test_failed_job_leaves_no_files(self):
+        job = self.department_job()
+        with mock.patch.object(zipfile.ZipFile, 'write', side_effect=OSError('No space left on device')):
+            runner.run_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(list(self.export_root.iterdir()), [])
+
+    def test_prune_export_jobs(self):
+        kept = self.submit('department', 'North').json()['id']
+        expired = self.submit('department', 'South').json()['id']
+        ExportJob.objects.filter(pk=expired).update(created_at=timezone.now() - timedelta(days=8))
+        running = ExportJob.objects.create(requested_by=self.supervisor, scope='department', target='North',
+                                           status='running')
+        (self.export_root / str(running.pk)).mkdir()
+        (self.export_root / 'crashed-job.zip.part').write_bytes(b'PK')
+
+        with override_settings(EXPORT_RETENTION_DAYS=7):
+            call_command('prune_export_jobs', stdout=StringIO())
+        self.assertEqual({str(pk) for pk in ExportJob.objects.values_list('pk', flat=True)}, {kept, str(running.pk)})
+        self.assertEqual(sorted(path.name for path in self.export_root.iterdir()),
+                         sorted([f'{kept}.zip', str(running.pk)]))
+
+        call_command('prune_export_jobs', interrupted=True, stdout=StringIO())
+        running.refresh_from_db()
+        self.assertEqual((running.status, running.error), ('failed', 'Interrupted by a server restart'))
+        self.assertEqual([path.name for path in self.export_root.iterdir()], [f'{kept}.zip'])
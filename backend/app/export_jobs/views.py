@@ -0,0 +1,102 @@
+"""
+Export Job API Views
+"""
+from django.contrib.auth import get_user_model
+from django.http import FileResponse
+
+from case_notes.exports import export_format_error
+from .models import ExportJob
+from .runner import submit
+
+STAFF_REQUIRED = "Staff access required"
+
+
+def _staff_user(request):
+    user = getattr(request, 'auth', None) or getattr(request, 'user', None)
+    if not user or not user.is_authenticated:
+        return None, "Authentication required"
+    if not user.is_staff:
+        return None, STAFF_REQUIRED
+    return user, None
+
+
+def serialize_job(job):
+    return {
+        "id": str(job.id),
+        "scope": job.scope,
+        "target": job.target,
+        "format": job.format,
+        "status": job.status,
+        "parts_total": job.parts_total,
+        "parts_done": job.parts_done,
+        "row_count": job.row_count,
+        "error": job.error,
+        "created_at": job.created_at.isoformat(),
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "download_url": f"/api/exports/{job.id}/download" if job.status == 'done' else None,
+    }
+
+
+def create_export_job(request, payload):
+    """
+    Queue an export of every case note of a caseworker's caseload, or of all
+    caseworkers in a department. Staff only; poll the job for its progress.
+    """
+    user, error = _staff_user(request)
+    if error:
+        return None, error
+
+    error = export_format_error(payload.format)
+    if error:
+        return None, error
+
+    caseworkers = get_user_model().objects.all()
+    if payload.scope == 'caseworker':
+        if not payload.target.isdigit() or not caseworkers.filter(pk=payload.target).exists():
+            return None, "Caseworker not found"
+    elif payload.scope == 'department':
+        if not payload.target or not caseworkers.filter(department=payload.target).exists():
+            return None, "Department not found"
+    else:
+        return None, "Invalid scope. Must be one of: caseworker, department"
+
+    job = ExportJob.objects.create(
+        requested_by=user, scope=payload.scope, target=payload.target, format=payload.format
+    )
+    submit(job)
+    return serialize_job(job), None
+
+
+def _own_job(request, job_id):
+    user, error = _staff_user(request)
+    if error:
+        return None, error
+    try:
+        return ExportJob.objects.get(id=job_id, requested_by=user), None
+    except (ExportJob.DoesNotExist, ValueError):
+        return None, "Export job not found"
+
+
+def get_export_job(request, job_id: str):
+    """The status and progress of one of the caller's export jobs"""
+    job, error = _own_job(request, job_id)
+    if error:
+        return None, error
+    return serialize_job(job), None
+
+
+def download_export_job(request, job_id: str):
+    """Stream a finished job's zip archive"""
+    job, error = _own_job(request, job_id)
+    if error:
+        return None, error
+    if job.status != 'done':
+        return None, "Export job is not finished"
+    try:
+        archive = open(job.archive_path, 'rb')
+    except FileNotFoundError:
+        return None, "Export archive not found"
+    return FileResponse(
+        archive, as_attachment=True, content_type='application/zip',
+        filename=f'case-notes-{job.scope}-{job.target}.zip'
+    ), None
@@ -0,0 +1,20 @@
+"""
+Start-up of the export worker processes
+
+Kept free of model imports: a spawned worker imports this module before
+Django is set up.
+"""
+import os
+
+
+def init_worker(database_names, niceness):
+    """Set up Django in a fresh worker process, on the parent's databases"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    from django.conf import settings
+    for alias, name in database_names.items():
+        settings.DATABASES[alias]['NAME'] = name
+
+    import django
+    django.setup()
+    if niceness:
+        os.nice(niceness)
@@ -0,0 +1,21 @@
+"""
+Django management command to delete expired sync change log entries
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from sync.models import ChangeLogEntry
+
+
+class Command(BaseCommand):
+    help = 'Delete sync change log entries older than SYNC_LOG_RETENTION_DAYS'
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=settings.SYNC_LOG_RETENTION_DAYS)
+        deleted, _ = ChangeLogEntry.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(
+            self.style.SUCCESS(f'🧹 Deleted {deleted} change log entries older than {cutoff:%Y-%m-%d}')
+        )
@@ -0,0 +1,39 @@
+from django.db import models
+from django.conf import settings
+
+
+class ChangeLogEntry(models.Model):
+    """
+    A change to a caseworker's caseload that cannot be seen through
+    `updated_at`: a deletion, or a client moving between caseworkers.
+    The auto-incrementing id doubles as the sync watermark.
+    """
+
+    ENTITY_TYPES = [
+        ('client', 'Client'),
+        ('case_note', 'Case Note'),
+    ]
+
+    ACTIONS = [
+        ('deleted', 'Deleted'),
+        ('revoked', 'Reassigned Away'),
+        ('granted', 'Reassigned In'),
+    ]
+
+    caseworker = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='sync_changes'
+    )
+    entity = models.CharField(max_length=20, choices=ENTITY_TYPES)
+    object_id = models.UUIDField()
+    action = models.CharField(max_length=20, choices=ACTIONS)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Change Log Entry"
+        verbose_name_plural = "Change Log Entries"
+
+    def __str__(self):
+        return f"{self.get_action_display()} {self.get_entity_display()} {self.object_id}"
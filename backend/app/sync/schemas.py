@@ -0,0 +1,41 @@
+"""
+Sync API Schemas
+"""
+from ninja import Schema
+from typing import List
+
+
+class SyncClient(Schema):
+    id: str
+    client_id: str
+    first_name: str
+    last_name: str
+    updated_at: str
+
+
+class SyncAuthor(Schema):
+    id: str
+    name: str
+
+
+class SyncCaseNote(Schema):
+    id: str
+    client_id: str
+    content: str
+    interaction_type: str
+    created_at: str
+    updated_at: str
+    created_by: SyncAuthor
+
+
+class SyncDeletion(Schema):
+    entity: str
+    id: str
+
+
+class SyncResponse(Schema):
+    full: bool
+    clients: List[SyncClient]
+    case_notes: List[SyncCaseNote]
+    deleted: List[SyncDeletion]
+    watermark: str
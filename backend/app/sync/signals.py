@@ -0,0 +1,54 @@
+"""
+Record deletions and reassignments in the sync change log
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from case_notes.models import CaseNote
+from case_notes.signals import deleted_with_client
+from clients.models import Client
+from .models import ChangeLogEntry
+
+
+@receiver(post_save, sender=Client)
+def log_client_reassignment(sender, instance, created, **kwargs):
+    previous = instance.loaded_caseworker_id
+    if created or previous is None or previous == instance.assigned_caseworker_id:
+        return
+    ChangeLogEntry.objects.bulk_create([
+        ChangeLogEntry(caseworker_id=previous, entity='client',
+                       object_id=instance.pk, action='revoked'),
+        ChangeLogEntry(caseworker_id=instance.assigned_caseworker_id, entity='client',
+                       object_id=instance.pk, action='granted'),
+    ])
+
+
+@receiver(post_delete, sender=Client)
+def log_client_deletion(sender, instance, **kwargs):
+    ChangeLogEntry.objects.create(
+        caseworker_id=instance.assigned_caseworker_id,
+        entity='client',
+        object_id=instance.pk,
+        action='deleted'
+    )
+
+
+@receiver(post_delete, sender=CaseNote)
+def log_case_note_deletion(sender, instance, origin=None, **kwargs):
+    if deleted_with_client(origin):
+        # The client's tombstone drops its notes from the mirror
+        return
+    if CaseNote.client.is_cached(instance):
+        caseworker_id = instance.client.assigned_caseworker_id
+    else:
+        caseworker_id = Client.objects.filter(pk=instance.client_id).values_list(
+            'assigned_caseworker_id', flat=True
+        ).first()
+    if caseworker_id is None:
+        return
+    ChangeLogEntry.objects.create(
+        caseworker_id=caseworker_id,
+        entity='case_note',
+        object_id=instance.pk,
+        action='deleted'
+    )
@@ -0,0 +1,143 @@
+"""
+Test cases for the sync app
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from case_notes.models import CaseNote
+from clients.models import Client
+from config.pagination import encode_cursor
+from .models import ChangeLogEntry
+
+User = get_user_model()
+
+# The project's overlap; DeltaSyncTest turns it off to keep watermarks exact
+DEFAULT_OVERLAP_SECONDS = settings.SYNC_WATERMARK_OVERLAP_SECONDS
+
+
+@override_settings(SYNC_WATERMARK_OVERLAP_SECONDS=0)
+class DeltaSyncTest(TestCase):
+    """Test cases for GET /api/sync"""
+
+    def setUp(self):
+        self.caseworker = User.objects.create_user(username='caseworker1', password='testpass123')
+        self.other_caseworker = User.objects.create_user(username='caseworker2', password='testpass123')
+        self.alice = Client.objects.create(
+            client_id='CL-2024-001', first_name='Alice', last_name='Johnson',
+            assigned_caseworker=self.caseworker
+        )
+        self.bob = Client.objects.create(
+            client_id='CL-2024-002', first_name='Bob', last_name='Smith',
+            assigned_caseworker=self.other_caseworker
+        )
+        self.note = CaseNote.objects.create(
+            client=self.alice, content='Initial assessment.', created_by=self.caseworker
+        )
+        token = RefreshToken.for_user(self.caseworker).access_token
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def sync(self, since=None):
+        params = {'since': since} if since else {}
+        response = self.client.get('/api/sync', params, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_initial_sync_returns_whole_caseload(self):
+        """Without a watermark the full caseload comes back"""
+        data = self.sync()
+        self.assertTrue(data['full'])
+        self.assertEqual([c['client_id'] for c in data['clients']], ['CL-2024-001'])
+        self.assertEqual([n['id'] for n in data['case_notes']], [str(self.note.id)])
+        self.assertEqual(data['case_notes'][0]['client_id'], str(self.alice.id))
+
+    def test_unchanged_caseload_returns_nothing(self):
+        """A refresh with no changes is empty"""
+        watermark = self.sync()['watermark']
+        data = self.sync(watermark)
+        self.assertFalse(data['full'])
+        self.assertEqual((data['clients'], data['case_notes'], data['deleted']), ([], [], []))
+
+    def test_only_changed_rows_are_returned(self):
+        """New and edited rows appear after the watermark"""
+        watermark = self.sync()['watermark']
+        new_note = CaseNote.objects.create(client=self.alice, content='Follow-up.', created_by=self.caseworker)
+        self.alice.last_name = 'Johnston'
+        self.alice.save()
+
+        data = self.sync(watermark)
+        self.assertEqual([n['id'] for n in data['case_notes']], [str(new_note.id)])
+        self.assertEqual([c['last_name'] for c in data['clients']], ['Johnston'])
+
+    def test_deletions_are_reported(self):
+        """Deleted notes and clients come back as tombstones"""
+        watermark = self.sync()['watermark']
+        note_id = str(self.note.id)
+        self.note.delete()
+
+        data = self.sync(watermark)
+        self.assertEqual(data['deleted'], [{'entity': 'case_note', 'id': note_id}])
+
+        client_id = str(self.alice.id)
+        self.alice.delete()
+        data = self.sync(data['watermark'])
+        self.assertEqual(data['deleted'], [{'entity': 'client', 'id': client_id}])
+
+    def test_reassignment_moves_client_and_history(self):
+        """Reassignment revokes the client from one mirror and grants it, with notes, to the other"""
+        other_auth = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(self.other_caseworker).access_token}'}
+        mine = self.sync()['watermark']
+        theirs = self.client.get('/api/sync', **other_auth).json()['watermark']
+
+        alice = Client.objects.get(pk=self.alice.pk)
+        alice.assigned_caseworker = self.other_caseworker
+        alice.save()
+
+        data = self.sync(mine)
+        self.assertEqual(data['deleted'], [{'entity': 'client', 'id': str(self.alice.id)}])
+
+        data = self.client.get('/api/sync', {'since': theirs}, **other_auth).json()
+        self.assertEqual([c['client_id'] for c in data['clients']], ['CL-2024-001'])
+        self.assertEqual([n['id'] for n in data['case_notes']], [str(self.note.id)])
+        self.assertEqual(data['deleted'], [])
+
+    def test_expired_watermark_forces_full_sync(self):
+        """Watermarks older than the log retention get the full caseload"""
+        stale = encode_cursor((timezone.now() - timedelta(days=365)).isoformat(), 0)
+        data = self.sync(stale)
+        self.assertTrue(data['full'])
+        self.assertEqual(len(data['clients']), 1)
+
+    def test_late_commit_is_not_missed(self):
+        """A note stamped well before the watermark but committed after it, e.g. by a long import batch, still syncs"""
+        with override_settings(SYNC_WATERMARK_OVERLAP_SECONDS=DEFAULT_OVERLAP_SECONDS):
+            watermark = self.sync()['watermark']
+            late = CaseNote.objects.create(client=self.alice, content='Imported.', created_by=self.caseworker)
+            CaseNote.objects.filter(pk=late.pk).update(updated_at=timezone.now() - timedelta(seconds=20))
+            data = self.sync(watermark)
+        # Rows from the overlap window come back again too; upserts are idempotent
+        self.assertIn(str(late.id), [n['id'] for n in data['case_notes']])
+
+    def test_invalid_watermark(self):
+        """A malformed watermark is rejected"""
+        response = self.client.get('/api/sync', {'since': 'garbage'}, **self.auth)
+        self.assertEqual(response.status_code, 400)
+
+
+class ChangeLogTest(TestCase):
+    """Test cases for change log bookkeeping"""
+
+    def test_plain_edit_is_not_logged(self):
+        """Edits without reassignment are visible through updated_at alone"""
+        caseworker = User.objects.create_user(username='caseworker1', password='testpass123')
+        client = Client.objects.create(
+            client_id='CL-2024-001', first_name='Alice', last_name='Johnson',
+            assigned_caseworker=caseworker
+        )
+        client.first_name = 'Alicia'
+        client.save()
+        self.assertFalse(ChangeLogEntry.objects.exists())
@@ -0,0 +1,111 @@
+"""
+Sync API Views
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from case_notes.models import CaseNote
+from case_notes.views import NOTE_LIST_FIELDS, serialize_note_row
+from clients.models import Client
+from config.pagination import InvalidCursor, decode_cursor, encode_cursor
+from .models import ChangeLogEntry
+
+CLIENT_SYNC_FIELDS = ('id', 'client_id', 'first_name', 'last_name', 'updated_at')
+
+
+def _parse_watermark(token):
+    updated_after, log_position = decode_cursor(token, 2)
+    try:
+        updated_after = parse_datetime(updated_after)
+        log_position = int(log_position)
+    except (TypeError, ValueError):
+        raise InvalidCursor("Invalid watermark")
+    if updated_after is None:
+        raise InvalidCursor("Invalid watermark")
+    return updated_after, log_position
+
+
+def get_changes(request, since: str = None):
+    """
+    Return the caller's clients and case notes that changed after the
+    `since` watermark, plus deletions and reassignments away from them, and
+    a new watermark to pass next time. Without `since` (or when it is older
+    than the change log retains) the whole caseload is returned and `full`
+    is set, telling the caller to replace its local copy.
+
+    Callers should apply `deleted` first, then upsert `clients` and
+    `case_notes`; upserts are idempotent, and responses may repeat rows
+    from a short overlap window before the previous watermark.
+    """
+    user = getattr(request, 'auth', None) or getattr(request, 'user', None)
+
+    if not user or not user.is_authenticated:
+        return None, "Authentication required"
+
+    started_at = timezone.now()
+    # Note the log position before reading rows, so a change committed while
+    # this request runs is picked up next time rather than lost
+    log_position = ChangeLogEntry.objects.filter(caseworker=user).aggregate(
+        position=Max('id')
+    )['position'] or 0
+
+    full = since is None
+    if since:
+        try:
+            updated_after, since_position = _parse_watermark(since)
+        except InvalidCursor as exc:
+            return None, str(exc)
+        retention = timedelta(days=settings.SYNC_LOG_RETENTION_DAYS)
+        full = updated_after < started_at - retention
+
+    clients = Client.objects.filter(assigned_caseworker=user)
+    case_notes = CaseNote.objects.filter(client__assigned_caseworker=user)
+    deleted = []
+
+    if not full:
+        changes = ChangeLogEntry.objects.filter(
+            caseworker=user, id__gt=since_position, id__lte=log_position
+        ).values_list('entity', 'object_id', 'action')
+
+        granted = []
+        for entity, object_id, action in changes:
+            if action == 'granted':
+                granted.append(object_id)
+            else:
+                deleted.append({"entity": entity, "id": str(object_id)})
+
+        clients = clients.filter(updated_at__gt=updated_after)
+        # A client reassigned to this caseworker brings its whole note history
+        case_notes = case_notes.filter(Q(updated_at__gt=updated_after) | Q(client_id__in=granted))
+
+    client_rows = [
+        {
+            "id": str(row['id']),
+            "client_id": row['client_id'],
+            "first_name": row['first_name'],
+            "last_name": row['last_name'],
+            "updated_at": row['updated_at'].isoformat(),
+        }
+        for row in clients.order_by().values(*CLIENT_SYNC_FIELDS)
+    ]
+    note_rows = [
+        dict(serialize_note_row(row),
+             client_id=str(row['client_id']),
+             updated_at=row['updated_at'].isoformat())
+        for row in case_notes.order_by().values(*NOTE_LIST_FIELDS, 'client_id', 'updated_at')
+    ]
+
+    overlap = timedelta(seconds=settings.SYNC_WATERMARK_OVERLAP_SECONDS)
+    watermark = encode_cursor((started_at - overlap).isoformat(), log_position)
+
+    return {
+        "full": full,
+        "clients": client_rows,
+        "case_notes": note_rows,
+        "deleted": deleted,
+        "watermark": watermark,
+    }, None
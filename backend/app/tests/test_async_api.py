@@ -0,0 +1,136 @@
+"""
+Tests for the async API served under ASGI (config/urls_async.py)
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from case_notes.models import CaseNote
+from clients.models import Client
+
+User = get_user_model()
+
+
+@override_settings(ROOT_URLCONF='config.urls_async')
+class AsyncAPITest(TestCase):
+    """The async routes answer exactly like their sync counterparts"""
+
+    def setUp(self):
+        self.caseworker1 = User.objects.create_user(username='caseworker1', password='password123')
+        self.caseworker2 = User.objects.create_user(username='caseworker2', password='password123')
+        self.client1 = Client.objects.create(
+            client_id='CL-2024-001',
+            first_name='Alice',
+            last_name='Johnson',
+            assigned_caseworker=self.caseworker1
+        )
+        self.client2 = Client.objects.create(
+            client_id='CL-2024-002',
+            first_name='Bob',
+            last_name='Smith',
+            assigned_caseworker=self.caseworker2
+        )
+        CaseNote.objects.create(client=self.client1, content='Initial assessment',
+                                interaction_type='in-person', created_by=self.caseworker1)
+        refresh = RefreshToken.for_user(self.caseworker1)
+        self.refresh_token = str(refresh)
+        self.headers = {'headers': {'Authorization': f'Bearer {refresh.access_token}'}}
+
+    async def test_login_and_refresh(self):
+        response = await self.async_client.post(
+            '/api/auth/login', {'username': 'caseworker1', 'password': 'password123'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['username'], 'caseworker1')
+
+        response = await self.async_client.post(
+            '/api/auth/login', {'username': 'caseworker1', 'password': 'wrong'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 401)
+
+        response = await self.async_client.post(
+            '/api/auth/refresh', {'refresh_token': self.refresh_token}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access_token', response.json())
+
+    async def test_requires_token(self):
+        response = await self.async_client.get('/api/clients/search')
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(
+            '/api/clients/search', headers={'Authorization': 'Bearer not-a-token'}
+        )
+        self.assertEqual(response.status_code, 401)
+
+    async def test_search_only_own_clients(self):
+        response = await self.async_client.get('/api/clients/search', {'q': 'alice'}, **self.headers)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['total'], 1)
+        self.assertEqual([client['client_id'] for client in body['clients']], ['CL-2024-001'])
+
+        response = await self.async_client.get('/api/clients/search', {'q': 'bob'}, **self.headers)
+        self.assertEqual(response.json()['total'], 0)
+
+    async def test_create_and_list_notes(self):
+        response = await self.async_client.post('/api/case-notes/', {
+            'client_id': str(self.client1.id),
+            'content': 'Called about housing',
+            'interaction_type': 'phone'
+        }, content_type='application/json', **self.headers)
+        self.assertEqual(response.status_code, 200)
+
+        response = await self.async_client.get(f'/api/case-notes/client/{self.client1.id}', **self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [note['content'] for note in response.json()['case_notes']],
+            ['Called about housing', 'Initial assessment']
+        )
+
+        response = await self.async_client.get(
+            f'/api/case-notes/client/{self.client1.id}', {'interaction_type': 'fax'}, **self.headers
+        )
+        self.assertEqual(response.status_code, 400)
+
+    async def test_other_caseworkers_client_not_found(self):
+        response = await self.async_client.get(f'/api/case-notes/client/{self.client2.id}', **self.headers)
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.post('/api/case-notes/', {
+            'client_id': str(self.client2.id),
+            'content': 'Not mine',
+            'interaction_type': 'phone'
+        }, content_type='application/json', **self.headers)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_export_streams_asynchronously(self):
+        url = f'/api/case-notes/client/{self.client1.id}/export'
+        response = await self.async_client.get(url, {'format': 'csv'}, **self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        body = b''.join([block async for block in response.streaming_content]).decode()
+        self.assertEqual(body.splitlines()[1].split(',')[2], 'in-person')
+        self.assertTrue(body.rstrip().endswith('Initial assessment'))
+        response = await self.async_client.get(f'/api/case-notes/client/{self.client2.id}/export', **self.headers)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_unported_routes_fall_through_to_sync_api(self):
+        response = await self.async_client.get('/api/case-notes/search', {'q': 'assessment'}, **self.headers)
+        self.assertEqual(response.status_code, 200)
+        response = await self.async_client.post('/api/auth/logout', {'refresh_token': self.refresh_token},
+                                                content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+    async def test_metrics_count_sql_queries(self):
+        """Queries run for an async route on the sync worker thread are counted against it"""
+        import tempfile
+        from config.metrics import registry
+
+        registry.reset()
+        self.addCleanup(registry.reset)
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            response = await self.async_client.get(f'/api/case-notes/client/{self.client1.id}', **self.headers)
+            self.assertEqual(response.status_code, 200)
+        series = {(s['route'], s['method']): s for s in registry.snapshot()['series']}
+        self.assertGreater(series[('/api/case-notes/client/<client_id>', 'GET')]['sql_queries'], 0)
@@ -0,0 +1,115 @@
+"""
+Benchmark and load test tooling tests
+"""
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+
+class LoadTestSummaryTest(SimpleTestCase):
+    """load_test's per-level summary and its lock detection"""
+
+    def test_is_locked(self):
+        from clients.management.commands.load_test import _is_locked
+
+        self.assertTrue(_is_locked(503, b'{"detail": "busy"}'))
+        self.assertTrue(_is_locked(500, b'OperationalError: database is locked'))
+        self.assertFalse(_is_locked(200, b'{"clients": []}'))
+        self.assertFalse(_is_locked(0, b'Connection refused'))
+
+    def test_summarize(self):
+        from clients.management.commands.load_test import Command
+
+        samples = [
+            ('search', 200, 0.010, False),
+            ('search', 200, 0.030, False),
+            ('create', 201, 0.020, False),
+            ('create', 503, 0.040, True),
+            ('list', 0, 0.050, False),
+        ]
+        result = Command()._summarize(4, samples, 2.0)
+
+        self.assertEqual(result['workers'], 4)
+        self.assertEqual(result['requests'], 5)
+        self.assertEqual(result['throughput_rps'], 2.5)
+        self.assertEqual(result['errors'], 2)
+        self.assertEqual(result['locked'], 1)
+        self.assertEqual(result['locked_rate'], 0.2)
+        self.assertEqual(result['statuses'], {'0': 1, '200': 2, '201': 1, '503': 1})
+        self.assertEqual(list(result['operations']), ['create', 'list', 'search'])
+        create = result['operations']['create']
+        self.assertEqual((create['requests'], create['errors'], create['locked']), (2, 1, 1))
+        self.assertEqual(result['operations']['search']['errors'], 0)
+        self.assertAlmostEqual(result['p50_ms'], 30.0)
+
+    def test_summarize_without_samples(self):
+        from clients.management.commands.load_test import Command
+
+        result = Command()._summarize(1, [], 0.0)
+        self.assertEqual((result['requests'], result['throughput_rps'], result['locked_rate']), (0, 0.0, 0.0))
+        self.assertEqual(result['operations'], {})
+
+    def test_refuses_more_workers_than_caseworkers(self):
+        """Workers would otherwise share caseworkers and their caseloads"""
+        with self.assertRaisesMessage(CommandError, '--users 16'):
+            call_command('load_test', '--concurrency', '1,16', '--users', '10')
+
+
+class BaselineComparisonTest(SimpleTestCase):
+    """bench_api results compared with a baseline written by --output"""
+
+    baseline = {
+        'search_clients': {'p50_ms': 2.0, 'p95_ms': 4.0, 'p99_ms': 6.0, 'queries': 2, 'alloc_peak_kib': 100.0},
+        'list_case_notes': {'p50_ms': 1.0, 'p95_ms': 2.0, 'p99_ms': 3.0, 'queries': 3, 'alloc_peak_kib': 50.0},
+    }
+
+    def compare(self, results, baseline=None):
+        from config.bench import compare_to_baseline
+
+        rows = compare_to_baseline(results, baseline or self.baseline, 0.25)
+        return {(scenario, metric) for scenario, metric, _, _, _, regressed in rows if regressed}
+
+    def test_flags_regressions(self):
+        results = {
+            # 50% slower at p95, within tolerance elsewhere
+            'search_clients': {**self.baseline['search_clients'], 'p95_ms': 6.0, 'p50_ms': 2.2},
+            # One more query per call
+            'list_case_notes': {**self.baseline['list_case_notes'], 'queries': 4},
+        }
+        self.assertEqual(self.compare(results),
+                         {('search_clients', 'p95_ms'), ('list_case_notes', 'queries')})
+
+    def test_ignores_noise_and_new_scenarios(self):
+        baseline = {'list_case_notes': {**self.baseline['list_case_notes'], 'p50_ms': 0.025}}
+        results = {
+            # Double, but only 0.025ms slower: timer noise
+            'list_case_notes': {**self.baseline['list_case_notes'], 'p50_ms': 0.05},
+            # Not in the baseline
+            'create_case_note': {'p50_ms': 9.0, 'queries': 9},
+        }
+        self.assertEqual(self.compare(results, baseline), set())
+        self.assertEqual(self.compare({'search_clients': self.baseline['search_clients']}), set())
+
+    def test_command_fails_on_regression(self):
+        import json
+        import tempfile
+        from io import StringIO
+        from clients.management.commands.bench_api import Command
+
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as handle:
+            json.dump({'meta': {}, 'results': self.baseline}, handle)
+            handle.flush()
+            results = {'search_clients': {**self.baseline['search_clients'], 'p99_ms': 12.0}}
+            options = {'baseline': handle.name, 'tolerance': 0.25, 'fail_on_regression': False}
+
+            out = StringIO()
+            Command(stdout=out)._compare(results, options)
+            self.assertIn('REGRESSION', out.getvalue())
+            self.assertIn('1 metric(s) regressed', out.getvalue())
+
+            with self.assertRaisesMessage(CommandError, '1 metric(s) regressed'):
+                Command(stdout=StringIO())._compare(results, {**options, 'fail_on_regression': True})
+
+            out = StringIO()
+            Command(stdout=out)._compare({'search_clients': self.baseline['search_clients']}, options)
+            self.assertIn('No regressions', out.getvalue())
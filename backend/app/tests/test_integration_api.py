@@ -1,13 +1,15 @@
 """
 Integration tests for the Case Note Management API with JWT authentication
 """
-from django.test import TestCase, TransactionTestCase
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase, APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.core.cache import cache
 from clients.models import Client
 from case_notes.models import CaseNote
 import json
+import uuid
 
 User = get_user_model()
 
@@ -332,4 +334,690 @@ class AdminPanelIntegrationTest(TestCase):
         
         # Test access to case note admin
         response = client.get('/admin/case_notes/casenote/')
-        self.assertEqual(response.status_code, 200)
\ No newline at end of file
+        self.assertEqual(response.status_code, 200)
+
+class ClientSearchPaginationTest(APITestCase):
+    """Test cursor pagination and cached totals on client search"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+        self.caseworker = User.objects.create_user(
+            username='caseworker1',
+            password='password123'
+        )
+        for i in range(5):
+            Client.objects.create(
+                client_id=f'CL-2024-{i + 1:03d}',
+                first_name=f'Client{i}',
+                last_name='Smith',
+                assigned_caseworker=self.caseworker
+            )
+        refresh = RefreshToken.for_user(self.caseworker)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def test_cursor_walks_every_client_once(self):
+        """Following next_cursor visits each client exactly once, newest first"""
+        response = self.client.get('/api/clients/search?page_size=2&include_total=false')
+        data = response.json()
+        self.assertIsNone(data['total'])
+        seen = [c['client_id'] for c in data['clients']]
+
+        while data['next_cursor']:
+            response = self.client.get(
+                '/api/clients/search', {'page_size': 2, 'after': data['next_cursor']}
+            )
+            data = response.json()
+            seen.extend(c['client_id'] for c in data['clients'])
+
+        self.assertEqual(seen, [f'CL-2024-{i:03d}' for i in range(5, 0, -1)])
+
+    def test_cursor_page_skips_count_query(self):
+        """Without a total, a page costs the validator and a single search query"""
+        first = self.client.get('/api/clients/search?page_size=2').json()
+        with self.assertNumQueries(2):
+            self.client.get(
+                '/api/clients/search',
+                {'page_size': 2, 'after': first['next_cursor'], 'include_total': 'false'}
+            )
+
+    @override_settings(RESPONSE_CACHE_ENABLED=False)
+    def test_total_is_cached_and_invalidated(self):
+        """The count is served from cache until the caseload changes"""
+        self.assertEqual(self.client.get('/api/clients/search').json()['total'], 5)
+        with self.assertNumQueries(2):
+            self.client.get('/api/clients/search')
+
+        Client.objects.create(
+            client_id='CL-2024-006',
+            first_name='New',
+            last_name='Client',
+            assigned_caseworker=self.caseworker
+        )
+        self.assertEqual(self.client.get('/api/clients/search').json()['total'], 6)
+
+    def test_invalid_cursor(self):
+        """A malformed cursor is rejected"""
+        response = self.client.get('/api/clients/search?after=nonsense')
+        self.assertEqual(response.status_code, 400)
+
+
+class CaseNoteListPaginationTest(APITestCase):
+    """Test cursor pagination and filters on a client's case note list"""
+
+    def setUp(self):
+        self.caseworker = User.objects.create_user(
+            username='caseworker1',
+            password='password123'
+        )
+        self.client1 = Client.objects.create(
+            client_id='CL-2024-001',
+            first_name='Alice',
+            last_name='Johnson',
+            assigned_caseworker=self.caseworker
+        )
+        types = ['phone', 'email', 'phone', 'video', 'phone']
+        self.notes = [
+            CaseNote.objects.create(
+                client=self.client1,
+                content=f'Note {i}',
+                interaction_type=interaction_type,
+                created_by=self.caseworker
+            )
+            for i, interaction_type in enumerate(types)
+        ]
+        refresh = RefreshToken.for_user(self.caseworker)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.url = f'/api/case-notes/client/{self.client1.id}'
+
+    def test_unpaginated_compatibility_mode(self):
+        """Without limit or cursor every note is returned, newest first"""
+        data = self.client.get(self.url).json()
+        self.assertEqual([n['content'] for n in data['case_notes']],
+                         ['Note 4', 'Note 3', 'Note 2', 'Note 1', 'Note 0'])
+        self.assertIsNone(data['next_cursor'])
+
+    def test_cursor_pages(self):
+        """Following next_cursor returns each note once, in order"""
+        data = self.client.get(self.url, {'limit': 2}).json()
+        seen = [n['content'] for n in data['case_notes']]
+        while data['next_cursor']:
+            data = self.client.get(self.url, {'limit': 2, 'after': data['next_cursor']}).json()
+            seen.extend(n['content'] for n in data['case_notes'])
+        self.assertEqual(seen, ['Note 4', 'Note 3', 'Note 2', 'Note 1', 'Note 0'])
+
+    def test_filters(self):
+        """Interaction type and date range narrow the list server-side"""
+        data = self.client.get(self.url, {'interaction_type': 'phone'}).json()
+        self.assertEqual([n['content'] for n in data['case_notes']], ['Note 4', 'Note 2', 'Note 0'])
+
+        data = self.client.get(self.url, {
+            'created_after': self.notes[1].created_at.isoformat(),
+            'created_before': self.notes[3].created_at.isoformat(),
+        }).json()
+        self.assertEqual([n['content'] for n in data['case_notes']], ['Note 2', 'Note 1'])
+
+    def test_invalid_parameters(self):
+        """Unknown interaction types and malformed cursors are rejected"""
+        self.assertEqual(self.client.get(self.url, {'interaction_type': 'fax'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'after': 'garbage'}).status_code, 400)
+
+
+class CaseNoteBulkCreateTest(APITestCase):
+    """Test the batch case note creation endpoint"""
+
+    def setUp(self):
+        self.caseworker1 = User.objects.create_user(username='caseworker1', password='password123')
+        self.caseworker2 = User.objects.create_user(username='caseworker2', password='password123')
+        self.own_client = Client.objects.create(
+            client_id='CL-2024-001', first_name='Alice', last_name='Johnson',
+            assigned_caseworker=self.caseworker1
+        )
+        self.other_client = Client.objects.create(
+            client_id='CL-2024-002', first_name='Bob', last_name='Smith',
+            assigned_caseworker=self.caseworker2
+        )
+        refresh = RefreshToken.for_user(self.caseworker1)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def test_partial_failures_do_not_abort_the_batch(self):
+        """Valid items are created; invalid ones are reported by index"""
+        notes = [
+            {'client_id': str(self.own_client.id), 'content': 'Offline visit 1', 'interaction_type': 'in-person'},
+            {'client_id': str(self.other_client.id), 'content': 'Not my client', 'interaction_type': 'phone'},
+            {'client_id': 'not-a-uuid', 'content': 'Broken id', 'interaction_type': 'phone'},
+            {'client_id': str(self.own_client.id), 'content': 'Bad type', 'interaction_type': 'fax'},
+            {'client_id': str(self.own_client.id), 'content': 'Offline visit 2', 'interaction_type': 'phone'},
+        ]
+        response = self.client.post('/api/case-notes/bulk', {'notes': notes}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['created'], data['failed']), (2, 3))
+        self.assertEqual([r['success'] for r in data['results']], [True, False, False, False, True])
+        self.assertIn('not assigned', data['results'][1]['error'])
+        self.assertIn('Invalid interaction type', data['results'][3]['error'])
+
+        created = CaseNote.objects.filter(client=self.own_client).order_by('content')
+        self.assertEqual([n.content for n in created], ['Offline visit 1', 'Offline visit 2'])
+        self.assertEqual(str(created[0].id), data['results'][0]['id'])
+        self.assertFalse(CaseNote.objects.filter(client=self.other_client).exists())
+
+    def test_batch_uses_constant_queries(self):
+        """Assignment check and insert cost the same for 3 notes as for 30"""
+        for size in (3, 30):
+            notes = [
+                {'client_id': str(self.own_client.id), 'content': f'Note {i}', 'interaction_type': 'phone'}
+                for i in range(size)
+            ]
+            self.client.post('/api/case-notes/bulk', {'notes': notes[:1]}, format='json')  # warm auth
+            # Assignment check, savepoint, insert, notes version bump, savepoint release
+            with self.assertNumQueries(5):
+                self.client.post('/api/case-notes/bulk', {'notes': notes}, format='json')
+
+    def test_batch_size_limit(self):
+        """Oversized and empty batches are rejected outright"""
+        from django.test import override_settings
+
+        notes = [{'client_id': str(self.own_client.id), 'content': 'x'}] * 3
+        with override_settings(CASE_NOTE_BULK_MAX=2):
+            response = self.client.post('/api/case-notes/bulk', {'notes': notes}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/case-notes/bulk', {'notes': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(CaseNote.objects.exists())
+
+
+class ConditionalGetTest(APITestCase):
+    """Test ETag / Last-Modified revalidation of list responses"""
+
+    def setUp(self):
+        self.caseworker = User.objects.create_user(
+            username='caseworker1',
+            password='password123'
+        )
+        self.client1 = Client.objects.create(
+            client_id='CL-2024-001',
+            first_name='Alice',
+            last_name='Johnson',
+            assigned_caseworker=self.caseworker
+        )
+        self.note = CaseNote.objects.create(
+            client=self.client1,
+            content='Initial visit',
+            interaction_type='phone',
+            created_by=self.caseworker
+        )
+        refresh = RefreshToken.for_user(self.caseworker)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        self.url = f'/api/case-notes/client/{self.client1.id}'
+
+    @override_settings(RESPONSE_CACHE_ENABLED=False)
+    def test_unchanged_note_list_is_not_modified(self):
+        """A matching If-None-Match gets an empty 304 after only the client lookup"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        self.client.get(self.url)  # warm auth
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+    def test_note_writes_change_the_etag(self):
+        """Creating, editing, bulk creating and deleting notes all invalidate the ETag"""
+        etags = [self.client.get(self.url)['ETag']]
+
+        self.client.post('/api/case-notes/', {
+            'client_id': str(self.client1.id),
+            'content': 'Follow-up',
+            'interaction_type': 'email'
+        }, format='json')
+        etags.append(self.client.get(self.url)['ETag'])
+
+        self.note.content = 'Initial visit, edited'
+        self.note.save()
+        etags.append(self.client.get(self.url)['ETag'])
+
+        self.client.post('/api/case-notes/bulk', {'notes': [
+            {'client_id': str(self.client1.id), 'content': 'Offline visit'}
+        ]}, format='json')
+        etags.append(self.client.get(self.url)['ETag'])
+
+        self.note.delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etags[-1])
+        self.assertEqual(response.status_code, 200)
+        etags.append(response['ETag'])
+
+        self.assertEqual(len(set(etags)), len(etags))
+
+    def test_query_parameters_are_part_of_the_etag(self):
+        """A filtered list does not revalidate against the unfiltered one"""
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, {'interaction_type': 'email'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_client_edit_does_not_reset_notes_version(self):
+        """Saving a stale client instance keeps the notes version"""
+        stale = Client.objects.get(pk=self.client1.pk)
+        etag = self.client.get(self.url)['ETag']
+        CaseNote.objects.create(
+            client=self.client1, content='Another', created_by=self.caseworker
+        )
+        stale.first_name = 'Alicia'
+        stale.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_client_search_revalidates_against_caseload(self):
+        """Client search answers 304 until a client of the caseworker changes"""
+        response = self.client.get('/api/clients/search?q=ali')
+        etag = response['ETag']
+        response = self.client.get('/api/clients/search?q=ali', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.client1.last_name = 'Jones'
+        self.client1.save()
+        response = self.client.get('/api/clients/search?q=ali', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['clients'][0]['last_name'], 'Jones')
+
+    def test_client_search_exposes_note_counters(self):
+        """Search results carry the denormalized counters, and notes change the ETag"""
+        etag = self.client.get('/api/clients/search').get('ETag')
+        data = self.client.get('/api/clients/search').json()['clients'][0]
+        self.assertEqual(data['note_count'], 1)
+        self.assertEqual(data['note_counts']['phone'], 1)
+        self.assertEqual(data['last_note_at'], self.note.created_at.isoformat())
+
+        CaseNote.objects.create(
+            client=self.client1, content='Email', interaction_type='email', created_by=self.caseworker
+        )
+        response = self.client.get('/api/clients/search', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['clients'][0]['note_counts']['email'], 1)
+
+
+class AdminChangelistQueryCountTest(TestCase):
+    """Admin changelists cost the same number of queries whatever the row count"""
+
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='admin123'
+        )
+        self.client.force_login(self.admin_user)
+        self.rows = 0
+
+    def add_rows(self, count):
+        for _ in range(count):
+            i = self.rows
+            self.rows += 1
+            caseworker = User.objects.create(username=f'caseworker{i}')
+            client = Client.objects.create(
+                client_id=f'CL-2024-{i + 1:03d}',
+                first_name=f'Client{i}',
+                last_name='Smith',
+                assigned_caseworker=caseworker
+            )
+            CaseNote.objects.create(
+                client=client, content=f'Note {i}', interaction_type='phone', created_by=caseworker
+            )
+
+    def query_counts(self, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        counts = []
+        for total in (2, 12):
+            self.add_rows(total - self.rows)
+            self.client.get(url)  # warm session and content type caches
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(queries))
+        return counts
+
+    def test_client_changelist(self):
+        small, large = self.query_counts('/admin/clients/client/')
+        self.assertEqual(small, large)
+
+    def test_case_note_changelist(self):
+        small, large = self.query_counts('/admin/case_notes/casenote/')
+        self.assertEqual(small, large)
+
+    def test_user_changelist(self):
+        small, large = self.query_counts('/admin/accounts/user/')
+        self.assertEqual(small, large)
+
+    def test_input_filters(self):
+        """Username and client ID filters narrow the changelists"""
+        self.add_rows(3)
+        response = self.client.get('/admin/clients/client/', {'caseworker': 'caseworker1'})
+        self.assertEqual([c.client_id for c in response.context['cl'].result_list], ['CL-2024-002'])
+
+        response = self.client.get('/admin/case_notes/casenote/', {'client_id': 'cl-2024-003', 'author': 'caseworker2'})
+        self.assertEqual([n.content for n in response.context['cl'].result_list], ['Note 2'])
+        self.assertContains(response, 'name="author" value="caseworker2"')
+
+    def test_client_search_uses_prefixes(self):
+        """Admin client search matches name prefixes and client IDs"""
+        self.add_rows(3)
+        response = self.client.get('/admin/clients/client/', {'q': 'client1 smi'})
+        self.assertEqual([c.client_id for c in response.context['cl'].result_list], ['CL-2024-002'])
+        response = self.client.get('/admin/clients/client/', {'q': 'CL-2024-003'})
+        self.assertEqual([c.client_id for c in response.context['cl'].result_list], ['CL-2024-003'])
+
+    def test_client_search_by_caseworker(self):
+        """Admin client search also matches the caseworker's username or name, ignoring case"""
+        self.add_rows(3)
+        User.objects.filter(username='caseworker2').update(first_name='Sarah', last_name='Okafor')
+        for q in ('caseworker2', 'sarah', 'OKA', 'sarah okafor'):
+            response = self.client.get('/admin/clients/client/', {'q': q})
+            self.assertEqual([c.client_id for c in response.context['cl'].result_list], ['CL-2024-003'], q)
+        response = self.client.get('/admin/clients/client/', {'q': 'sarah smith'})
+        self.assertEqual(list(response.context['cl'].result_list), [])
+
+    def test_estimated_count_paginator(self):
+        """Unfiltered lists use the rowid estimate and filtered counts are capped"""
+        from config.admin_tools import EstimatedCountPaginator
+
+        self.add_rows(5)
+        paginator = EstimatedCountPaginator(CaseNote.objects.order_by('-created_at'), 2)
+        paginator.max_count = 3
+        self.assertEqual(paginator.count, 5)
+        capped = EstimatedCountPaginator(CaseNote.objects.filter(interaction_type='phone'), 2)
+        capped.max_count = 3
+        self.assertEqual(capped.count, 3)
+
+
+class MetricsEndpointTest(APITestCase):
+    """Test the per-route Prometheus metrics"""
+
+    def setUp(self):
+        import tempfile
+        from django.test import override_settings
+        from config.metrics import registry
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.metrics_dir = directory.name
+        overrides = override_settings(METRICS_DIR=self.metrics_dir)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        registry.reset()
+        self.addCleanup(registry.reset)
+
+        self.caseworker = User.objects.create_user(username='caseworker1', password='password123')
+        self.staff = User.objects.create_user(username='ops', password='password123', is_staff=True)
+        self.client1 = Client.objects.create(
+            client_id='CL-2024-001',
+            first_name='Alice',
+            last_name='Johnson',
+            assigned_caseworker=self.caseworker
+        )
+
+    def authenticate(self, user):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def metric(self, body, name, **labels):
+        for line in body.splitlines():
+            if line.startswith(name + '{') and all(f'{k}="{v}"' in line for k, v in labels.items()):
+                return float(line.rsplit(' ', 1)[1])
+        return None
+
+    def test_records_routes_statuses_and_sql(self):
+        """Requests are counted per route pattern with latency, SQL and render time"""
+        self.authenticate(self.caseworker)
+        self.client.get(f'/api/case-notes/client/{self.client1.id}')
+        self.client.get(f'/api/case-notes/client/{self.client1.id}')
+        self.client.get(f'/api/case-notes/client/{uuid.uuid4()}')
+
+        self.authenticate(self.staff)
+        response = self.client.get('/api/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+
+        route = '/api/case-notes/client/<client_id>'
+        self.assertEqual(self.metric(body, 'api_requests_total', route=route, status='200'), 2)
+        self.assertEqual(self.metric(body, 'api_requests_total', route=route, status='404'), 1)
+        self.assertEqual(self.metric(body, 'api_request_duration_seconds_count', route=route), 3)
+        self.assertEqual(self.metric(body, 'api_request_duration_seconds_bucket', route=route, le='+Inf'), 3)
+        self.assertGreater(self.metric(body, 'api_sql_queries_total', route=route), 0)
+        self.assertGreater(self.metric(body, 'api_render_duration_seconds_total', route=route), 0)
+        self.assertIsNotNone(self.metric(body, 'jwt_auth_cache_requests_total', cache='token', result='hit'))
+
+    def test_sums_every_worker_process(self):
+        """Totals written by other worker processes are added in"""
+        import os
+        from config.metrics import LATENCY_BUCKETS
+
+        with open(os.path.join(self.metrics_dir, '999999.json'), 'w') as handle:
+            json.dump({'series': [{
+                'route': '/api/sync', 'method': 'GET', 'statuses': {'200': 5},
+                'buckets': [5] + [0] * (len(LATENCY_BUCKETS) - 1), 'count': 5, 'sum': 0.01,
+                'sql_queries': 20, 'sql_seconds': 0.002, 'render_seconds': 0.001,
+            }], 'auth_cache': {'token_hits': 7}}, handle)
+
+        self.authenticate(self.caseworker)
+        self.client.get('/api/sync')
+        self.authenticate(self.staff)
+        body = self.client.get('/api/metrics').content.decode()
+
+        self.assertEqual(self.metric(body, 'api_requests_total', route='/api/sync', status='200'), 6)
+        self.assertEqual(self.metric(body, 'api_request_duration_seconds_count', route='/api/sync'), 6)
+        self.assertGreaterEqual(self.metric(body, 'api_request_duration_seconds_bucket', route='/api/sync', le='0.005'), 5)
+        self.assertGreaterEqual(self.metric(body, 'jwt_auth_cache_requests_total', cache='token', result='hit'), 7)
+        self.assertGreaterEqual(self.metric(body, 'api_sql_queries_total', route='/api/sync'), 21)
+
+    def test_exited_processes_keep_counters_but_not_gauges(self):
+        """An exited worker's file is retired: its requests still count, its cache sizes do not"""
+        import os
+        import subprocess
+        import sys
+        from config.metrics import LATENCY_BUCKETS
+
+        exited = subprocess.Popen([sys.executable, '-c', ''])
+        exited.wait()
+        path = os.path.join(self.metrics_dir, f'{exited.pid}.json')
+        with open(path, 'w') as handle:
+            json.dump({'series': [{
+                'route': '/api/sync', 'method': 'GET', 'statuses': {'200': 5},
+                'buckets': [5] + [0] * (len(LATENCY_BUCKETS) - 1), 'count': 5, 'sum': 0.01,
+                'sql_queries': 20, 'sql_seconds': 0.002, 'render_seconds': 0.001,
+            }], 'auth_cache': {'token_hits': 7, 'token_entries': 1000}}, handle)
+
+        self.authenticate(self.staff)
+        for _ in range(2):
+            body = self.client.get('/api/metrics').content.decode()
+            self.assertFalse(os.path.exists(path))
+            self.assertEqual(self.metric(body, 'api_requests_total', route='/api/sync', status='200'), 5)
+            self.assertGreaterEqual(self.metric(body, 'jwt_auth_cache_requests_total', cache='token', result='hit'), 7)
+            self.assertLess(self.metric(body, 'jwt_auth_cache_entries', cache='token'), 1000)
+
+    def test_reused_pid_keeps_earlier_counters(self):
+        """A file left under this process's pid by an earlier process is retired, not overwritten"""
+        import os
+        from config.metrics import LATENCY_BUCKETS
+
+        with open(os.path.join(self.metrics_dir, f'{os.getpid()}.json'), 'w') as handle:
+            json.dump({'process': 'earlier', 'series': [{
+                'route': '/api/sync', 'method': 'GET', 'statuses': {'200': 5},
+                'buckets': [5] + [0] * (len(LATENCY_BUCKETS) - 1), 'count': 5, 'sum': 0.01,
+                'sql_queries': 20, 'sql_seconds': 0.002, 'render_seconds': 0.001,
+            }]}, handle)
+
+        self.authenticate(self.caseworker)
+        self.client.get('/api/sync')
+        self.authenticate(self.staff)
+        body = self.client.get('/api/metrics').content.decode()
+        self.assertEqual(self.metric(body, 'api_requests_total', route='/api/sync', status='200'), 6)
+
+    @override_settings(RESPONSE_CACHE_ENABLED=True)
+    def test_response_cache_hit_rate(self):
+        """Response cache hits and misses are counted per route"""
+        self.authenticate(self.caseworker)
+        for _ in range(3):
+            self.client.get('/api/clients/search', {'q': 'alice'})
+
+        self.authenticate(self.staff)
+        body = self.client.get('/api/metrics').content.decode()
+        route = '/api/clients/search'
+        self.assertEqual(self.metric(body, 'api_response_cache_requests_total', route=route, result='miss'), 1)
+        self.assertEqual(self.metric(body, 'api_response_cache_requests_total', route=route, result='hit'), 2)
+        self.assertEqual(self.metric(body, 'api_response_cache_requests_total', route=route, result='stale'), 0)
+
+    def test_staff_only(self):
+        """Caseworkers and anonymous callers cannot read the metrics"""
+        self.authenticate(self.caseworker)
+        self.assertEqual(self.client.get('/api/metrics').status_code, 403)
+        self.client.credentials()
+        self.assertEqual(self.client.get('/api/metrics').status_code, 401)
+
+    def test_admin_session_can_read_metrics(self):
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get('/api/metrics').status_code, 200)
+
+
+class DatabaseBusyTest(APITestCase):
+    """SQLite lock timeouts are answered with a retryable 503"""
+
+    def setUp(self):
+        cache.clear()
+        self.caseworker = User.objects.create_user(username='caseworker1', password='password123')
+        refresh = RefreshToken.for_user(self.caseworker)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def test_locked_database_returns_503(self):
+        from unittest import mock
+        from django.db import OperationalError
+
+        with mock.patch('config.urls.search_clients', side_effect=OperationalError('database is locked')):
+            response = self.client.get('/api/clients/search')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertIn('error', response.json())
+
+    def test_other_operational_errors_propagate(self):
+        from unittest import mock
+        from django.db import OperationalError
+
+        with mock.patch('config.urls.search_clients', side_effect=OperationalError('no such table: x')):
+            with self.assertRaises(OperationalError):
+                self.client.get('/api/clients/search')
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=True)
+class ResponseCacheTest(APITestCase):
+    """Rendered search and note list responses are reused until a write invalidates them"""
+
+    def setUp(self):
+        cache.clear()
+        self.caseworker1 = User.objects.create_user(username='caseworker1', password='password123')
+        self.caseworker2 = User.objects.create_user(username='caseworker2', password='password123')
+        self.client1 = Client.objects.create(
+            client_id='CL-2024-001',
+            first_name='Alice',
+            last_name='Johnson',
+            assigned_caseworker=self.caseworker1
+        )
+        self.authenticate(self.caseworker1)
+        self.list_url = f'/api/case-notes/client/{self.client1.id}'
+
+    def authenticate(self, user):
+        refresh = RefreshToken.for_user(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def create_note(self, content):
+        # Entries are invalidated once the note's transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/case-notes/', {
+                'client_id': str(self.client1.id),
+                'content': content,
+                'interaction_type': 'phone'
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_repeated_request_is_served_without_queries(self):
+        first = self.client.get('/api/clients/search', {'q': 'alice'})
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/clients/search', {'q': 'alice'})
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+        # Another query string is another entry
+        self.assertEqual(self.client.get('/api/clients/search', {'q': 'bob'})['X-Cache'], 'MISS')
+
+    def test_hit_answers_conditional_requests(self):
+        etag = self.client.get(self.list_url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_note_invalidates_list_and_search(self):
+        self.client.get(self.list_url)
+        self.client.get('/api/clients/search')
+        self.create_note('Called about housing')
+
+        response = self.client.get(self.list_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual([note['content'] for note in response.json()['case_notes']], ['Called about housing'])
+        response = self.client.get('/api/clients/search')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['clients'][0]['note_count'], 1)
+
+    def test_bulk_create_invalidates(self):
+        self.client.get(self.list_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/case-notes/bulk', {'notes': [
+                {'client_id': str(self.client1.id), 'content': 'Offline visit', 'interaction_type': 'phone'}
+            ]}, format='json')
+        self.assertEqual(len(self.client.get(self.list_url).json()['case_notes']), 1)
+
+    def test_reassignment_invalidates_both_caseloads(self):
+        self.assertEqual(self.client.get(self.list_url).status_code, 200)
+        self.assertEqual(self.client.get('/api/clients/search').json()['total'], 1)
+        self.authenticate(self.caseworker2)
+        self.assertEqual(self.client.get('/api/clients/search').json()['total'], 0)
+
+        self.client1.assigned_caseworker = self.caseworker2
+        self.client1.save()
+
+        self.assertEqual(self.client.get('/api/clients/search').json()['total'], 1)
+        self.authenticate(self.caseworker1)
+        self.assertEqual(self.client.get(self.list_url).status_code, 404)
+        self.assertEqual(self.client.get('/api/clients/search').json()['total'], 0)
+
+    def test_entries_are_per_user(self):
+        self.client.get('/api/clients/search')
+        self.authenticate(self.caseworker2)
+        response = self.client.get('/api/clients/search')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['clients'], [])
+
+    def test_busy_database_serves_stale_response(self):
+        from unittest import mock
+        from django.db import OperationalError
+
+        self.client.get('/api/clients/search')
+        self.create_note('Invalidates the fresh entry')
+        with mock.patch('config.urls.search_clients', side_effect=OperationalError('database is locked')):
+            response = self.client.get('/api/clients/search')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['X-Cache'], 'STALE')
+            self.assertEqual(response.json()['clients'][0]['note_count'], 0)
+
+            with override_settings(RESPONSE_CACHE_SERVE_STALE=False):
+                self.assertEqual(self.client.get('/api/clients/search').status_code, 503)
+
+            # Nothing stale to serve for a request never answered before
+            self.assertEqual(self.client.get('/api/clients/search', {'q': 'x'}).status_code, 503)
@@ -0,0 +1,197 @@
+"""
+Query plan regression tests: every query behind the API must be index-backed
+
+Each test calls an endpoint, captures the SQL it ran and asks SQLite for the
+plan with EXPLAIN QUERY PLAN. A full SCAN of one of the tables that grow
+with the caseload fails the test, since it is fine on a test database but
+takes seconds at production size.
+"""
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from case_notes.models import CaseNote
+from clients.models import Client
+from config.auth import clear_auth_caches
+
+User = get_user_model()
+
+# Tables whose size grows with users, caseloads or note volume
+LARGE_TABLES = {
+    'auth_user',
+    'clients_client',
+    'case_notes_casenote',
+    'sync_changelogentry',
+}
+
+# Statements that have a plan worth checking
+_PLANNED = ('SELECT', 'UPDATE', 'DELETE')
+
+# FROM "table" U0 / JOIN clients_client c, as written by Django and raw SQL
+_ALIAS_RE = re.compile(r'(?:FROM|JOIN)\s+"?(\w+)"?(?:\s+(?:AS\s+)?"?(\w+)"?)?', re.IGNORECASE)
+_SQL_KEYWORDS = {'WHERE', 'ON', 'INNER', 'LEFT', 'JOIN', 'ORDER', 'GROUP', 'LIMIT', 'AS', 'USING'}
+
+
+def table_aliases(sql):
+    """Map every alias (and table name) in `sql` to its table."""
+    aliases = {}
+    for table, alias in _ALIAS_RE.findall(sql):
+        aliases[table] = table
+        if alias and alias.upper() not in _SQL_KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+
+def full_scans(sql):
+    """Plan lines of `sql` that scan a large table, e.g. 'SCAN clients_client'"""
+    aliases = table_aliases(sql)
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        plan = [row[3] for row in cursor.fetchall()]
+    scans = []
+    for detail in plan:
+        match = re.match(r'SCAN (\w+)', detail)
+        if match and aliases.get(match.group(1), match.group(1)) in LARGE_TABLES:
+            scans.append(detail)
+    return scans
+
+
+# The response cache would answer repeated requests without any query
+@override_settings(RESPONSE_CACHE_ENABLED=False)
+class QueryPlanTest(APITestCase):
+    """Fail on any query that scans a large table instead of searching an index"""
+
+    def setUp(self):
+        cache.clear()
+        clear_auth_caches()
+
+        self.caseworker = User.objects.create_user(
+            username='caseworker1',
+            password='password123'
+        )
+        other = User.objects.create_user(username='caseworker2', password='password123')
+        self.clients = [
+            Client.objects.create(
+                client_id=f'CL-2024-{i + 1:03d}',
+                first_name=f'Client{i}',
+                last_name='Smith',
+                assigned_caseworker=self.caseworker if i % 2 == 0 else other
+            )
+            for i in range(4)
+        ]
+        self.client1 = self.clients[0]
+        for client in self.clients:
+            CaseNote.objects.create(
+                client=client,
+                content='Discussed housing and rent support',
+                interaction_type='phone',
+                created_by=client.assigned_caseworker
+            )
+        refresh = RefreshToken.for_user(self.caseworker)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def assertIndexBacked(self, method, url, data=None, status=200, **extra):
+        """Call the endpoint and check the plan of every query it ran"""
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, data, format='json', **extra)
+        self.assertEqual(response.status_code, status, response.content)
+
+        checked = 0
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith(_PLANNED):
+                continue
+            checked += 1
+            scans = full_scans(sql)
+            self.assertFalse(scans, f'{method.upper()} {url} scans a large table: {scans}\n{sql}')
+        self.assertGreater(checked, 0)
+        return response
+
+    def test_jwt_auth(self):
+        """Resolving the token's user is a primary key lookup"""
+        self.assertIndexBacked('get', '/api/clients/search', {'include_total': 'false'})
+
+    def test_client_search(self):
+        self.assertIndexBacked('get', '/api/clients/search')
+        self.assertIndexBacked('get', '/api/clients/search', {'q': 'client0'})
+        self.assertIndexBacked('get', '/api/clients/search', {'q': 'client smi'})
+        self.assertIndexBacked('get', '/api/clients/search', {'q': 'CL-2024-001'})
+
+    def test_client_search_cursor(self):
+        first = self.assertIndexBacked('get', '/api/clients/search', {'page_size': 1}).json()
+        self.assertIndexBacked('get', '/api/clients/search', {'page_size': 1, 'after': first['next_cursor']})
+
+    def test_client_search_not_modified(self):
+        etag = self.client.get('/api/clients/search')['ETag']
+        self.assertIndexBacked('get', '/api/clients/search', status=304, HTTP_IF_NONE_MATCH=etag)
+
+    def test_case_note_list(self):
+        url = f'/api/case-notes/client/{self.client1.id}'
+        self.assertIndexBacked('get', url)
+        self.assertIndexBacked('get', url, {'interaction_type': 'phone', 'created_after': '2020-01-01T00:00:00'})
+
+    def test_case_note_list_cursor(self):
+        # A second note, so the one-note first page has a cursor
+        CaseNote.objects.create(client=self.client1, content='Follow-up call', created_by=self.caseworker)
+        url = f'/api/case-notes/client/{self.client1.id}'
+        first = self.assertIndexBacked('get', url, {'limit': 1}).json()
+        self.assertTrue(first['next_cursor'])
+        second = self.assertIndexBacked('get', url, {'limit': 1, 'after': first['next_cursor']}).json()
+        self.assertEqual(len(second['case_notes']), 1)
+        self.assertNotEqual(second['case_notes'][0]['id'], first['case_notes'][0]['id'])
+
+    def test_case_note_list_not_modified(self):
+        url = f'/api/case-notes/client/{self.client1.id}'
+        etag = self.client.get(url)['ETag']
+        self.assertIndexBacked('get', url, status=304, HTTP_IF_NONE_MATCH=etag)
+
+    def test_case_note_search(self):
+        self.assertIndexBacked('get', '/api/case-notes/search', {'q': 'rent'})
+
+    def test_admin_case_note_search(self):
+        self.client.force_login(User.objects.create_superuser(username='admin', password='password123'))
+        url = '/admin/case_notes/casenote/'
+        self.assertIndexBacked('get', url, {'q': 'client0 smith'})
+        self.assertIndexBacked('get', url, {'q': 'caseworker1'})
+        self.assertIndexBacked('get', url, {'q': 'CL-2024-001'})
+
+    def test_admin_client_search(self):
+        self.client.force_login(User.objects.create_superuser(username='admin', password='password123'))
+        url = '/admin/clients/client/'
+        self.assertIndexBacked('get', url, {'q': 'client0 smith'})
+        self.assertIndexBacked('get', url, {'q': 'caseworker1'})
+        self.assertIndexBacked('get', url, {'q': 'CL-2024-001'})
+
+    def test_case_note_create(self):
+        self.assertIndexBacked('post', '/api/case-notes/', {
+            'client_id': str(self.client1.id),
+            'content': 'Follow-up call',
+            'interaction_type': 'phone'
+        })
+
+    def test_case_note_bulk_create(self):
+        self.assertIndexBacked('post', '/api/case-notes/bulk', {'notes': [
+            {'client_id': str(client.id), 'content': 'Offline visit'} for client in self.clients
+        ]})
+
+    def test_sync(self):
+        snapshot = self.assertIndexBacked('get', '/api/sync').json()
+        self.clients[2].first_name = 'Renamed'
+        self.clients[2].save()
+        self.assertIndexBacked('get', '/api/sync', {'since': snapshot['watermark']})
+
+    def test_detects_scans(self):
+        """The checker itself flags an unindexed filter, including under an alias"""
+        with CaptureQueriesContext(connection) as queries:
+            list(Client.objects.filter(first_name__icontains='client'))
+            list(User.objects.filter(pk__in=Client.objects.filter(last_name='Smith').values('assigned_caseworker')))
+        scans = full_scans(queries.captured_queries[0]['sql'])
+        self.assertEqual(len(scans), 1)
+        self.assertTrue(scans[0].startswith('SCAN clients_client'))
+        self.assertTrue(full_scans(queries.captured_queries[1]['sql']))
@@ -0,0 +1,185 @@
+"""
+Read replica routing tests
+
+Under test the replica alias mirrors the test database, and a replica counts
+as fresh when REPLICA_DATABASE_PATH exists with a recent modification time.
+"""
+import os
+import sqlite3
+import tempfile
+import time
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections, router
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from case_notes.models import CaseNote
+from clients.models import Client
+from config.routers import pin_to_primary, replica_reads
+
+User = get_user_model()
+
+
+class ReplicaTestMixin:
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.replica_path = os.path.join(directory.name, 'replica.sqlite3')
+        overrides = override_settings(REPLICA_DATABASE_PATH=self.replica_path, REPLICA_READS_ENABLED=True)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def snapshot(self, age=0.0):
+        """Pretend refresh_replica took a snapshot `age` seconds ago"""
+        with open(self.replica_path, 'a'):
+            pass
+        taken_at = time.time() - age
+        os.utime(self.replica_path, (taken_at, taken_at))
+
+
+class SharedCacheCheckTest(TestCase):
+    """Replica reads and the response cache are refused on a cache other worker processes cannot see"""
+
+    def errors(self):
+        from config.checks import check_shared_cache
+        return [error.id for error in check_shared_cache(None)]
+
+    def test_local_cache_with_replica_reads(self):
+        self.assertEqual(self.errors(), [])
+        with override_settings(REPLICA_READS_ENABLED=True):
+            self.assertEqual(self.errors(), ['config.E001'])
+        with override_settings(REPLICA_READS_ENABLED=True, RESPONSE_CACHE_ENABLED=True):
+            self.assertEqual(self.errors(), ['config.E001', 'config.E001'])
+
+    @override_settings(REPLICA_READS_ENABLED=True, RESPONSE_CACHE_ENABLED=True, CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp/case-notes-cache',
+    }})
+    def test_shared_cache(self):
+        self.assertEqual(self.errors(), [])
+
+
+class ReplicaRouterTest(ReplicaTestMixin, TestCase):
+    """Routing decisions of ReplicaRouter"""
+
+    def setUp(self):
+        super().setUp()
+        self.caseworker = User.objects.create(username='caseworker1')
+
+    def read_alias(self, user=None):
+        with replica_reads(user):
+            return router.db_for_read(Client)
+
+    def test_reads_use_primary_outside_replica_reads(self):
+        self.snapshot()
+        self.assertEqual(router.db_for_read(Client), 'default')
+
+    def test_fresh_replica_serves_reads(self):
+        self.snapshot()
+        self.assertEqual(self.read_alias(self.caseworker), 'replica')
+        self.assertEqual(router.db_for_write(Client), 'default')
+
+    def test_replica_reads_disabled(self):
+        self.snapshot()
+        with override_settings(REPLICA_READS_ENABLED=False):
+            self.assertEqual(self.read_alias(self.caseworker), 'default')
+
+    def test_missing_or_stale_replica_falls_back_to_primary(self):
+        self.assertEqual(self.read_alias(self.caseworker), 'default')
+        self.snapshot(age=3600)
+        self.assertEqual(self.read_alias(self.caseworker), 'default')
+
+    def test_user_pinned_until_replica_has_their_writes(self):
+        self.snapshot(age=5)
+        pin_to_primary(self.caseworker.pk)
+        self.assertEqual(self.read_alias(self.caseworker), 'default')
+        self.assertEqual(self.read_alias(User.objects.create(username='caseworker2')), 'replica')
+        self.snapshot()
+        self.assertEqual(self.read_alias(self.caseworker), 'replica')
+
+    def test_reads_after_a_write_use_primary(self):
+        self.snapshot()
+        with replica_reads(self.caseworker):
+            self.assertEqual(router.db_for_read(Client), 'replica')
+            router.db_for_write(Client)
+            self.assertEqual(router.db_for_read(Client), 'default')
+
+
+class ReplicaReadYourWritesTest(ReplicaTestMixin, TransactionTestCase):
+    """Read-only endpoints use the replica, except right after the user wrote"""
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        super().setUp()
+        self.caseworker = User.objects.create(username='caseworker1')
+        self.client1 = Client.objects.create(
+            client_id='CL-2024-001',
+            first_name='Alice',
+            last_name='Johnson',
+            assigned_caseworker=self.caseworker
+        )
+        self.api = APIClient()
+        self.api.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.caseworker).access_token}')
+
+    def list_notes(self):
+        with CaptureQueriesContext(connections['replica']) as replica_queries:
+            response = self.api.get(f'/api/case-notes/client/{self.client1.id}')
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(replica_queries)
+
+    def test_list_and_search_read_the_replica(self):
+        self.snapshot()
+        _, replica_queries = self.list_notes()
+        self.assertGreater(replica_queries, 0)
+        with CaptureQueriesContext(connections['replica']) as queries:
+            self.assertEqual(self.api.get('/api/clients/search', {'q': 'alice'}).status_code, 200)
+        self.assertGreater(len(queries), 0)
+
+    @override_settings(RESPONSE_CACHE_ENABLED=False)
+    def test_posted_note_is_read_back_from_primary(self):
+        self.snapshot(age=1)
+        response = self.api.post('/api/case-notes/', {
+            'client_id': str(self.client1.id),
+            'content': 'Called about housing',
+            'interaction_type': 'phone'
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        body, replica_queries = self.list_notes()
+        self.assertEqual(replica_queries, 0)
+        self.assertEqual([note['content'] for note in body['case_notes']], ['Called about housing'])
+
+        # Once a snapshot includes the write, the replica is used again
+        self.snapshot()
+        _, replica_queries = self.list_notes()
+        self.assertGreater(replica_queries, 0)
+
+
+class RefreshReplicaCommandTest(ReplicaTestMixin, TransactionTestCase):
+    """refresh_replica copies the primary and stamps the snapshot time"""
+
+    def test_copies_primary(self):
+        caseworker = User.objects.create(username='caseworker1')
+        client = Client.objects.create(
+            client_id='CL-2024-001', first_name='Alice', last_name='Johnson', assigned_caseworker=caseworker
+        )
+        CaseNote.objects.create(client=client, content='Intake', created_by=caseworker)
+
+        started = time.time()
+        call_command('refresh_replica', stdout=StringIO())
+        self.assertGreaterEqual(os.stat(self.replica_path).st_mtime, started - 1)
+
+        copy = sqlite3.connect(f'file:{self.replica_path}?mode=ro', uri=True)
+        try:
+            self.assertEqual(copy.execute('SELECT count(*) FROM case_notes_casenote').fetchone()[0], 1)
+            self.assertEqual(copy.execute('PRAGMA journal_mode').fetchone()[0], 'delete')
+        finally:
+            copy.close()
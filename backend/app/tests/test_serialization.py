@@ -0,0 +1,90 @@
+"""
+Response rendering tests: the fast renderer and the trusted-output path
+"""
+import datetime
+import json
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from ninja.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from case_notes.models import CaseNote
+from case_notes.schemas import CaseNotesListResponse
+from clients.models import Client
+from clients.schemas import ClientSearchPaginatedResponse
+from config.renderers import FastJSONRenderer
+
+User = get_user_model()
+
+
+class FastJSONRendererTest(SimpleTestCase):
+    """FastJSONRenderer encodes exactly what ninja's JSONRenderer does"""
+
+    def test_matches_ninja_renderer(self):
+        data = {
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'created_at': datetime.datetime(2024, 5, 1, 9, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+            'day': datetime.date(2024, 5, 1),
+            'amount': Decimal('12.50'),
+            'counts': {1: 2, 'phone': 3},
+            'items': [None, True, 1.5, 'naïve'],
+        }
+        fast = FastJSONRenderer().render(None, data, response_status=200)
+        stdlib = JSONRenderer().render(None, data, response_status=200)
+        self.assertEqual(json.loads(fast), json.loads(stdlib))
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False)
+class TrustedOutputTest(APITestCase):
+    """Trusted responses are the ones ninja's schema validation would produce"""
+
+    def setUp(self):
+        cache.clear()
+        self.caseworker = User.objects.create_user(
+            username='caseworker1', password='password123', first_name='John', last_name='Doe'
+        )
+        self.client1 = Client.objects.create(
+            client_id='CL-2024-001', first_name='Alice', last_name='Johnson', assigned_caseworker=self.caseworker
+        )
+        Client.objects.create(
+            client_id='CL-2024-002', first_name='Alan', last_name='Jones', assigned_caseworker=self.caseworker
+        )
+        for i, interaction_type in enumerate(['phone', 'email', 'video']):
+            CaseNote.objects.create(client=self.client1, content=f'Note {i}',
+                                    interaction_type=interaction_type, created_by=self.caseworker)
+        refresh = RefreshToken.for_user(self.caseworker)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+
+    def assertSameAsValidated(self, url, params, schema):
+        trusted = self.client.get(url, params)
+        with override_settings(API_TRUSTED_OUTPUT=False):
+            validated = self.client.get(url, params)
+        self.assertEqual(trusted.status_code, 200)
+        self.assertEqual(trusted.json(), validated.json())
+        self.assertEqual(trusted['ETag'], validated['ETag'])
+        self.assertEqual(schema.model_validate(trusted.json()).model_dump(), trusted.json())
+        return trusted.json()
+
+    def test_client_search(self):
+        body = self.assertSameAsValidated('/api/clients/search', {'q': 'al', 'page_size': 1},
+                                          ClientSearchPaginatedResponse)
+        self.assertIsNotNone(body['next_cursor'])
+        self.assertSameAsValidated('/api/clients/search', {'after': body['next_cursor'], 'include_total': 'false'},
+                                   ClientSearchPaginatedResponse)
+
+    def test_case_note_list(self):
+        url = f'/api/case-notes/client/{self.client1.id}'
+        body = self.assertSameAsValidated(url, {}, CaseNotesListResponse)
+        self.assertEqual(body['case_notes'][0]['created_by'], {'id': str(self.caseworker.id), 'name': 'John Doe'})
+        page = self.assertSameAsValidated(url, {'limit': 2}, CaseNotesListResponse)
+        self.assertSameAsValidated(url, {'limit': 2, 'after': page['next_cursor']}, CaseNotesListResponse)
+
+    def test_not_modified_passes_through(self):
+        url = f'/api/case-notes/client/{self.client1.id}'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
@@ -0,0 +1,101 @@
+"""
+SQLite connection profile and maintenance command tests
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from config.sqlite import apply_pragmas, pragma, table_names, write_transaction
+
+
+class SQLiteProfileTest(TestCase):
+    """Every connection gets the SQLITE_PRAGMAS profile"""
+
+    def test_pragmas_applied_on_connect(self):
+        self.assertEqual(pragma(connection, 'synchronous'), 1)  # NORMAL
+        self.assertEqual(pragma(connection, 'busy_timeout'), 5000)
+        self.assertEqual(pragma(connection, 'cache_size'), -64000)
+        self.assertEqual(pragma(connection, 'temp_store'), 2)  # MEMORY
+
+    @override_settings(SQLITE_PRAGMAS={'cache_size': -2000})
+    def test_apply_pragmas_uses_settings(self):
+        apply_pragmas(connection)
+        self.assertEqual(pragma(connection, 'cache_size'), -2000)
+        apply_pragmas(connection, {'cache_size': -64000})
+
+    def test_rejects_invalid_pragma_names(self):
+        with self.assertRaises(ValueError):
+            apply_pragmas(connection, {'cache_size = 1; DROP TABLE x; --': 1})
+
+    def test_table_names_skip_fts_shadow_tables(self):
+        tables = table_names(connection)
+        self.assertIn('case_notes_casenote', tables)
+        self.assertFalse([table for table in tables if table.startswith('case_notes_casenote_fts')])
+
+
+class DBMaintenanceCommandTest(TestCase):
+    """db_maintenance runs every step against the live database"""
+
+    def test_runs_all_steps(self):
+        out = StringIO()
+        call_command('db_maintenance', stdout=out)
+        output = out.getvalue()
+        for step in ('analyze', 'optimize', 'fts merge', 'incremental vacuum', 'wal checkpoint'):
+            self.assertIn(step, output)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM sqlite_master WHERE name = 'sqlite_stat1'")
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_skip_flags(self):
+        out = StringIO()
+        call_command('db_maintenance', '--skip-analyze', '--skip-fts', '--skip-vacuum', stdout=out)
+        self.assertNotIn('analyze', out.getvalue())
+        self.assertIn('wal checkpoint', out.getvalue())
+
+
+class WriteTransactionTest(TransactionTestCase):
+    """Only write_transaction() begins IMMEDIATE; other transactions stay deferred"""
+
+    def begin_modes(self, block):
+        """transaction_mode in effect at each BEGIN issued while `block` runs"""
+        from unittest import mock
+
+        modes = []
+        begin = connection._start_transaction_under_autocommit
+
+        def record():
+            modes.append(connection.transaction_mode)
+            begin()
+
+        connection.ensure_connection()
+        with mock.patch.object(connection, '_start_transaction_under_autocommit', side_effect=record):
+            block()
+        return modes
+
+    def test_atomic_is_deferred(self):
+        def block():
+            with transaction.atomic():
+                connection.cursor().execute('SELECT 1')
+
+        self.assertEqual(self.begin_modes(block), [None])
+
+    def test_write_transaction_begins_immediate(self):
+        def block():
+            with write_transaction():
+                # Only the BEGIN of this transaction
+                self.assertIsNone(connection.transaction_mode)
+            with transaction.atomic():
+                pass
+
+        self.assertEqual(self.begin_modes(block), ['IMMEDIATE', None])
+        self.assertIsNone(connection.transaction_mode)
+
+    def test_nested_write_transaction_is_a_savepoint(self):
+        def block():
+            with transaction.atomic():
+                with write_transaction():
+                    connection.cursor().execute('SELECT 1')
+
+        self.assertEqual(self.begin_modes(block), [None])